@@ -0,0 +1 @@
+__all__ = ["cipher_suites", "hot_path", "session_context"]
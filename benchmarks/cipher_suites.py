@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# cipher_suites.py - Compara los MB/s de cada algoritmo de cifrado al
+# cifrar y descifrar mensajes con el contexto criptográfico de la sesión.
+#
+# Uso: python3 -m benchmarks.cipher_suites [-n NÚMERO] [-s TAMAÑO] [-c ALGORITMO ...]
+
+import time
+import argparse
+
+from modules.Crypt import ed25519
+from modules.Crypt import x25519_xsalsa20_poly1305MAC as scheme
+from utils.Crypt import hibrid
+from utils.Crypt import options
+
+def _contexts(cipher, signature):
+    (bob_keys, alice_keys) = (ed25519.to_raw(), ed25519.to_raw())
+    (ecdh_bob, ecdh_alice) = (scheme.to_raw(), scheme.to_raw())
+
+    bob = hibrid.Context(
+        scheme.InitSession(ecdh_alice.public, ecdh_bob.private),
+        bob_keys.private,
+        alice_keys.public,
+        signature
+
+    )
+    alice = hibrid.Context(
+        scheme.InitSession(ecdh_bob.public, ecdh_alice.private),
+        alice_keys.private,
+        bob_keys.public,
+        signature
+
+    )
+
+    bob.set_cipher(cipher)
+    alice.set_cipher(cipher)
+
+    return (bob, alice)
+
+def measure(cipher, count, data, signature):
+    (bob, alice) = _contexts(cipher, signature)
+
+    start = time.perf_counter()
+
+    for _ in range(count):
+        message = bob.encrypt(data, False)
+
+        if (isinstance(message, list)):
+            message = b"".join(message)
+
+        alice.decrypt(message, is_packed=False)
+
+    elapsed = time.perf_counter() - start
+
+    return (count * len(data)) / elapsed / 2**20
+
+def main():
+    parser = argparse.ArgumentParser(description="MB/s por algoritmo de cifrado")
+    parser.add_argument("-n", "--count", type=int, default=50, help="Número de mensajes")
+    parser.add_argument("-s", "--size", type=int, default=2**20, help="Tamaño de cada mensaje en bytes")
+    parser.add_argument(
+        "-c", "--cipher", action="append", choices=options.CIPHER_MODES,
+        help="El algoritmo a medir. Por defecto se miden todos."
+
+    )
+    parser.add_argument(
+        "--signature", default=options.SIGNATURE_DETACHED, choices=options.SIGNATURE_MODES,
+        help="El formato de la firma"
+
+    )
+    args = parser.parse_args()
+
+    data = b"\x00" * args.size
+
+    print("Tamaño del mensaje: %d bytes; firma: %s" % (args.size, args.signature))
+
+    for cipher in (args.cipher or options.CIPHER_MODES):
+        print("%-20s: %.2f MB/s" % (cipher, measure(cipher, args.count, data, args.signature)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# hot_path.py - Mide las operaciones por segundo, los MB/s y las asignaciones
+# de memoria de la criptografía y del análisis de cada mensaje:
+#
+#   * ed25519.sign / ed25519.verify
+#   * La creación de InitSession
+#   * hibrid.encrypt / hibrid.decrypt (con y sin msgpack) y hibrid.Context
+#   * Parser.build -> Parser.destroy
+#
+# Los resultados se pueden guardar en formato JSON y compararse con los de
+# otra versión para detectar regresiones.
+#
+# Uso: python3 -m benchmarks.hot_path [-s TAMAÑO ...] [-t SEGUNDOS] [-o SALIDA.json] [-c ANTERIOR.json]
+
+import os
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import platform
+import argparse
+import tempfile
+import tracemalloc
+
+from modules.Crypt import ed25519
+from modules.Crypt import x25519_xsalsa20_poly1305MAC as scheme
+from modules.Infrastructure import parse
+from utils.Crypt import hibrid
+
+# De 64 B a 64 MiB
+SIZES = (64, 2**10, 2**10*64, 2**20, 2**20*16, 2**20*64)
+
+# La variación (en porcentaje) a partir de la cual se señala una regresión
+THRESHOLD = 10
+
+def _keys():
+    return {
+        "bob"       : ed25519.to_raw(),
+        "alice"     : ed25519.to_raw(),
+        "ecdh_bob"  : scheme.to_raw(),
+        "ecdh_alice": scheme.to_raw()
+
+    }
+
+def case_ed25519_sign(keys, data):
+    private = keys["bob"].private
+
+    return lambda: ed25519.sign(private, data)
+
+def case_ed25519_verify(keys, data):
+    (public, signed) = (keys["bob"].public, ed25519.sign(keys["bob"].private, data))
+
+    return lambda: ed25519.verify(public, signed)
+
+def case_init_session(keys, data):
+    (public, private) = (keys["ecdh_alice"].public, keys["ecdh_bob"].private)
+
+    return lambda: scheme.InitSession(public, private)
+
+def _hibrid(keys, data, is_packed):
+    args = (keys["ecdh_alice"].public, keys["ecdh_bob"].private)
+    reverse = (keys["ecdh_bob"].public, keys["ecdh_alice"].private)
+
+    def run():
+        hibrid.decrypt(
+            keys["bob"].public, *reverse,
+            hibrid.encrypt(keys["bob"].private, *args, data, is_packed),
+            is_packed
+
+        )
+
+    return run
+
+def case_hibrid_raw(keys, data):
+    return _hibrid(keys, data, False)
+
+def case_hibrid_packed(keys, data):
+    return _hibrid(keys, data, True)
+
+def case_hibrid_context(keys, data):
+    bob = hibrid.Context(
+        scheme.InitSession(keys["ecdh_alice"].public, keys["ecdh_bob"].private),
+        keys["bob"].private
+
+    )
+    alice = hibrid.Context(
+        scheme.InitSession(keys["ecdh_bob"].public, keys["ecdh_alice"].private),
+        keys["alice"].private,
+        keys["bob"].public
+
+    )
+
+    return lambda: alice.decrypt(bob.encrypt(data, False), is_packed=False)
+
+def case_parser_roundtrip(keys, data, *, init_path, loop):
+    real_user = hashlib.sha3_224(b"bob").digest()
+
+    with open(os.path.join(init_path, "pubkeys", real_user.hex()), "wb") as fd:
+        fd.write(keys["bob"].public)
+
+    bob = parse.Parser(
+        scheme.InitSession(keys["ecdh_alice"].public, keys["ecdh_bob"].private),
+        keys["bob"].private, init_path
+
+    )
+    alice = parse.Parser(
+        scheme.InitSession(keys["ecdh_bob"].public, keys["ecdh_alice"].private),
+        keys["alice"].private, init_path
+
+    )
+
+    return lambda: loop.run_until_complete(
+        alice.destroy(bob.build(data, is_packed=False), real_user, is_packed=False)
+
+    )
+
+# Las funciones que no dependen del tamaño se miden una sola vez
+CASES = {
+    "ed25519.sign"         : (case_ed25519_sign, True),
+    "ed25519.verify"       : (case_ed25519_verify, True),
+    "InitSession"          : (case_init_session, False),
+    "hibrid (raw)"         : (case_hibrid_raw, True),
+    "hibrid (packed)"      : (case_hibrid_packed, True),
+    "hibrid.Context"       : (case_hibrid_context, True),
+    "Parser build/destroy" : (case_parser_roundtrip, True)
+
+}
+
+def measure(function, size, min_time):
+    # Se calienta una vez y luego se repite hasta que pase `min_time`
+    function()
+
+    count = 0
+    start = time.perf_counter()
+
+    while (True):
+        function()
+        count += 1
+
+        elapsed = time.perf_counter() - start
+
+        if (elapsed >= min_time):
+            break
+
+    # Las asignaciones se miden aparte para no afectar al tiempo
+    tracemalloc.start()
+    snapshot = tracemalloc.take_snapshot()
+    # El pico se reinicia después de la instantánea para no contar lo que ocupa
+    tracemalloc.reset_peak()
+    (before, _) = tracemalloc.get_traced_memory()
+
+    function()
+
+    (current, peak) = tracemalloc.get_traced_memory()
+    allocations = sum(
+        max(stat.count_diff, 0) for stat in tracemalloc.take_snapshot().compare_to(snapshot, "filename")
+
+    )
+    tracemalloc.stop()
+
+    ops = count / elapsed
+
+    return {
+        "size"        : size,
+        "ops"         : ops,
+        "mb_s"        : ops * size / 2**20,
+        "peak_bytes"  : peak - before,
+        "allocations" : allocations
+
+    }
+
+def run(sizes, min_time, names=None):
+    keys = _keys()
+
+    loop = asyncio.new_event_loop()
+
+    try:
+        with tempfile.TemporaryDirectory() as init_path:
+            os.mkdir(os.path.join(init_path, "pubkeys"))
+
+            for name, (case, by_size) in CASES.items():
+                if (names) and not (name in names):
+                    continue
+
+                for size in (sizes if (by_size) else (0,)):
+                    data = os.urandom(size)
+
+                    if (case is case_parser_roundtrip):
+                        function = case(keys, data, init_path=init_path, loop=loop)
+
+                    else:
+                        function = case(keys, data)
+
+                    yield (name, measure(function, size, min_time))
+
+    finally:
+        loop.close()
+
+def _human(size):
+    for unit in ("B", "KiB", "MiB"):
+        if (size < 1024):
+            return "%d %s" % (size, unit)
+
+        size //= 1024
+
+    return "%d GiB" % (size)
+
+def _compare(previous, name, result):
+    for old in previous.get("results", {}).get(name, ()):
+        if (old["size"] == result["size"]):
+            change = (result["ops"] - old["ops"]) / old["ops"] * 100
+
+            return "%+7.1f%%%s" % (change, " (!)" if (change <= -THRESHOLD) else "")
+
+    return ""
+
+def main():
+    parser = argparse.ArgumentParser(description="Rendimiento de la criptografía y del análisis de los mensajes")
+    parser.add_argument("-s", "--size", type=int, action="append", help="Tamaño de los datos en bytes. Por defecto de 64 B a 64 MiB.")
+    parser.add_argument("-t", "--time", type=float, default=1, help="Segundos mínimos por cada medición")
+    parser.add_argument("-b", "--bench", action="append", choices=CASES, help="Lo que se medirá. Por defecto todo.")
+    parser.add_argument("-o", "--output", help="Guardar los resultados en un archivo JSON")
+    parser.add_argument("-c", "--compare", help="Comparar con los resultados de un archivo JSON anterior")
+    args = parser.parse_args()
+
+    previous = {}
+
+    if (args.compare):
+        with open(args.compare) as fd:
+            previous = json.load(fd)
+
+    results = {}
+
+    print("%-22s %10s %14s %12s %12s %8s %s" % (
+        "", "Tamaño", "ops/s", "MB/s", "Pico", "Asign.", "Cambio" if (previous) else ""
+
+    ))
+
+    for name, result in run(args.size or SIZES, args.time, args.bench):
+        results.setdefault(name, []).append(result)
+
+        print("%-22s %10s %14.2f %12.2f %12s %8d %s" % (
+            name,
+            _human(result["size"]),
+            result["ops"],
+            result["mb_s"],
+            _human(result["peak_bytes"]),
+            result["allocations"],
+            _compare(previous, name, result)
+
+        ))
+
+    if (args.output):
+        with open(args.output, "w") as fd:
+            json.dump({
+                "python"   : sys.version,
+                "platform" : platform.platform(),
+                "date"     : time.strftime("%Y-%m-%d %H:%M:%S"),
+                "results"  : results
+
+            }, fd, indent=4)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# session_context.py - Compara los mensajes por segundo al cifrar y descifrar
+# creando el esquema por cada mensaje (como se hacía antes) y reutilizando el
+# contexto criptográfico de la sesión.
+#
+# Uso: python3 -m benchmarks.session_context [-n NÚMERO] [-s TAMAÑO]
+
+import time
+import argparse
+
+from modules.Crypt import ed25519
+from modules.Crypt import x25519_xsalsa20_poly1305MAC as scheme
+from utils.Crypt import hibrid
+
+def _per_message(count, data, bob_keys, alice_keys, ecdh_bob, ecdh_alice):
+    for _ in range(count):
+        message = hibrid.encrypt(
+            bob_keys.private, ecdh_alice.public, ecdh_bob.private, data, False
+
+        )
+        hibrid.decrypt(
+            bob_keys.public, ecdh_bob.public, ecdh_alice.private, message, False
+
+        )
+
+def _per_session(count, data, bob_keys, alice_keys, ecdh_bob, ecdh_alice):
+    bob = hibrid.Context(
+        scheme.InitSession(ecdh_alice.public, ecdh_bob.private),
+        bob_keys.private
+
+    )
+    alice = hibrid.Context(
+        scheme.InitSession(ecdh_bob.public, ecdh_alice.private),
+        alice_keys.private,
+        bob_keys.public
+
+    )
+
+    for _ in range(count):
+        alice.decrypt(bob.encrypt(data, False), is_packed=False)
+
+def measure(function, count, *args):
+    start = time.perf_counter()
+    function(count, *args)
+    elapsed = time.perf_counter() - start
+
+    return count / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Contexto por mensaje vs. contexto por sesión")
+    parser.add_argument("-n", "--count", type=int, default=5000, help="Número de mensajes")
+    parser.add_argument("-s", "--size", type=int, default=64, help="Tamaño de cada mensaje en bytes")
+    args = parser.parse_args()
+
+    keys = (
+        ed25519.to_raw(), ed25519.to_raw(),
+        scheme.to_raw(), scheme.to_raw()
+
+    )
+    data = b"\x00" * args.size
+
+    before = measure(_per_message, args.count, data, *keys)
+    after = measure(_per_session, args.count, data, *keys)
+
+    print("Tamaño del mensaje : %d bytes" % (args.size))
+    print("Antes (por mensaje): %.2f mensajes/s" % (before))
+    print("Ahora (por sesión) : %.2f mensajes/s" % (after))
+    print("Mejora             : x%.2f" % (after / before))
+
+if __name__ == "__main__":
+    main()
@@ -39,6 +39,7 @@ defaults = {
     "Server" : {
         "lhost"                        : "127.0.0.1",
         "lport"                        : 17000,
+        "workers"                      : 1,
         "mysql_db"                     : "UTesla",
         "plugins"                      : "modules/Cmd",
         "services"                     : "services/",
@@ -53,10 +54,22 @@ defaults = {
         "verify_mysql_cert"            : True,
         "recv_timeout"                 : 120,
         "read_chunk_size"              : 2**10*64,
+        "stream_chunk_size"            : 2**20,
+        "ticket_lifetime"              : 3600,
+        "user_cache_ttl"               : 30,
+        "token_cache_ttl"              : 30,
+        "routing_table_ttl"            : 60,
+        "crypt_workers"                : 4,
+        "crypt_threshold"              : 2**20,
+        "pipeline_depth"               : 16,
+        "process_workers"              : 2,
+        "thread_workers"               : 4,
         "index_name"                   : "index",
         "admin_service"                : "admin",
         "autoreload"                   : False,
-        "check_time"                   : 500
+        "reload_mode"                  : "process",
+        "check_time"                   : 500,
+        "services_check_time"          : 2000
 
     },
 
@@ -88,7 +101,13 @@ defaults = {
     "MySQL" : {
         "ssl_ca"                       : None,
         "ssl_cert"                     : None,
-        "ssl_key"                      : None
+        "ssl_key"                      : None,
+        "fetch_size"                   : 256,
+        "pool_minsize"                 : 1,
+        "pool_maxsize"                 : 10,
+        "pool_recycle"                 : 3600,
+        "connect_timeout"              : 60,
+        "pool_prewarm"                 : True
 
     }
 
@@ -125,6 +144,7 @@ dictionary = {
     "Server"       : [
         ("lhost", str),
         ("lport", int),
+        ("workers", int),
         ("mysql_db", str),
         ("plugins", str),
         ("services", str),
@@ -139,10 +159,22 @@ dictionary = {
         ("verify_mysql_cert", bool),
         ("recv_timeout", int),
         ("read_chunk_size", int),
+        ("stream_chunk_size", int),
+        ("ticket_lifetime", int),
+        ("user_cache_ttl", int),
+        ("token_cache_ttl", int),
+        ("routing_table_ttl", int),
+        ("crypt_workers", int),
+        ("crypt_threshold", int),
+        ("pipeline_depth", int),
+        ("process_workers", int),
+        ("thread_workers", int),
         ("index_name", str),
         ("admin_service", str),
         ("autoreload", bool),
-        ("check_time", int)
+        ("reload_mode", str),
+        ("check_time", int),
+        ("services_check_time", int)
 
     ],
     
@@ -175,7 +207,13 @@ dictionary = {
     "MySQL"        : [
         ("ssl_ca", str),
         ("ssl_cert", str),
-        ("ssl_key", str)
+        ("ssl_key", str),
+        ("fetch_size", int),
+        ("pool_minsize", int),
+        ("pool_maxsize", int),
+        ("pool_recycle", int),
+        ("connect_timeout", int),
+        ("pool_prewarm", bool)
 
     ]
 
@@ -214,6 +252,29 @@ initializer_methods_name = "INITIALIZER"
 # El nombre del método que envía un objeto que además de controlar, también contiene
 # información de la sesión.
 set_controller_methods_name = "SET_CONTROLLER"
+#
+# El nombre de la propiedad que indica cuánto vive la instancia del servicio:
+# 'request' (una por petición, por defecto), 'connection' (una por conexión) o
+# 'singleton' (una para todo el proceso). Las instancias por conexión y la
+# instancia única se crean con los parámetros de inicialización de la primera
+# petición que las usa; los de las siguientes se ignoran.
+lifecycle_methods_name = "LIFECYCLE"
+#
+# Los nombres de los métodos (sin argumentos y opcionalmente asincrónicos) que
+# se ejecutan al crear y al descartar una instancia que vive por conexión o por
+# proceso.
+warmup_methods_name = "WARMUP"
+shutdown_methods_name = "SHUTDOWN"
+#
+# El nombre del diccionario que indica qué acciones se ejecutan en un proceso
+# ('process') o en un hilo ('thread') en vez del bucle de eventos, y el nombre
+# de la propiedad que limita cuántas se ejecutan a la vez en el servicio.
+#
+# En un proceso, cada acción usa una nueva instancia creada sólo con los
+# parámetros de inicialización: no recibe el controlador ('SET_CONTROLLER'),
+# no se llama a 'INITIALIZER' ni a 'WARMUP' y no se respeta 'LIFECYCLE'.
+executors_name = "EXECUTORS"
+concurrency_name = "CONCURRENCY"
 
 # Usado para indicar el final de una transferencia de datos
 end_chunk = "\r\n\r\n"
@@ -1 +1 @@
-__all__ = ["ed25519", "x25519_xsalsa20_poly1305MAC"]
+__all__ = ["aead", "ed25519", "x25519_xsalsa20_poly1305MAC"]
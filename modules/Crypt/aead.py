@@ -0,0 +1,133 @@
+import hashlib
+from typing import Optional
+
+import nacl.utils
+import nacl.secret
+import nacl.bindings
+import nacl.exceptions
+import cryptography.exceptions
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from utils.Crypt import options
+from utils.extra import create_translation
+
+_ = create_translation.create("aead")
+
+KEY_SIZE = 32
+
+def derive_key(shared_key: bytes, name: str, direction: bytes = b"") -> bytes:
+    """Deriva la clave de un algoritmo desde la clave compartida
+
+    Cada algoritmo usa una clave diferente para que nunca se use la misma
+    clave con dos algoritmos.
+
+    Args:
+        shared_key:
+          La clave compartida de la sesión
+
+        name:
+          El nombre del algoritmo
+
+        direction:
+          La dirección de los mensajes. Véase `options.DIRECTION_CLIENT` y
+          `options.DIRECTION_SERVER`.
+
+    Returns:
+        La clave derivada
+    """
+
+    return hashlib.blake2b(
+        name.encode(),
+        key = shared_key,
+        person = direction,
+        digest_size = KEY_SIZE
+
+    ).digest()
+
+class AES256GCM(object):
+    """Cifrado autenticado AES-256-GCM
+
+    Usa `cryptography`, el cual aprovecha las instrucciones AES-NI cuando
+    el procesador las tiene. Los mensajes tienen el mismo formato que los
+    de `nacl.public.Box`: el nonce seguido del mensaje cifrado.
+    """
+
+    NONCE_SIZE = 12
+
+    def __init__(self, key: bytes):
+        self._aead = AESGCM(key)
+
+    def encrypt(self, data: bytes, nonce: Optional[bytes] = None) -> bytes:
+        """Encripta datos"""
+
+        if (nonce is None):
+            nonce = nacl.utils.random(self.NONCE_SIZE)
+
+        return nonce + self._aead.encrypt(nonce, data, None)
+
+    def decrypt(self, data: bytes, nonce: Optional[bytes] = None) -> bytes:
+        """Descifra datos"""
+
+        if (nonce is None):
+            (nonce, data) = (data[:self.NONCE_SIZE], data[self.NONCE_SIZE:])
+
+        try:
+            return self._aead.decrypt(nonce, data, None)
+
+        except cryptography.exceptions.InvalidTag:
+            raise nacl.exceptions.CryptoError(_("El mensaje cifrado no es válido"))
+
+class XChaCha20Poly1305(object):
+    """Cifrado autenticado XChaCha20-Poly1305 (IETF)
+
+    Es más rápido que AES-256-GCM en los procesadores sin AES-NI y, al
+    igual que `nacl.public.Box`, usa un nonce de 24 bytes.
+    """
+
+    NONCE_SIZE = nacl.bindings.crypto_aead_xchacha20poly1305_ietf_NPUBBYTES
+
+    def __init__(self, key: bytes):
+        self._key = key
+
+    def encrypt(self, data: bytes, nonce: Optional[bytes] = None) -> bytes:
+        """Encripta datos"""
+
+        if (nonce is None):
+            nonce = nacl.utils.random(self.NONCE_SIZE)
+
+        return nonce + nacl.bindings.crypto_aead_xchacha20poly1305_ietf_encrypt(
+            data, None, nonce, self._key
+
+        )
+
+    def decrypt(self, data: bytes, nonce: Optional[bytes] = None) -> bytes:
+        """Descifra datos"""
+
+        if (nonce is None):
+            (nonce, data) = (data[:self.NONCE_SIZE], data[self.NONCE_SIZE:])
+
+        return nacl.bindings.crypto_aead_xchacha20poly1305_ietf_decrypt(
+            data, None, nonce, self._key
+
+        )
+
+# Los algoritmos que se pueden crear desde una clave compartida
+ciphers = {
+    options.CIPHER_XSALSA20_POLY1305  : nacl.secret.SecretBox,
+    options.CIPHER_AES256_GCM         : AES256GCM,
+    options.CIPHER_XCHACHA20_POLY1305 : XChaCha20Poly1305
+
+}
+
+def new(name: str, shared_key: bytes, direction: bytes = b""):
+    """Crea el algoritmo ``name`` con una clave derivada de ``shared_key``
+
+    Raises:
+        ValueError: Cuando el algoritmo no existe
+    """
+
+    if not (name in ciphers):
+        raise ValueError(_("Algoritmo de cifrado inválido: {}").format(name))
+
+    return ciphers[name](derive_key(shared_key, name, direction))
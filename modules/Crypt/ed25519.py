@@ -2,6 +2,10 @@ import inspect
 from typing import Tuple, Union, Optional
 
 import nacl.signing
+import nacl.exceptions
+import cryptography.exceptions
+
+from cryptography.hazmat.primitives.asymmetric import ed25519 as _ed25519
 
 from modules.Crypt import utils
 from utils.extra import create_translation
@@ -136,3 +140,81 @@ def verify(verifyKey: bytes, *args, **kwargs) -> bytes:
     verifySignature = nacl.signing.VerifyKey(verifyKey)
 
     return verifySignature.verify(*args, **kwargs)
+
+def import_detached(
+    verifyKey: Optional[bytes] = None,
+    signingKey: Optional[bytes] = None
+
+) -> Tuple[Optional["_ed25519.Ed25519PublicKey"], Optional["_ed25519.Ed25519PrivateKey"]]:
+    """Importa las claves para usar firmas separadas del mensaje
+
+    A diferencia de `sign()` y `verify()`, las firmas separadas no requieren
+    concatenar la firma con el mensaje, por lo que se puede firmar y
+    verificar sobre un `memoryview` sin copiar los datos.
+
+    Args:
+        verifyKey:
+          La clave de verificación
+
+        signingKey:
+          La clave para firmar (la semilla generada por ``to_raw()``)
+
+    Returns:
+        Una tupla con la clave de verificación y la clave para firmar
+    """
+
+    tuple = _tuple()
+
+    if (verifyKey is not None):
+        verifyKey = _ed25519.Ed25519PublicKey.from_public_bytes(verifyKey)
+
+    if (signingKey is not None):
+        signingKey = _ed25519.Ed25519PrivateKey.from_private_bytes(signingKey)
+
+    return tuple(verifyKey, signingKey)
+
+def sign_detached(signingKey: "_ed25519.Ed25519PrivateKey", data: bytes) -> bytes:
+    """Firmar datos sin adjuntarlos a la firma
+
+    Args:
+        signingKey:
+          La clave para firmar importada con ``import_detached()``
+
+        data:
+          Los datos a firmar
+
+    Returns:
+        La firma (64 bytes)
+    """
+
+    return signingKey.sign(data)
+
+def verify_detached(
+    verifyKey: "_ed25519.Ed25519PublicKey",
+    signature: bytes,
+    data: bytes
+
+) -> None:
+    """Verificar una firma separada del mensaje
+
+    Args:
+        verifyKey:
+          La clave de verificación importada con ``import_detached()``
+
+        signature:
+          La firma
+
+        data:
+          Los datos firmados
+
+    Raises:
+        nacl.exceptions.BadSignatureError:
+          Cuando la firma no es válida. Se usa la misma excepción que
+          ``verify()`` para que quien la capture no tenga que distinguirlas.
+    """
+
+    try:
+        verifyKey.verify(signature, data)
+
+    except cryptography.exceptions.InvalidSignature:
+        raise nacl.exceptions.BadSignatureError(_("La firma no es válida"))
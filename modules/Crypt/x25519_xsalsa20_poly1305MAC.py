@@ -58,6 +58,8 @@ class InitSession(object):
     y a su vez, entablar una comunicación segura.
     """
 
+    NONCE_SIZE = nacl.public.Box.NONCE_SIZE
+
     def __init__(
         self,
         pk_dst: bytes,
@@ -84,6 +86,9 @@ class InitSession(object):
         self._pk_dst = nacl.public.PublicKey(pk_dst)
 
         self._box = nacl.public.Box(self._sk_src, self._pk_dst)
+        # Las claves del remitente no cambian durante la sesión, por lo que
+        # no es necesario volver a generar la tupla en cada petición.
+        self._source = to_raw(generate(self._sk_src))
 
     @property
     def destination(self) -> bytes:
@@ -95,7 +100,48 @@ class InitSession(object):
     def source(self) -> bytes:
         """La clave pública y privada del remitente"""
 
-        return to_raw(generate(self._sk_src))
+        return self._source
+
+    @property
+    def shared_key(self) -> bytes:
+        """La clave compartida precalculada (X25519 + HSalsa20)"""
+
+        return self._box.shared_key()
+
+    def encrypt(self, *args, **kwargs) -> bytes:
+        """Encripta datos"""
+
+        return self._box.encrypt(*args, **kwargs)
+
+    def decrypt(self, *args, **kwargs) -> bytes:
+        """Descifra datos"""
+
+        return self._box.decrypt(*args, **kwargs)
+
+class SharedSession(object):
+    """Crea una sesión desde una clave compartida
+
+    A diferencia de `InitSession`, no se realiza ninguna multiplicación
+    escalar, por lo que es útil cuando ambas partes ya acordaron la clave
+    compartida (p.ej. al reanudar una sesión).
+    """
+
+    NONCE_SIZE = nacl.public.Box.NONCE_SIZE
+
+    def __init__(self, shared_key: bytes):
+        """
+        Args:
+            shared_key:
+              La clave compartida
+        """
+
+        self._box = nacl.public.Box.decode(shared_key)
+
+    @property
+    def shared_key(self) -> bytes:
+        """La clave compartida"""
+
+        return self._box.shared_key()
 
     def encrypt(self, *args, **kwargs) -> bytes:
         """Encripta datos"""
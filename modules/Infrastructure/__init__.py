@@ -1 +1 @@
-__all__ = ["client", "core", "dbConnector", "parse"]
+__all__ = ["client", "contract", "core", "dbConnector", "executor", "keycache", "lifecycle", "parse", "poolstats", "prefork", "registry", "resumption", "routing", "tokencache", "usercache"]
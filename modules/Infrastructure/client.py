@@ -1,3 +1,5 @@
+import time
+import inspect
 import logging
 import hashlib
 import asyncio
@@ -7,11 +9,14 @@ from typing import Optional, Any, Tuple, Union, Dict
 import aiofiles
 import tornado.tcpclient
 import tornado.iostream
+import nacl.utils
 
 from modules.Crypt import x25519_xsalsa20_poly1305MAC
 from modules.Crypt import ed25519
 from modules.Infrastructure import options
 from modules.Infrastructure import utils
+from modules.Infrastructure import resumption
+from utils.Crypt import options as crypt_options
 from utils.extra import create_translation
 
 from utils.General import parse_config
@@ -20,6 +25,9 @@ config = parse_config.parse()
 
 _ = create_translation.create("client")
 
+# La respuesta de una petición enviada con `UTeslaStreamControl.submit()`
+Response = inspect.namedtuple("Response", ("headers", "data"))
+
 class UTeslaStreamControl(utils.MainClient):
     def __init__(
         self,
@@ -56,6 +64,19 @@ class UTeslaStreamControl(utils.MainClient):
         self.public_key_length = public_key_length
         self.__server_ecdh_key = None
         self.__server_key = None
+        # Las características que se solicitarán si el servidor las anuncia
+        self.__preferences = {}
+        # El último cuerpo transmitido en fragmentos por el servidor
+        self.__reader = None
+        # El ticket para reanudar la sesión en la siguiente conexión
+        self.__ticket = None
+        self.__use_ticket = False
+        self.__resumed = False
+        # Las peticiones enviadas con `submit()` que esperan su respuesta
+        self.__pending = {}
+        self.__last_id = 0
+        self.__dispatcher = None
+        self.__submit_lock = asyncio.Lock()
 
         self.request.set_real_user(
             hashlib.sha3_224(user.encode()).digest()
@@ -86,6 +107,18 @@ class UTeslaStreamControl(utils.MainClient):
         self.request.set_status_code(data.get("status_code", -1))
         self.request.set_status(data.get("status"))
 
+        ticket = data.get("ticket")
+
+        if (isinstance(ticket, bytes)):
+            self.__ticket = resumption.Ticket(
+                ticket,
+                self.resumption_secret,
+                time.time() + self.get_features().get("ticket", 0)
+
+            )
+
+            self.request.headers.pop("ticket")
+
     def __reverse_bool(self, key, val):
         val = super().get_header(key, val)
         new_val = not val
@@ -119,6 +152,116 @@ class UTeslaStreamControl(utils.MainClient):
 
         super().set_header("node", ())
 
+    def get_features(self) -> dict:
+        """Obtiene las características que anunció el servidor
+
+        Returns:
+            Un diccionario con las características. Estará vacío hasta
+            que se lea la primera respuesta del servidor.
+        """
+
+        features = self.request.get_header("features")
+
+        if not (isinstance(features, dict)):
+            features = {}
+
+        return features
+
+    def use_framing(self, framing: Optional[str] = options.FRAMING_LENGTH, /) -> None:
+        """Ajusta el modo de enmarcado que se desea usar
+
+        El modo se solicita en los encabezados de la siguiente petición que
+        se realice después de que el servidor anuncie que lo soporta, por lo
+        que los servidores antiguos seguirán usando el delimitador.
+
+        Args:
+            framing:
+              El modo de enmarcado. **None** para no solicitar ninguno.
+        """
+
+        if (framing is not None) and not (framing in options.FRAMING_MODES):
+            raise ValueError(_("Modo de enmarcado inválido: {}").format(framing))
+
+        self.__preferences["framing"] = framing
+
+    def use_signature(self, signature: Optional[str] = crypt_options.SIGNATURE_DETACHED, /) -> None:
+        """Ajusta el formato de la firma que se desea usar
+
+        Al igual que `use_framing`, sólo se solicita si el servidor lo anuncia.
+        Con ``"aead"`` los mensajes dejan de firmarse y solo los autentica
+        el cifrado, lo cual es mucho más rápido con mensajes pequeños.
+
+        Args:
+            signature:
+              El formato de la firma. **None** para no solicitar ninguno.
+        """
+
+        if (signature is not None) and not (signature in crypt_options.SIGNATURE_MODES):
+            raise ValueError(_("Formato de firma inválido: {}").format(signature))
+
+        self.__preferences["signature"] = signature
+
+    def use_cipher(self, cipher: Optional[str] = crypt_options.CIPHER_AES256_GCM, /) -> None:
+        """Ajusta el algoritmo de cifrado que se desea usar
+
+        Al igual que `use_framing`, sólo se solicita si el servidor lo anuncia.
+
+        Args:
+            cipher:
+              El algoritmo de cifrado. **None** para no solicitar ninguno.
+        """
+
+        if (cipher is not None) and not (cipher in crypt_options.CIPHER_MODES):
+            raise ValueError(_("Algoritmo de cifrado inválido: {}").format(cipher))
+
+        self.__preferences["cipher"] = cipher
+
+    def use_ticket(self, enabled: bool = True, /) -> None:
+        """Solicita un ticket para reanudar la sesión
+
+        El ticket se solicita en la siguiente petición (si el servidor
+        anuncia que los emite) y se obtiene con `get_ticket()`.
+        """
+
+        self.__use_ticket = enabled
+
+    def get_ticket(self) -> Optional["resumption.Ticket"]:
+        """Obtiene el ticket para reanudar la sesión
+
+        Returns:
+            El ticket o **None** si el servidor aún no ha emitido uno
+        """
+
+        return self.__ticket
+
+    def set_ticket(self, ticket: Optional["resumption.Ticket"], /) -> None:
+        """Ajusta el ticket con el que se reanudará la sesión
+
+        Debe ajustarse antes de la primera petición. Si el servidor lo
+        rechaza, se realiza el intercambio de claves completo.
+        """
+
+        self.__ticket = ticket
+
+    @property
+    def resumed(self) -> bool:
+        """**True** si la sesión actual fue reanudada con un ticket"""
+
+        return self.__resumed
+
+    def __request_features(self):
+        features = self.get_features()
+
+        for key, value in self.__preferences.items():
+            if (value is not None) and (value in features.get(key, ())):
+                super().set_header(key, value, str)
+
+        if (self.__use_ticket) and (self.__ticket is None) and (features.get("ticket")):
+            super().set_header("ticket", True, bool)
+
+        elif (super().get_header("ticket") is not None):
+            super().del_header("ticket")
+
     def set_packed(self) -> bool:
         """Usar o no `msgpack` para el intercambio de datos.
          
@@ -277,8 +420,41 @@ class UTeslaStreamControl(utils.MainClient):
 
         return super().get_header("token")
 
+    async def __resume(self):
+        ticket = self.__ticket
+
+        # Los tickets son de un solo uso
+        self.__ticket = None
+
+        if (ticket is None) or (ticket.expires <= time.time()):
+            return False
+
+        client_random = nacl.utils.random(options.RESUME_RANDOM_SIZE)
+
+        await self.write_data(options.RESUME_PREFIX + client_random + ticket.ticket)
+
+        reply = await self.recv_data(options.RESUME_LENGTH)
+        server_random = reply[len(options.RESUME_ACCEPT):]
+
+        if not (reply.startswith(options.RESUME_ACCEPT)) or \
+               (len(server_random) != options.RESUME_RANDOM_SIZE):
+            logging.debug(_("El servidor rechazó el ticket de reanudación"))
+            return False
+
+        self.set_shared_session(
+            resumption.derive_key(ticket.secret, client_random, server_random),
+            verify_key = self.__server_key
+
+        )
+
+        return True
+
     async def __shareData(self):
-        if (self.__server_ecdh_key is not None):
+        if (self.parse is not None):
+            return
+
+        if (await self.__resume()):
+            self.__resumed = True
             return
 
         await self.shareUsername()
@@ -290,28 +466,204 @@ class UTeslaStreamControl(utils.MainClient):
             
         )
         self.set_session(
-            self.__server_ecdh_key
+            self.__server_ecdh_key,
+            verify_key = self.__server_key
 
         )
 
+    async def __drain(self):
+        # Para no desincronizar el flujo, se descartan los fragmentos de
+        # la respuesta anterior que no se hayan leído.
+        if (self.__reader is not None):
+            await self.__reader.drain()
+
+            self.__reader = None
+
+    @property
+    def pending(self) -> int:
+        """El número de peticiones enviadas con `submit()` sin respuesta"""
+
+        return len(self.__pending)
+
+    async def join(self) -> None:
+        """Espera las respuestas de las peticiones enviadas con `submit()`"""
+
+        if (self.__dispatcher is not None):
+            await asyncio.gather(self.__dispatcher, return_exceptions=True)
+
+    async def submit(self, data: Any = None, *args, reply_packed: bool = True, **kwargs) -> "asyncio.Future":
+        """Envía una petición sin esperar la respuesta
+
+        Las peticiones llevan un identificador, por lo que el servidor puede
+        ejecutarlas a la vez y responderlas en cualquier orden. Si el servidor
+        no lo anuncia (o aún no se conocen sus características) la petición
+        se realiza de forma ordinaria y el futuro ya tendrá la respuesta.
+
+        Los cuerpos transmitidos en fragmentos por el servidor se unen en
+        uno solo.
+
+        Args:
+            data:
+              Los datos a enviar
+
+            reply_packed:
+              **True** si la respuesta usa `msgpack`
+
+            *args:
+              Argumentos variables para `utils.MainCalls.write()`
+
+            **kwargs:
+              Argumentos claves variables para `utils.MainCalls.write()`
+
+        Returns:
+            Un futuro con la respuesta (`Response`)
+        """
+
+        future = asyncio.get_running_loop().create_future()
+
+        async with self.__submit_lock:
+            if not (self.get_features().get("pipeline")):
+                await self.write(data, *args, **kwargs)
+
+                body = await self.read(is_packed=reply_packed)
+
+                if (isinstance(body, utils.StreamReader)):
+                    body = b"".join([chunk async for chunk in body])
+
+                future.set_result(Response(dict(self.request.headers), body))
+
+                return future
+
+            await self.__shareData()
+            await self.__drain()
+
+            self.__request_features()
+
+            # Los modos no pueden cambiar mientras haya respuestas pendientes
+            if (self.changes_negotiation(self.headers)):
+                await self.join()
+
+            self.__last_id += 1
+
+            headers = dict(self.headers)
+            headers["id"] = self.__last_id
+
+            self.__pending[self.__last_id] = (future, reply_packed)
+
+            try:
+                await super().write(data, headers, *args, **kwargs)
+
+            except:
+                self.__pending.pop(self.__last_id, None)
+                raise
+
+            if (self.__dispatcher is None) or (self.__dispatcher.done()):
+                self.__dispatcher = asyncio.ensure_future(self.__dispatch())
+
+        return future
+
+    async def __dispatch(self):
+        try:
+            while (self.__pending):
+                headers = await super().read(self.__server_key, self.headers_length)
+
+                self.__set_headers(headers)
+
+                if not (isinstance(headers, dict)) or not (headers.get("id") in self.__pending):
+                    raise RuntimeError(_("El servidor respondió a una petición desconocida"))
+
+                (future, is_packed) = self.__pending.pop(headers["id"])
+
+                if (headers.get("stream")):
+                    body = b"".join([chunk async for chunk in utils.StreamReader(self.__read_chunk)])
+
+                else:
+                    body = await super().read(self.__server_key, self.memory_limit, is_packed=is_packed)
+
+                if not (future.done()):
+                    future.set_result(Response(headers, body))
+
+        except Exception as err:
+            # Sin la respuesta actual no se pueden leer las siguientes
+            (pending, self.__pending) = (self.__pending, {})
+
+            for (future, _is_packed) in pending.values():
+                if not (future.done()):
+                    future.set_exception(err)
+
     async def write(self, *args, **kwargs):
         """Envía datos al servidor"""
 
+        await self.join()
         await self.__shareData()
+        await self.__drain()
+
+        self.__request_features()
+
         await super().write(*args, **kwargs)
 
+    async def write_stream(self, *args, chunk_size: Optional[int] = None, **kwargs):
+        """Envía el cuerpo al servidor en fragmentos
+
+        Args:
+            chunk_size:
+              El tamaño máximo de cada fragmento. Si no se especifica, se usa
+              el anunciado por el servidor.
+
+            *args:
+              Argumentos variables para `utils.MainCalls.write_stream()`
+
+            **kwargs:
+              Argumentos claves variables para `utils.MainCalls.write_stream()`
+
+        Raises:
+            RuntimeError: Cuando el servidor no ha anunciado que lo soporta
+        """
+
+        if (chunk_size is None):
+            chunk_size = self.get_features().get("stream")
+
+        if (chunk_size is None):
+            raise RuntimeError(_("El servidor no ha anunciado la transmisión por fragmentos"))
+
+        await self.join()
+        await self.__shareData()
+        await self.__drain()
+
+        self.__request_features()
+
+        await super().write_stream(*args, chunk_size=chunk_size, **kwargs)
+
+    async def __read_chunk(self):
+        chunk_size = self.get_features().get("stream", options.STREAM_CHUNK_SIZE)
+
+        return await super().read(
+            self.__server_key,
+            chunk_size + options.FRAME_OVERHEAD,
+            is_packed = False
+
+        )
+
     async def read(self, *args, **kwargs):
         """Lee datos que envió el servidor"""
 
         if (self.__server_key is None):
             raise RuntimeError(_("La clave pública del servidor aún no ha sido definida"))
 
+        await self.join()
         await self.__shareData()
+        await self.__drain()
 
-        self.__set_headers(
-            await super().read(self.__server_key, self.headers_length)
-                
-        )
+        headers = await super().read(self.__server_key, self.headers_length)
+
+        self.__set_headers(headers)
+
+        # El servidor transmite la respuesta en fragmentos, por lo que se
+        # retorna un iterador asincrónico en vez del cuerpo.
+        if (isinstance(headers, dict)) and (headers.get("stream")):
+            self.__reader = utils.StreamReader(self.__read_chunk)
+
+            return self.__reader
 
         return await super().read(
             self.__server_key,
@@ -0,0 +1,259 @@
+import types
+import inspect
+import logging
+
+from typing import Any, Optional, Callable
+
+from modules.Infrastructure import exceptions
+from modules.Infrastructure import options
+from utils.extra import parse_args
+from utils.extra import create_translation
+
+from config import defaults
+
+_ = create_translation.create("contract")
+logger = logging.getLogger(__name__)
+
+class Contract(inspect.namedtuple(
+    "Contract",
+    (
+        "handler",
+        "path",
+        "supported_methods",
+        "no_token_required",
+        "is_allowed",
+        "lifecycle",
+        "initializer_method",
+        "controller_method",
+        "warmup_method",
+        "shutdown_method",
+        "executors",
+        "concurrency",
+        "version"
+
+    )
+
+)):
+    """
+    Lo que declara un servicio, analizado una sola vez al cargarlo
+
+    Attributes:
+        handler: La clase del servicio
+        path: La ruta del servicio (sólo para los registros)
+        supported_methods: Las acciones habilitadas y existentes
+        no_token_required: Las acciones que no requieren de un token
+        is_allowed: **True** si el administrador habilitó el servicio
+        lifecycle: El ciclo de vida de las instancias
+        initializer_method: El nombre del método inicializador o **None**
+        controller_method: El nombre del método que recibe el controlador o **None**
+        warmup_method: El nombre del método de calentamiento o **None**
+        shutdown_method: El nombre del método de finalización o **None**
+        executors: Las acciones que se ejecutan en un proceso o en un hilo. En un
+                   proceso se usa una nueva instancia creada sólo con los parámetros
+                   de inicialización (ver `executor.ActionExecutor`).
+        concurrency: Cuántas de esas acciones se ejecutan a la vez (cero sin límite)
+        version: La fecha de modificación (en nanosegundos) del archivo al cargarlo
+    """
+
+    __slots__ = ()
+
+    def is_supported(self, action: str, /) -> bool:
+        return action in self.supported_methods
+
+    def is_token_required(self, action: str, /) -> bool:
+        return not action in self.no_token_required
+
+    def set_controller(self, obj: object, controller: "RequestController()", /) -> None:
+        if (self.controller_method is not None):
+            getattr(obj, self.controller_method)(controller)
+
+    def get_initializer(self, obj: object, /) -> Optional[Callable[[], Any]]:
+        if (self.initializer_method is not None):
+            return getattr(obj, self.initializer_method)
+
+def _names(handler, name, path):
+    # Puede ser una lista, una tupla o una cadena con una sola acción
+    value = getattr(handler, name, ())
+
+    if (isinstance(value, str)):
+        return frozenset((value,))
+
+    elif (isinstance(value, (list, tuple, set, frozenset))):
+        return frozenset(value)
+
+    else:
+        raise exceptions.InvalidService(
+            _("El tipo de dato de la propiedad '{}' no es válido en el servicio '{}'").format(name, path)
+
+        )
+
+def _method(handler, name, path):
+    if not (hasattr(handler, name)):
+        return
+
+    attribute = inspect.getattr_static(handler, name)
+    method = getattr(handler, name)
+
+    if not (callable(method)):
+        raise exceptions.InvalidService(
+            _("¡El método '{}' del servicio '{}' no se puede llamar!").format(name, path)
+
+        )
+
+    # Se analiza como si fuera llamado desde una instancia, por lo que los
+    # métodos ordinarios se enlazan para ignorar ``self``.
+    if (inspect.isfunction(attribute)):
+        method = types.MethodType(attribute, handler)
+
+    return method
+
+def _check_params(handler, name, path, count=0):
+    method = _method(handler, name, path)
+
+    if (method is None):
+        return
+
+    parameters = parse_args.parse(method)
+    keyword_only = len(parameters[parse_args.KEYWORD_ONLY])
+    positional = len(parameters[parse_args.POSITIONAL_ONLY]) + \
+                 len(parameters[parse_args.POSITIONAL_OR_KEYWORD])
+
+    if (keyword_only) or (positional != count):
+        raise exceptions.InvalidService(
+            _("El método '{}' del servicio '{}' debe recibir {} argumento(s) y ningún argumento clave").format(
+                name, path, count
+
+            )
+
+        )
+
+    return name
+
+def build(handler: type, path: str, *, admin: bool = False, version: int = 0) -> "Contract":
+    """Analiza un servicio y crea su contrato
+
+    Args:
+        handler:
+          La clase del servicio
+
+        path:
+          La ruta del servicio
+
+        admin:
+          **True** si es el servicio administrativo
+
+        version:
+          La fecha de modificación del archivo al cargarlo. Distingue las
+          versiones de un servicio recargado.
+
+    Raises:
+        exceptions.InvalidService:
+          Cuando el servicio no cumple con lo requerido
+    """
+
+    if (admin):
+        for name in (defaults.access_method, defaults.remote_method):
+            if (_check_params(handler, name, path) is None):
+                raise exceptions.InvalidService(
+                    _("El servicio administrativo debe tener un método llamado '{}' y uno llamado '{}'").format(
+                        defaults.access_method, defaults.remote_method
+
+                    )
+
+                )
+
+        supported_methods = frozenset()
+
+    else:
+        if not (hasattr(handler, defaults.supported_methods_name)):
+            logger.warning(_("¡El servicio '%s' no tiene métodos habilitados!"), path)
+
+        supported_methods = _names(handler, defaults.supported_methods_name, path)
+        missing = frozenset(
+            action for action in supported_methods if not (callable(getattr(handler, action, None)))
+
+        )
+
+        if (missing):
+            logger.warning(
+                _("Las acciones '%s' no existen en el servicio '%s'"),
+                "', '".join(sorted(missing)), path
+
+            )
+
+        supported_methods -= missing
+
+    # Es opcional esta propiedad. Por defecto se creerá que el administrador lo desea.
+    is_allowed = getattr(handler, defaults.is_allow_methods_name, True)
+
+    if not (isinstance(is_allowed, (int, bool))):
+        raise exceptions.InvalidService(
+            _("El tipo de dato de la propiedad que indica si está o no habilitado el servicio no es válido para '{}'").format(path)
+
+        )
+
+    lifecycle = getattr(handler, defaults.lifecycle_methods_name, options.LIFECYCLE_REQUEST)
+
+    if not (lifecycle in options.LIFECYCLE_MODES):
+        raise exceptions.InvalidService(
+            _("El ciclo de vida '{}' del servicio '{}' no es válido").format(lifecycle, path)
+
+        )
+
+    executors = getattr(handler, defaults.executors_name, {})
+
+    if not (isinstance(executors, dict)):
+        raise exceptions.InvalidService(
+            _("El tipo de dato de la propiedad '{}' no es válido en el servicio '{}'").format(
+                defaults.executors_name, path
+
+            )
+
+        )
+
+    for (action, mode) in executors.items():
+        if not (mode in options.EXECUTOR_MODES):
+            raise exceptions.InvalidService(
+                _("La acción '{}' del servicio '{}' no se puede ejecutar en '{}'").format(action, path, mode)
+
+            )
+
+        # Se ejecutan fuera del bucle de eventos, por lo que no pueden ser corutinas
+        if (inspect.iscoroutinefunction(getattr(handler, action, None))):
+            raise exceptions.InvalidService(
+                _("La acción '{}' del servicio '{}' no puede ser una corutina").format(action, path)
+
+            )
+
+    concurrency = getattr(handler, defaults.concurrency_name, 0)
+
+    if not (isinstance(concurrency, int)) or (isinstance(concurrency, bool)):
+        raise exceptions.InvalidService(
+            _("El tipo de dato de la propiedad '{}' no es válido en el servicio '{}'").format(
+                defaults.concurrency_name, path
+
+            )
+
+        )
+
+    controller_method = _check_params(handler, defaults.set_controller_methods_name, path, 1)
+
+    if (controller_method is None):
+        logger.warning(_("El servicio '%s' no tiene un método para ajustar los datos"), path)
+
+    return Contract(
+        handler,
+        path,
+        supported_methods,
+        _names(handler, defaults.is_token_required_methods_name, path),
+        bool(is_allowed),
+        lifecycle,
+        _check_params(handler, defaults.initializer_methods_name, path),
+        controller_method,
+        _check_params(handler, defaults.warmup_methods_name, path),
+        _check_params(handler, defaults.shutdown_methods_name, path),
+        types.MappingProxyType(dict(executors)),
+        max(concurrency, 0),
+        version
+
+    )
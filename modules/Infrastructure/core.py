@@ -1,26 +1,37 @@
 import re
 import os
+import copy
+import socket
 import time
 import logging
 import asyncio
 import inspect
+import concurrent.futures
 
-from typing import Optional, Callable, Any, AsyncIterator, Tuple, Union
+from typing import Optional, Callable, Any, AsyncIterator, Awaitable, List, Tuple, Union
 
+import tornado.ioloop
+import tornado.netutil
 import tornado.tcpserver
-import aiofiles
 import nacl
+import nacl.utils
 
 from modules.Infrastructure import errno
 from modules.Infrastructure import exceptions
 from modules.Infrastructure import options
+from modules.Infrastructure import keycache
+from modules.Infrastructure import usercache
+from modules.Infrastructure import resumption
+from modules.Infrastructure import registry
+from modules.Infrastructure import lifecycle
+from modules.Infrastructure import executor
 from modules.Infrastructure import utils
 from modules.Crypt import ed25519
 from modules.Crypt import x25519_xsalsa20_poly1305MAC
+from utils.Crypt import options as crypt_options
 
 from utils.General import show_services
 from utils.General import (proc_control, proc_stream)
-from utils.extra import remove_badchars
 from utils.extra import procs_repr
 from utils.extra import parse_args
 from utils.extra import execute_possible_coroutine
@@ -41,6 +52,8 @@ class MainDataControl(utils.MainServer):
         headers_length: int,
         memory_limit: int,
         recv_timeout: int,
+        tickets: Optional["resumption.TicketIssuer"] = None,
+        pipeline_depth: int = options.PIPELINE_DEPTH,
         *args, **kwargs
 
     ):
@@ -52,6 +65,97 @@ class MainDataControl(utils.MainServer):
         self.headers_length = headers_length
         self.memory_limit = memory_limit
         self.recv_timeout = recv_timeout
+        self.tickets = tickets
+        self.pipeline_depth = pipeline_depth
+        # El identificador de la petición actual. Sólo las peticiones
+        # identificadas se pueden ejecutar a la vez.
+        self.request_id = None
+        self.__pipeline = asyncio.Semaphore(max(pipeline_depth, 1))
+        self.__in_flight = set()
+
+    @property
+    def in_flight(self) -> int:
+        """El número de peticiones que se están ejecutando a la vez"""
+
+        return len(self.__in_flight)
+
+    def fork(self) -> "MainDataControl()":
+        """Crea una copia para responder a la petición actual
+
+        La copia comparte el flujo y la sesión, pero tiene sus propios
+        encabezados y su propia petición, por lo que las siguientes
+        peticiones no modifican los datos de ésta. Las respuestas llevan
+        el identificador de la petición.
+        """
+
+        control = copy.copy(self)
+        control.headers = dict(self.headers)
+        control.request = copy.copy(self.request)
+        control.request.headers = dict(self.request.headers)
+
+        control.set_header("id", self.request_id)
+
+        return control
+
+    async def spawn(self, coro: Awaitable[Any], /) -> None:
+        """Ejecuta ``coro`` a la vez que las siguientes peticiones
+
+        Si ya se ejecutan `pipeline_depth` peticiones, se espera a que
+        termine alguna antes de leer la siguiente.
+        """
+
+        await self.__pipeline.acquire()
+
+        task = asyncio.ensure_future(self.__run(coro))
+
+        self.__in_flight.add(task)
+        task.add_done_callback(self.__in_flight.discard)
+
+    async def __run(self, coro):
+        try:
+            await coro
+
+        except tornado.iostream.StreamClosedError:
+            pass
+
+        except Exception:
+            logger.exception(_("Excepción captada"))
+
+            # Igual que en las peticiones que no se ejecutan a la vez
+            self.stream.close()
+
+        finally:
+            self.__pipeline.release()
+
+    async def join(self) -> None:
+        """Espera a que terminen las peticiones que se ejecutan a la vez"""
+
+        if (self.__in_flight):
+            await asyncio.gather(*self.__in_flight, return_exceptions=True)
+
+    def cancel(self) -> None:
+        """Cancela las peticiones que se ejecutan a la vez"""
+
+        for task in self.__in_flight:
+            task.cancel()
+
+    async def __recv_headers(self):
+        # Mientras se ejecuten otras peticiones el cliente puede estar
+        # esperando sus respuestas, por lo que el tiempo de espera sólo
+        # cuenta cuando no hay ninguna pendiente.
+        if (self.recv_timeout is None) or (self.recv_timeout <= 0):
+            return await self.read(self.headers_length)
+
+        fut = asyncio.ensure_future(self.read(self.headers_length))
+
+        while (True):
+            try:
+                return await asyncio.wait_for(asyncio.shield(fut), self.recv_timeout)
+
+            except asyncio.TimeoutError:
+                if not (self.__in_flight):
+                    fut.cancel()
+                    raise
 
     def __set_headers(self, data):
         # Si no es un diccionario, por lo tanto, escabezados inválidos
@@ -72,6 +176,7 @@ class MainDataControl(utils.MainServer):
         self.request.force = data.get("force", False)
         self.request.node = data.get("node", ())
         self.request.is_packed = data.get("is_packed", True)
+        self.request.stream = data.get("stream", False)
         
         # Ajustamos los encabezados del cliente
         self.request.set_header("path", self.request.path, str)
@@ -80,103 +185,196 @@ class MainDataControl(utils.MainServer):
         self.request.set_header("force", self.request.force, bool)
         self.request.set_header("node", self.request.node, tuple)
         self.request.set_header("is_packed", self.request.is_packed, bool)
+        self.request.set_header("stream", self.request.stream, bool)
         self.request.set_header("params", self.request.params, dict)
         self.request.set_header("init_params", self.request.init_params, dict)
         self.request.set_header("status_code", data.get("status_code", 0), int)
         self.request.set_header("status", data.get("status", ""), str)
 
+        request_id = data.get("id")
+
+        if (self.pipeline_depth > 0) and (isinstance(request_id, int)) and not (isinstance(request_id, bool)):
+            self.request_id = request_id
+
+        else:
+            self.request_id = None
+
         # Y ahora ajustamos el mismo valor del cliente pero para el servidor
         self.set_header("path", self.request.path, str)
         self.set_header("action", self.request.action, str)
 
+        # Los modos que el cliente desea usar a partir del cuerpo
+        self.apply_negotiation(data)
+
+        # El ticket viaja cifrado en los encabezados de la respuesta
+        if (data.get("ticket")) and (self.tickets is not None):
+            self.set_header("ticket", self.tickets.issue(
+                self.request.real_user,
+                self.request.user,
+                self.request.userid,
+                self.request.is_guest_user,
+                self.resumption_secret
+
+            ))
+
+        elif ("ticket" in self.headers):
+            self.del_header("ticket")
+
+    async def __resume(self, data):
+        prefix_length = len(options.RESUME_PREFIX)
+        client_random = data[prefix_length:prefix_length + options.RESUME_RANDOM_SIZE]
+        identity = None
+
+        if (self.tickets is not None) and (len(client_random) == options.RESUME_RANDOM_SIZE):
+            identity = self.tickets.open(
+                data[prefix_length + options.RESUME_RANDOM_SIZE:]
+
+            )
+
+        if (identity is not None):
+            # El usuario pudo haber sido eliminado después de emitir el
+            # ticket. La consulta casi siempre se resuelve en memoria.
+            current = await usercache.shared.get(self.pool, identity.real_user.hex())
+
+            if (current is None) or (current.userid != identity.userid):
+                logger.warning(_("El usuario del ticket '%s' ya no existe"), identity.user)
+
+                identity = None
+
+        if (identity is None):
+            await self.write_data(options.RESUME_REJECT)
+            return False
+
+        server_random = nacl.utils.random(options.RESUME_RANDOM_SIZE)
+
+        await self.write_data(options.RESUME_ACCEPT + server_random)
+
+        # La identidad ya fue autenticada cuando se emitió el ticket, por lo
+        # que no es necesario intercambiar las claves de nuevo.
+        self.request.set_real_user(identity.real_user)
+        self.request.set_user(current.user)
+        self.request.set_userid(current.userid)
+        self.request.is_guest_user = current.is_guest_user
+
+        self.set_shared_session(
+            resumption.derive_key(identity.secret, client_random, server_random)
+
+        )
+
+        logger.debug(_("Sesión reanudada para '%s'"), identity.user)
+
+        return True
+
     async def initialize(self) -> AsyncIterator[Any]:
         real_user = await self.recv_data(
-            self.user_length,
+            max(self.user_length, options.RESUME_LENGTH),
             timeout = self.recv_timeout
             
         )
-        self.request.set_real_user(real_user)
 
-        user = await self.pool.return_first_result("hash2user", real_user.hex())
-        
-        if (user is not None):
-            (user,) = user
+        if (len(real_user) > self.user_length) and (real_user.startswith(options.RESUME_PREFIX)):
+            resumed = await self.__resume(real_user)
+
+            # Si el ticket fue rechazado, el cliente continúa con el
+            # intercambio de claves completo.
+            if not (resumed):
+                real_user = await self.recv_data(
+                    self.user_length,
+                    timeout = self.recv_timeout
+
+                )
 
         else:
-            logger.warning(_("El nombre de usuario real '%s' no existe"), real_user.hex())
+            resumed = False
+
+        if not (resumed) and not (await self.__handshake(real_user)):
             return
 
-        self.request.set_user(user)
+        while (True):
+            headers = await self.__recv_headers()
+
+            # Las respuestas de las peticiones que se ejecutan a la vez se
+            # escriben con los modos actuales, por lo que se espera a que
+            # terminen antes de cambiarlos.
+            if (self.in_flight) and (self.changes_negotiation(headers)):
+                await self.join()
 
-        userid = await self.pool.return_first_result("extract_userid", user)
-        
-        # ``userid```no debería hacer referencia a **None**, por lo
-        # tanto es un error interno del servidor.
-        if (userid is not None):
-            (userid,) = userid
+            self.__set_headers(headers)
 
-        else:
-            logger.warning(_("Hubo un problema extrayendo el identificador del usuario '%s'"), user)
+            # Si la acción no es definida, se para la ejecución hasta este punto, ya que seguir
+            # implica mucho procesamiento innecesario.
+            if not (self.request.action):
+                await self.write_status(errno.ECLIENT, _("No se indicó ninguna acción"))
+                return
+
+            if not (self.request.path):
+                await self.write_status(errno.ECLIENT, _("No se indicó ningún servicio"))
+                return
+
+            if (self.request.stream):
+                reader = utils.StreamReader(self.__read_chunk)
+
+                yield reader
+
+                # El servicio pudo no haber leído todos los fragmentos, pero
+                # se tienen que descartar para poder leer la siguiente petición.
+                await reader.drain()
+
+            else:
+                fut = self.read(self.memory_limit,
+                                timeout=self.recv_timeout,
+                                is_packed=self.request.is_packed)
+
+                yield await fut
+
+    async def __handshake(self, real_user):
+        self.request.set_real_user(real_user)
+
+        # El nombre, el identificador y si es un usuario invitado se obtienen
+        # con una sola consulta y se guardan en memoria por un tiempo.
+        identity = await usercache.shared.get(self.pool, real_user.hex())
+
+        if (identity is None):
+            logger.warning(_("El nombre de usuario real '%s' no existe"), real_user.hex())
             return
 
-        self.request.set_userid(userid)
+        self.request.set_user(identity.user)
+        self.request.set_userid(identity.userid)
 
         public_key = await self.recv_data(
             self.public_key_length,
             timeout = self.recv_timeout
             
         )
-        verifyKey = os.path.join(
-            self.init_path,
-            self.user_data,
-            real_user.hex()
-                
-        )
-
-        if not (os.path.isfile(verifyKey)):
-            raise exceptions.PublicKeyNotFound(
-                _("Error, la clave '{}' no existe").format(verifyKey)
+        verifyKey = await keycache.shared.get(
+            os.path.join(
+                self.init_path,
+                self.user_data,
+                real_user.hex()
 
             )
-        
-        async with aiofiles.open(verifyKey, "rb") as fd:
-            self.set_session(
-                ed25519.verify((await fd.read()), public_key)
-            
-            )
-
-        await self.shareKey()
 
-        self.request.is_guest_user = await self.pool.return_first_result(
-            "is_guest_user", userid
+        )
 
+        self.set_session(
+            ed25519.verify(verifyKey, public_key),
+            verify_key = verifyKey
+            
         )
 
-        while (True):
-            self.__set_headers(
-                await self.read(
-                    self.headers_length,
-                    timeout = self.recv_timeout
-                    
-                )
-                    
-            )
+        await self.shareKey()
 
-            # Si la acción no es definida, se para la ejecución hasta este punto, ya que seguir
-            # implica mucho procesamiento innecesario.
-            if not (self.request.action):
-                await self.write_status(errno.ECLIENT, _("No se indicó ninguna acción"))
-                return
+        self.request.is_guest_user = identity.is_guest_user
 
-            if not (self.request.path):
-                await self.write_status(errno.ECLIENT, _("No se indicó ningún servicio"))
-                return
+        return True
 
-            fut = self.read(self.memory_limit,
-                            timeout=self.recv_timeout,
-                            is_packed=self.request.is_packed)
+    async def __read_chunk(self):
+        return await self.read(
+            self.stream_chunk_size + options.FRAME_OVERHEAD,
+            timeout = self.recv_timeout,
+            is_packed = False
 
-            yield await fut
+        )
 
 class RequestController(utils.MainParameters):
     def __init__(
@@ -187,9 +385,11 @@ class RequestController(utils.MainParameters):
         pool: object,
         write_function: Callable[[Any, Optional[dict]], None],
         write_status_function: Callable[[int, str, Any], None],
+        write_stream_function: Callable[..., None],
         procs: "Procedures()",
         body: AsyncIterator[Any],
-        data: Optional[Any] = None
+        data: Optional[Any] = None,
+        stream: Optional["utils.StreamReader()"] = None
         
     ):
         self.__template = template
@@ -197,9 +397,11 @@ class RequestController(utils.MainParameters):
         self.__pool = pool
         self.__write_function = write_function
         self.__write_status_function = write_status_function
+        self.__write_stream_function = write_stream_function
         self.__procs = procs
         self.__body = body
         self.data = data
+        self.stream = stream
         self.headers = headers
 
     @property
@@ -222,14 +424,47 @@ class RequestController(utils.MainParameters):
     def write_status(self):
         return self.__write_status_function
 
+    @property
+    def write_stream(self):
+        return self.__write_stream_function
+
     @property
     def procs(self):
         return self.__procs
 
     @property
     def body(self):
+        # Cuando el cliente transmite el cuerpo en fragmentos, éstos
+        # se leen como un iterador asincrónico.
+        if (self.stream is not None):
+            return self.stream
+
         return self.__body
 
+    def fork(self, control: "MainDataControl()", template: object) -> "RequestController()":
+        """Crea un controlador que responde con ``control``
+
+        El controlador comparte los procedimientos, pero no el cuerpo de las
+        siguientes peticiones.
+        """
+
+        return RequestController(
+            template,
+            control.headers,
+            control.request,
+            self.__pool,
+            control.write,
+            control.write_status,
+            control.write_stream,
+            self.__procs,
+            _no_body()
+
+        )
+
+async def _no_body():
+    return
+    yield
+
 class CustomTemplate(utils.Templates):
     def __init__(self, template: str, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -243,6 +478,14 @@ class CustomTemplate(utils.Templates):
         
         self.__exp_func = function
 
+    def fork(self, request: "Request()") -> "CustomTemplate()":
+        """Crea una copia de la plantilla que usa ``request``"""
+
+        template = copy.copy(self)
+        template.set_request(request)
+
+        return template
+
     def get_template(self, *args, **kwargs) -> Optional[str]:
         if (self.__exp_func is None) or (self.__exp_func(*args, **kwargs)):
             return super().generate_template(self.__template)
@@ -267,8 +510,18 @@ class MainHandler(tornado.tcpserver.TCPServer):
         recv_timeout: int = options.RECV_TIMEOUT,
         end_chunk: str = options.END_CHUNK,
         read_chunk_size: int = options.READ_CHUNK_SIZE,
+        stream_chunk_size: int = options.STREAM_CHUNK_SIZE,
+        ticket_lifetime: int = options.TICKET_LIFETIME,
+        ticket_key: Optional[bytes] = None,
+        crypt_workers: int = options.CRYPT_WORKERS,
+        crypt_threshold: int = options.CRYPT_THRESHOLD,
+        pipeline_depth: int = options.PIPELINE_DEPTH,
+        process_workers: int = options.PROCESS_WORKERS,
+        thread_workers: int = options.THREAD_WORKERS,
+        services_check_time: int = options.SERVICES_CHECK_TIME,
         keypair: Optional[Union["Ed25519()", Tuple[bytes, bytes]]] = None,
         autoreload: bool = False,
+        reload_mode: str = options.RELOAD_PROCESS,
         *args, **kwargs
 
     ):
@@ -284,6 +537,9 @@ class MainHandler(tornado.tcpserver.TCPServer):
         if (memory_limit < __max_size):
             raise RuntimeError(_("El tamaño de la asignación de la memoria es muy bajo para lo requerido: {}").format(__max_size))
 
+        if not (reload_mode in options.RELOAD_MODES):
+            raise RuntimeError(_("El modo de recarga '{}' no es válido").format(reload_mode))
+
         super().__init__(
             *args,
             max_buffer_size=memory_limit + len(end_chunk),
@@ -292,8 +548,27 @@ class MainHandler(tornado.tcpserver.TCPServer):
 
         )
 
+        # Los procesos se crean antes que cualquier hilo, ya que se copia
+        # el proceso actual.
+        self.executor = executor.ActionExecutor(process_workers, thread_workers)
+        self.executor.start()
+
         self.end_chunk = end_chunk
         self.memory_limit = memory_limit
+        self.stream_chunk_size = stream_chunk_size
+        # Los tickets se cifran con una clave que solo existe en memoria,
+        # por lo que al reiniciar los clientes hacen el intercambio completo.
+        # Cuando hay varios procesos, todos usan la misma clave para que el
+        # ticket sea válido sin importar qué proceso atienda la conexión.
+        self.tickets = resumption.TicketIssuer(ticket_lifetime, ticket_key) if (ticket_lifetime > 0) else None
+        # Los hilos que cifran y descifran los marcos grandes. Se comparten
+        # entre todas las conexiones para limitar los recursos usados.
+        self.crypt_executor = concurrent.futures.ThreadPoolExecutor(
+            crypt_workers, thread_name_prefix="crypt"
+
+        ) if (crypt_workers > 0) else None
+        self.crypt_threshold = crypt_threshold
+        self.pipeline_depth = pipeline_depth
         self.utesla_version = utesla_version
         self.pool_object = pool_object
         self.procs = procs
@@ -319,6 +594,29 @@ class MainHandler(tornado.tcpserver.TCPServer):
         }
 
         self.autoreload = autoreload
+        self.reload_mode = reload_mode
+        self.__admin_regex = re.compile(self.__parse_name(self.admin_service))
+        # Las rutas de los servicios se resuelven en memoria y la tabla se
+        # reconstruye cuando cambia la carpeta de los servicios.
+        self.services = registry.ServiceRegistry(
+            self.service_file,
+            self.index_name,
+            self.admin_service,
+            self.autoreload,
+            reload_mode = self.reload_mode
+
+        )
+
+        if (services_check_time > 0):
+            self.__services_check = tornado.ioloop.PeriodicCallback(
+                self.__check_services, services_check_time
+
+            )
+            self.__services_check.start()
+
+        # Las instancias de los servicios que viven por conexión o por proceso
+        self.lifecycle = lifecycle.LifecycleManager()
+
         self.__exp_func = lambda level: logger.isEnabledFor(level)
 
         if (keypair is None):
@@ -337,105 +635,236 @@ class MainHandler(tornado.tcpserver.TCPServer):
 
         return name
 
-    def __check(self, path):
-        current_handler = None
-        Service_tuple = inspect.namedtuple(
-            "Service", ("exists", "current_cls", "root_cls")    
-            
-        )
-        try:
-            (service_name, sub_service_name) = path[:1].split("/", 1)
+    def __check_services(self):
+        self.services.refresh()
 
-        except ValueError:
-            (service_name, sub_service_name) = path[1:], ""
+        if not (self.autoreload) or (self.reload_mode != options.RELOAD_SERVICE):
+            return
 
-        index_name_regex = self.__parse_name(self.index_name)
+        # Las peticiones en curso terminan con la versión anterior
+        for handler in self.services.reload():
+            self.executor.forget(handler)
+            self.lifecycle.retire(handler)
 
-        index_dirname = "%s/%s" % (self.service_file, self.index_name)
-        admin_dirname = "%s/%s" % (self.service_file, self.admin_service)
+    async def shutdown_services(self) -> None:
+        """Finaliza las instancias de los servicios que viven por proceso y
+        los procesos e hilos que ejecutan sus acciones"""
 
-        if not (os.path.isdir(admin_dirname)):
-            logger.debug(_("'%s' no existe y es necesario para usarlo como servicio administrativo"), admin_dirname)
+        await self.lifecycle.shutdown()
 
-            raise exceptions.RootHandlerNotExists(_("¡El servicio administrativo no se encuentra!"))
+        self.executor.shutdown(wait=False)
+
+    def __create_procs(self):
+        # Estos procedimientos son usados mientras dure esta sesión
+        proc_control_obj = proc_control.ProcControl(
+            self.procs.ProcControl.getTarget(), self.procs.ProcControl.getInterval()
 
-        root_handler = show_services.get_module(
-            "%s/%s.py" % (admin_dirname, os.path.basename(admin_dirname)),
-            self.autoreload
-                
         )
+        proc_stream_obj = proc_stream.ProcStream()
+
+        procs_local = procs_repr.procedures(proc_control_obj, proc_stream_obj)
         
-        if (re.match(r"/(/*)$", path)) or (re.match(index_name_regex, path)):
-            index_name = "%s/%s.py" % (index_dirname, os.path.basename(index_dirname))
+        # Y para que no haya interferencias, se crea el ámbito entre procedimientos
+        # globales y locales.
+        procs = procs_repr.proc_scope(procs_local, self.procs)
 
-            if (os.path.isfile(index_name)):
-                current_handler = show_services.get_module(
-                    index_name,
-                    self.autoreload
-                        
-                )
+        return procs
+
+    async def __process(self, control, request, admin_request, scope, intro_template, body, *, isolated=False):
+        # Atiende una petición. ``isolated`` indica que se ejecuta a la vez que
+        # otras de la misma conexión.
+        # Sería una perdida de tiempo tener que forzar al cliente a reconectarse por un error
+        # sutil que se puede arreglar mandando un código de estado diferente a cero.
+        current_status = None
+
+        try:
+            # Ajustamos el último dato que el cliente transmitió
+            if (isinstance(body, utils.StreamReader)):
+                (admin_request.data, admin_request.stream) = (None, body)
+                (request.data, request.stream) = (None, body)
 
             else:
-                logger.debug(
-                    _("'%s' no existe y es el servicio requerido por el usuario, además que también es el índice"),
-                    index_name
-                    
+                (admin_request.data, admin_request.stream) = (body, None)
+                (request.data, request.stream) = (body, None)
+
+            logger.info(intro_template.get_template(logging.INFO))
+
+            # Por seguridad no se usa el servicio administrativo
+            if (self.__admin_regex.match(control.request.path)):
+                logger.warning(
+                    _("%s: No se puede acceder a este servicio de manera convencional"),
+                    intro_template.get_template(logging.WARNING),
+
                 )
 
-        else:
-            current_dirname = "%s/%s" % (
-                self.service_file, path[1:]
+                await control.write_status(errno.EPERM, _("No se puede acceder a este servicio"))
+                return
+
+            control.reset_status()
+
+            current_status = self.services.lookup(control.request.path)
+
+            # Si se recarga alguno de los servicios mientras tanto, sus
+            # instancias anteriores se finalizan al terminar esta petición.
+            self.lifecycle.acquire(current_status.root, current_status.current)
+
+            # Los contratos de ambos servicios ya fueron validados al cargarlos
+            (root_service, current_service) = (current_status.root, current_status.current)
+
+            root_handler = await scope.get(
+                root_service, control.request.init_params, isolated=isolated
                     
             )
-            current_dirname = remove_badchars.remove(current_dirname, "/")
 
-            if (os.path.isdir(current_dirname)):
-                current_name = "%s/%s.py" % (current_dirname, os.path.basename(current_dirname))
+            # Ajustamos la información del servicio administrativo
+            root_service.set_controller(root_handler, admin_request)
 
-            else:
-                current_name = "%s.py" % (current_dirname)
+            if (current_status.exists):
+                # Ajustamos los propiedades y métodos necesarios y permitidos
+                current_handler = await scope.get(
+                    current_service, control.request.init_params, isolated=isolated
+                    
+                )
+
+                token_required = current_service.is_token_required(control.request.action)
 
-            if (re.match(r"^(.+/){2}.+.py$", current_name)) and (os.path.isfile(current_name)):
-                current_handler = show_services.get_module(
-                    current_name,
-                    self.autoreload
+                if (token_required):
+                    root_access = execute_possible_coroutine.execute(
+                        getattr(root_handler, defaults.access_method)
                         
-                )
+                    )
+
+                    if not (await root_access):
+                        return
+
+                    service_allowed = await utils.is_service_allowed(
+                        control.request.token_hash,
+                        self.pool_object,
+                        control.request.path
+                        
+                    )
+
+                    if not (service_allowed) and (control.request.is_guest_user):
+                        logger.warning(
+                            _("%s: No tiene permitido usar este servicio"),
+                            intro_template.get_template(logging.WARNING)
+                            
+                        )
+
+                        await control.write_status(errno.EPERM)
+                        return
+
+                if not (current_service.is_allowed):
+                    logger.warning(
+                        _("%s: El servicio no está habilitado por el administrador"),
+                        intro_template.get_template(logging.WARNING)
+
+                    )
+                    
+                    await control.write_status(errno.ENOSRV)
+                    return
+
+                
+                if not (current_service.is_supported(control.request.action)):
+                    logger.warning(
+                        _("%s: La acción propuesta no existe o no está habilitada"),
+                        intro_template.get_template(logging.WARNING)
+                        
+                    )
+
+                    await control.write_status(errno.ENOACT)
+                    return
+
+                # Y ahora ajustamos la información al servicio
+                current_service.set_controller(current_handler, request)
+
+                initializer_method = current_service.get_initializer(current_handler)
+
+                if (initializer_method is None) or (await execute_possible_coroutine.execute(initializer_method)):
+                    if (control.request.action in current_service.executors):
+                        # Lo que retorne la acción es la respuesta
+                        await control.write(
+                            await self.executor.run(
+                                current_service,
+                                current_handler,
+                                control.request.action,
+                                control.request.params,
+                                control.request.init_params
+
+                            )
+
+                        )
+
+                    else:
+                        await parse_args.async_execute_function(
+                            getattr(current_handler, control.request.action),
+                            control.request.params
+
+                        )
+
+                else:
+                    logger.warning(
+                        _("%s: El método inicializador ha impedido continuar con la operación"),
+                        intro_template.get_template(logging.WARNING)
+                        
+                    )
 
             else:
-                logger.debug(
-                    _("'%s' no existe y es el servicio requerido por el usuario"),
-                    path
+                logger.warning(
+                    _("%s: El servicio no existe localmente"),
+                    intro_template.get_template(logging.WARNING)
                     
                 )
 
-        if (current_handler is not None):
-            return Service_tuple(True, current_handler, root_handler)
+                await execute_possible_coroutine.execute(
+                    getattr(root_handler, defaults.remote_method)
+                    
+                )
 
-        else:
-            return Service_tuple(False, None, root_handler)
+        except parse_args.ConvertionException as err:
+            logger.exception(
+                _("%s: Hubo un error convirtiendo los tipos de datos"),
+                intro_template.get_template(logging.ERROR), exc_info=err.exception
+                
+            )
 
-    @staticmethod
-    async def __init_service(cls, params):
-        obj = await parse_args.async_execute_function(cls, params)
+            await control.write_status(
+                errno.ECLIENT, _("Valor incorrecto para el parámetro: {}").format(err.key)
+                
+            )
 
-        return obj
+        except parse_args.InvalidDataType as err:
+            logger.error(
+                _("%s: El parámetro '%s' no es un tipo de dato válido"),
+                intro_template.get_template(logging.ERROR), err.key 
+                
+            )
 
-    def __create_procs(self):
-        # Estos procedimientos son usados mientras dure esta sesión
-        proc_control_obj = proc_control.ProcControl(
-            self.procs.ProcControl.getTarget(), self.procs.ProcControl.getInterval()
+            await control.write_status(errno.ESERVER)
 
-        )
-        proc_stream_obj = proc_stream.ProcStream()
+        except parse_args.RequiredArgument as err:
+            logger.error("%s: %s", intro_template.get_template(logging.ERROR), str(err))
 
-        procs_local = procs_repr.procedures(proc_control_obj, proc_stream_obj)
-        
-        # Y para que no haya interferencias, se crea el ámbito entre procedimientos
-        # globales y locales.
-        procs = procs_repr.proc_scope(procs_local, self.procs)
+            await control.write_status(errno.ECLIENT, str(err))
 
-        return procs
+        except exceptions.RootHandlerNotExists as err:
+            logger.error("%s: %s", intro_template.get_template(logging.ERROR), str(err))
+
+            await control.write_status(errno.ESERVER)
+
+        except exceptions.InvalidService:
+            # El motivo ya fue registrado al intentar cargar el servicio
+            logger.warning(
+                _("%s: El servicio no es válido para continuar"),
+                intro_template.get_template(logging.WARNING)
+
+            )
+
+            await control.write_status(errno.ESERVER)
+
+        finally:
+            if (current_status is not None):
+                self.lifecycle.release(current_status.root, current_status.current)
 
     async def handle_stream(self, stream, address):
         # La excepción será mostrada al final y se usará el nivel de advertencia en vez de información
@@ -479,6 +908,9 @@ class MainHandler(tornado.tcpserver.TCPServer):
                 
         )
 
+        # Las instancias de los servicios que sólo viven en esta conexión
+        scope = self.lifecycle.scope()
+
         control = MainDataControl(**{
             "pool"              : self.pool_object,
             "user_length"       : self.user_length,
@@ -490,7 +922,12 @@ class MainHandler(tornado.tcpserver.TCPServer):
             "user_data"         : self.user_data,
             "keypair"           : self.keypair,
             "stream"            : stream,
-            "end_chunk"         : self.end_chunk
+            "end_chunk"         : self.end_chunk,
+            "stream_chunk_size" : self.stream_chunk_size,
+            "tickets"           : self.tickets,
+            "crypt_executor"    : self.crypt_executor,
+            "crypt_threshold"   : self.crypt_threshold,
+            "pipeline_depth"    : self.pipeline_depth
             
         })
         
@@ -500,6 +937,16 @@ class MainHandler(tornado.tcpserver.TCPServer):
         # Datos que podría usar el cliente
         control.set_header("version", self.utesla_version, str)
         control.set_header("limit", self.memory_limit, int)
+        # Las características que el cliente puede solicitar en sus encabezados
+        control.set_header("features", {
+            "framing"   : list(options.FRAMING_MODES),
+            "signature" : list(crypt_options.SIGNATURE_MODES),
+            "cipher"    : list(crypt_options.CIPHER_MODES),
+            "stream"    : self.stream_chunk_size,
+            "ticket"    : 0 if (self.tickets is None) else self.tickets.lifetime,
+            "pipeline"  : max(self.pipeline_depth, 0)
+
+        })
         control.set_header("status_code", 0)
         control.set_header("status", "")
 
@@ -534,6 +981,7 @@ class MainHandler(tornado.tcpserver.TCPServer):
             "pool"                  : self.pool_object,
             "write_function"        : control.write,
             "write_status_function" : control.write_status,
+            "write_stream_function" : control.write_stream,
             "body"                  : gen
             
         }
@@ -551,179 +999,33 @@ class MainHandler(tornado.tcpserver.TCPServer):
 
         try:
             async for body in gen:
-                # Sería una perdida de tiempo tener que forzar al cliente a reconectarse por un error
-                # sutil que se puede arreglar mandando un código de estado diferente a cero.
-                try:
-                    # Ajustamos el último dato que el cliente transmitió
-                    admin_request.data = body
-                    request.data = body
-
-                    logger.info(intro_template.get_template(logging.INFO))
-
-                    # Por seguridad no se usa el servicio administrativo
-                    if (re.match(self.__parse_name(self.admin_service), control.request.path)):
-                        logger.warning(
-                            _("%s: No se puede acceder a este servicio de manera convencional"),
-                            intro_template.get_template(logging.WARNING),
-
-                        )
-
-                        await control.write_status(errno.EPERM, _("No se puede acceder a este servicio"))
-                        continue
-
-                    control.reset_status()
-
-                    current_status = self.__check(control.request.path)
-
-                    root_handler = await self.__init_service(
-                        current_status.root_cls, control.request.init_params
-                            
-                    )
-
-                    if not (utils.is_admin(root_handler)):
-                        logger.error(
-                            _("%s: El servicio administrativo no es válido para continuar"),
-                            intro_template.get_template(logging.ERROR)
-
-                        )
-
-                        await control.write_status(errno.ESERVER)
-                        continue
-
-                    # Ajustamos la información del servicio administrativo
-                    utils.set_controller(root_handler, admin_request)
-
-                    if (current_status.exists):
-                        # Ajustamos los propiedades y métodos necesarios y permitidos
-                        current_handler = await self.__init_service(
-                            current_status.current_cls, control.request.init_params
-                            
-                        )
-
-                        token_required = utils.is_token_required(
-                            current_handler,
-                            control.request.action,
-                            control.request.path
-                            
-                        )
-
-                        if (token_required):
-                            root_access = execute_possible_coroutine.execute(
-                                getattr(root_handler, defaults.access_method)
-                                
-                            )
-
-                            if not (await root_access):
-                                continue
-
-                            service_allowed = await utils.is_service_allowed(
-                                control.request.token_hash,
-                                self.pool_object,
-                                control.request.path
-                                
-                            )
-
-                            if not (service_allowed) and (control.request.is_guest_user):
-                                logger.warning(
-                                    _("%s: No tiene permitido usar este servicio"),
-                                    intro_template.get_template(logging.WARNING)
-                                    
-                                )
-
-                                await control.write_status(errno.EPERM)
-                                continue
-
-                        allowed = utils.is_allowed(current_handler, control.request.path)
-
-                        if not (allowed):
-                            logger.warning(
-                                _("%s: El servicio no está habilitado por el administrador"),
-                                intro_template.get_template(logging.WARNING)
-
-                            )
-                            
-                            await control.write_status(errno.ENOSRV)
-                            continue
-
-                        
-                        is_support = utils.is_support_method(
-                            current_handler,
-                            control.request.action,
-                            control.request.path
-                            
-                        )
+                # Las peticiones sin identificador se atienden en orden, por
+                # lo que se espera a las que se están ejecutando a la vez.
+                if (control.request_id is None):
+                    await control.join()
+                    await self.__process(control, request, admin_request, scope, intro_template, body)
+
+                    continue
+
+                # Cada petición identificada responde con sus propias copias
+                view = control.fork()
+                args = (
+                    view,
+                    request.fork(view, service_template.fork(view.request)),
+                    admin_request.fork(view, admin_template.fork(view.request)),
+                    scope,
+                    intro_template.fork(view.request),
+                    body
 
-                        if not (is_support):
-                            logger.warning(
-                                _("%s: La acción propuesta no existe o no está habilitada"),
-                                intro_template.get_template(logging.WARNING)
-                                
-                            )
-
-                            await control.write_status(errno.ENOACT)
-                            continue
-
-                        # Y ahora ajustamos la información al servicio
-                        utils.set_controller(current_handler, request, control.request.path)
-
-                        initializer_method = utils.get_initializer(current_handler)
-
-                        if (initializer_method is None) or (await execute_possible_coroutine.execute(initializer_method)):
-                            await parse_args.async_execute_function(
-                                getattr(current_handler, control.request.action),
-                                control.request.params
-
-                            )
-
-                        else:
-                            logger.warning(
-                                _("%s: El método inicializador ha impedido continuar con la operación"),
-                                intro_template.get_template(logging.WARNING)
-                                
-                            )
-
-                    else:
-                        logger.warning(
-                            _("%s: El servicio no existe localmente"),
-                            intro_template.get_template(logging.WARNING)
-                            
-                        )
-
-                        await execute_possible_coroutine.execute(
-                            getattr(root_handler, defaults.remote_method)
-                            
-                        )
-
-                except parse_args.ConvertionException as err:
-                    logger.exception(
-                        _("%s: Hubo un error convirtiendo los tipos de datos"),
-                        intro_template.get_template(logging.ERROR), exc_info=err.exception
-                        
-                    )
-
-                    await control.write_status(
-                        errno.ECLIENT, _("Valor incorrecto para el parámetro: {}").format(err.key)
-                        
-                    )
-
-                except parse_args.InvalidDataType as err:
-                    logger.error(
-                        _("%s: El parámetro '%s' no es un tipo de dato válido"),
-                        intro_template.get_template(logging.ERROR), err.key 
-                        
-                    )
-
-                    await control.write_status(errno.ESERVER)
-
-                except parse_args.RequiredArgument as err:
-                    logger.error("%s: %s", intro_template.get_template(logging.ERROR), str(err))
-
-                    await control.write_status(errno.ECLIENT, str(err))
+                )
 
-                except exceptions.RootHandlerNotExists as err:
-                    logger.error("%s: %s", intro_template.get_template(logging.ERROR), str(err))
+                # Los fragmentos del cuerpo se leen del mismo flujo que las
+                # siguientes peticiones, por lo que no se pueden ejecutar a la vez.
+                if (isinstance(body, utils.StreamReader)):
+                    await self.__process(*args, isolated=True)
 
-                    await control.write_status(errno.ESERVER)
+                else:
+                    await control.spawn(self.__process(*args, isolated=True))
 
         except tornado.iostream.StreamClosedError:
             pass
@@ -737,6 +1039,9 @@ class MainHandler(tornado.tcpserver.TCPServer):
         except asyncio.TimeoutError:
             exception = _("Ha concluido el tiempo de espera para la recepción de datos")
 
+        except (exceptions.LimitsExceeded, exceptions.InvalidRequest) as err:
+            exception = str(err)
+
         except Exception as err:
             logger.exception(_("Excepción captada"))
 
@@ -751,8 +1056,13 @@ class MainHandler(tornado.tcpserver.TCPServer):
             else:
                 logger.info(end_template.get_template(logging.INFO))
 
-            # Terminamos la conexión
+            # Terminamos la conexión y las peticiones que aún se ejecutaban
             stream.close()
+            control.cancel()
+            await control.join()
+
+            # Finalizamos los servicios que sólo vivían en esta conexión
+            await scope.close()
 
             # Y terminamos los procesos/sub-procesos
             for p in (request.procs, admin_request.procs):
@@ -771,10 +1081,35 @@ class MainHandler(tornado.tcpserver.TCPServer):
 
 def start(lhost: str,
           lport: int,
-          *args, **kwargs) -> object:
+          *args,
+          sockets: Optional[List[socket.socket]] = None,
+          reuse_port: bool = False,
+          **kwargs) -> object:
+    """Inicia el servidor
+
+    Args:
+        lhost:
+          La dirección a escuchar
+
+        lport:
+          El puerto a escuchar
+
+        sockets:
+          Los sockets ya creados (por ejemplo, antes de crear los procesos).
+          Si se especifican, se ignoran ``lhost`` y ``lport``.
+
+        reuse_port:
+          **True** para crear los sockets con `SO_REUSEPORT`, así varios
+          procesos pueden escuchar en el mismo puerto.
+    """
+
     logging.info(_("Escuchando en %s:%d"), lhost, lport)
 
     server = MainHandler(*args, **kwargs)
-    server.listen(lport, lhost)
+
+    if (sockets is None):
+        sockets = tornado.netutil.bind_sockets(lport, lhost, reuse_port=reuse_port)
+
+    server.add_sockets(sockets)
 
     return server
@@ -1,5 +1,7 @@
 import logging
 import inspect
+import contextlib
+import contextvars
 import time
 import hashlib
 import binascii
@@ -7,6 +9,8 @@ from typing import (
     Any,
     AsyncIterator,
     Callable,
+    Dict,
+    List,
     Tuple,
     Union,
     Optional
@@ -15,39 +19,275 @@ from typing import (
 
 import secrets
 
+import aiomysql
+
 from utils.extra import execute_possible_coroutine
 from utils.extra import create_translation
 
 from modules.Infrastructure import exceptions
+from modules.Infrastructure import options
+from modules.Infrastructure import usercache
+from modules.Infrastructure import tokencache
+from modules.Infrastructure import routing
+from modules.Infrastructure import poolstats
 
 _ = create_translation.create("dbConnector")
 
 async def _execute_async_gen(gen):
-    async for i in gen:
-        return i
+    try:
+        async for i in gen:
+            return i
+
+    finally:
+        # Así la conexión vuelve a la piscina ahora y no al recolectarlo
+        await gen.aclose()
 
 async def _return_coroutine(coroutine):
     if (inspect.isasyncgen(coroutine)):
-        async for i in coroutine:
-            yield i
+        try:
+            async for i in coroutine:
+                yield i
+
+        finally:
+            await coroutine.aclose()
 
     else:
         result = await coroutine
 
         yield result
 
+async def _rows(cursor):
+    # Las filas se obtienen por lotes de ``cursor.arraysize``, así que cada
+    # lote cuesta una sola espera en vez de una por fila.
+    while (rows := await cursor.fetchmany()):
+        for row in rows:
+            yield row
+
+def _unbuffered(function):
+    # Las funciones que pueden leer tablas enteras usan un cursor sin búfer
+    # (`aiomysql.SSCursor`): las filas se leen del servidor a medida que se
+    # consumen, por lo que la memoria usada no depende del tamaño de la tabla.
+    function.unbuffered = True
+
+    return function
+
+def _keyset(sql, args, column, after, asc=True):
+    # Paginación por clave: en vez de saltar filas con ``OFFSET`` se continúa
+    # desde el último identificador obtenido, lo cual usa el índice.
+    if (after is not None):
+        sql.append("WHERE %s %s %%s" % (column, ">" if (asc) else "<"))
+        args.append(int(after))
+
+async def _collect(result):
+    # Los generadores asincrónicos se convierten en una lista con todos sus elementos
+    if (inspect.isasyncgen(result)):
+        return [i async for i in result]
+
+    else:
+        return await result
+
+# Las invalidaciones de las cachés pendientes de la transacción en curso
+_after_commit = contextvars.ContextVar("after_commit", default=None)
+
+def _invalidate(function, *args):
+    # Dentro de una transacción las cachés se invalidan después de confirmarla;
+    # si no, otra conexión podría volver a guardar los datos anteriores.
+    pending = _after_commit.get()
+
+    if (pending is None):
+        function(*args)
+
+    else:
+        pending.append((function, args))
+
+Command = inspect.namedtuple(
+    "Command", ("function_name", "args", "kwargs")
+
+)
+
+def command(function_name: str, /, *args, **kwargs) -> "Command":
+    """Crea un comando para `UTeslaConnector.batch()`"""
+
+    return Command(function_name, args, kwargs)
+
+class Session(object):
+    """
+    Ejecuta varias funciones con la misma conexión y el mismo cursor
+
+    Se obtiene con `SimpleDBConnector.session()`.
+
+    Attributes:
+        connector: El conector que creó la sesión
+        cursor: El cursor usado por todas las funciones
+    """
+
+    def __init__(self, connector: "SimpleDBConnector", cursor: object):
+        self.connector = connector
+        self.cursor = cursor
+
+    async def execute(self, function: Callable[..., Any], *args, **kwargs) -> Any:
+        """Igual que `SimpleDBConnector.execute()` pero con el cursor de la sesión"""
+
+        result = function(*args, cursor=self.cursor, **kwargs)
+
+        async for i in _return_coroutine(result):
+            yield i
+
+    async def execute_command(self, function_name: str, *args, **kwargs) -> Any:
+        """Igual que `UTeslaConnector.execute_command()` pero con el cursor de la sesión"""
+
+        result = self.execute(
+            self.connector.get_command(function_name), *args, **kwargs
+
+        )
+
+        async for i in result:
+            yield i
+
+    async def return_first_result(self, function_name: str, *args, **kwargs) -> Any:
+        """Igual que `UTeslaConnector.return_first_result()` pero con el cursor de la sesión"""
+
+        function = self.connector.get_command(function_name)
+
+        result = function(*args, cursor=self.cursor, **kwargs)
+
+        if (inspect.isasyncgen(result)):
+            try:
+                async for i in result:
+                    return i
+
+            finally:
+                # El cursor se sigue usando, así que se termina ahora
+                await result.aclose()
+
+        else:
+            return await result
+
+    async def call(self, function_name: str, *args, **kwargs) -> Any:
+        """Ejecuta una función y retorna su resultado
+
+        Returns:
+            Lo mismo que la función o, si es un generador asincrónico, una
+            lista con todos sus elementos
+        """
+
+        function = self.connector.get_command(function_name)
+
+        return await _collect(
+            function(*args, cursor=self.cursor, **kwargs)
+
+        )
+
 class SimpleDBConnector(object):
-    def __init__(self, pool):
+    def __init__(self, pool, fetch_size: int = options.FETCH_SIZE):
+        """
+        Args:
+            pool:
+              La piscina de conexiones
+
+            fetch_size:
+              El número de filas que se obtienen a la vez de un resultado
+        """
+
         self.pool = pool
+        self.fetch_size = max(fetch_size, 1)
+        self.stats = poolstats.PoolStats()
+
+    @contextlib.asynccontextmanager
+    async def _acquire(self):
+        start = time.monotonic()
 
-    async def execute(self, function: Callable[..., Any], *args, **kwargs) -> Any:
         async with self.pool.acquire() as conn:
-            async with conn.cursor() as cur:
+            self.stats.checkout(time.monotonic() - start)
+
+            try:
+                yield conn
+
+            finally:
+                self.stats.checkin()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Las estadísticas de la piscina de conexiones
+
+        Returns:
+            Un diccionario con las obtenciones de conexiones por segundo, el
+            histograma de los tiempos de espera, las conexiones en uso, las
+            funciones más lentas y el tamaño actual de la piscina.
+        """
+
+        return self.stats.snapshot(self.pool)
+
+    def _cursor(self, conn, function=None):
+        if (getattr(function, "unbuffered", False)):
+            cursor = conn.cursor(aiomysql.SSCursor)
+
+        else:
+            cursor = conn.cursor()
+
+        return cursor
+
+    async def execute(self, function: Callable[..., Any], *args, **kwargs) -> Any:
+        async with self._acquire() as conn:
+            async with self._cursor(conn, function) as cur:
+                cur.arraysize = self.fetch_size
+
                 result = function(*args, cursor=cur, **kwargs)
 
                 async for i in _return_coroutine(result):
                     yield i
 
+    def get_command(self, function: Callable[..., Any], /) -> Callable[..., Any]:
+        """Obtiene la función a ejecutar en una sesión"""
+
+        return function
+
+    @contextlib.asynccontextmanager
+    async def session(self, transaction: bool = False) -> AsyncIterator["Session"]:
+        """Obtiene una sola conexión de la piscina para varias funciones
+
+        Args:
+            transaction:
+              **True** para ejecutarlas dentro de una transacción explícita.
+              Si ocurre una excepción se revierten los cambios; si no, se
+              confirman al salir. Las cachés que invalidan las funciones
+              (usuarios, tokens y rutas) se invalidan después de confirmar.
+
+        Returns:
+            Un administrador de contexto asincrónico con la sesión
+        """
+
+        async with self._acquire() as conn:
+            if (transaction):
+                await conn.begin()
+
+                pending = []
+                token = _after_commit.set(pending)
+
+            try:
+                # Se usa un cursor con búfer, ya que se ejecutan varias consultas
+                async with self._cursor(conn) as cur:
+                    cur.arraysize = self.fetch_size
+
+                    yield Session(self, cur)
+
+            except BaseException:
+                if (transaction):
+                    await conn.rollback()
+
+                raise
+
+            else:
+                if (transaction):
+                    await conn.commit()
+
+                    # Ya se pueden leer los datos nuevos desde otras conexiones
+                    for (function, args) in pending:
+                        function(*args)
+
+            finally:
+                if (transaction):
+                    _after_commit.reset(token)
+
 class UserCallback(object):
     @staticmethod
     async def is_guest_user(userid: int, *, cursor) -> bool:
@@ -103,6 +343,9 @@ class UserCallback(object):
 
         )
 
+        # Pudo haberse guardado como inexistente
+        _invalidate(usercache.shared.invalidate, user_hash)
+
         logging.debug(_("Usuario %s (%s) creado satisfactoriamente"), user, user_hash)
 
     @staticmethod
@@ -118,6 +361,24 @@ class UserCallback(object):
 
         return user
 
+    @staticmethod
+    async def get_identity(hash: str, *, cursor) -> Optional[Tuple[str, int, bool]]:
+        """Obtiene el nombre, el identificador y si es un usuario invitado a
+        partir del usuario real (o identificador) en una sola consulta"""
+
+        await cursor.execute(
+            "SELECT user, id, guest_user FROM users WHERE user_hash = %s LIMIT 1", (hash,)
+
+        )
+
+        identity = await cursor.fetchone()
+
+        if (identity is not None):
+            (user, userid, guest_user) = identity
+            identity = (user, userid, bool(guest_user))
+
+        return identity
+
     @staticmethod
     async def get_password(userid: int, *, cursor) -> Tuple[str]:
         """Obtiene la contraseña de un usuario determinado"""
@@ -146,6 +407,9 @@ class UserCallback(object):
                 
         )
 
+        # Sólo se conoce el identificador y no el hash del usuario
+        _invalidate(usercache.shared.invalidate)
+
         logging.debug(
             _("Se ha cambiado satisfactoriamente la contraseña del usuario: ID:%d"),
             userid
@@ -176,6 +440,10 @@ class UserCallback(object):
 
         )
 
+        # Sus tokens se borran en cascada
+        _invalidate(usercache.shared.invalidate)
+        _invalidate(tokencache.shared.invalidate)
+
         logging.debug(
             _("El usuario con el identificador '%d' ha sido borrado satisfactoriamente"),
             userid
@@ -196,9 +464,11 @@ class UserCallback(object):
         return userid
 
     @staticmethod
+    @_unbuffered
     async def show_users(
         limit: int = 0,
         asc: bool = True, *,
+        after: Optional[int] = None,
         cursor
         
     ) -> AsyncIterator[Tuple[int, str, int, Union[int, bool]]]:
@@ -212,14 +482,22 @@ class UserCallback(object):
               **True** para mostrarlos de formar ascendente; **False** para
               mostrarlos de formar descendente.
 
+            after:
+              El identificador del último usuario obtenido para continuar
+              desde ahí (la siguiente página)
+
         Returns:
             Un iterador asincrónico con los usuarios registrados
         
         """
 
-        sql = ["SELECT id, user, token_limit, guest_user FROM users ORDER BY id"]
+        sql = ["SELECT id, user, token_limit, guest_user FROM users"]
         args = []
 
+        _keyset(sql, args, "id", after, asc)
+
+        sql.append("ORDER BY id")
+
         if (asc):
             sql.append("ASC")
 
@@ -230,13 +508,12 @@ class UserCallback(object):
             sql.append("LIMIT %s")
             args.append(limit)
 
-
         await cursor.execute(
             " ".join(sql), args
 
         )
 
-        while (result := await cursor.fetchone()):
+        async for result in _rows(cursor):
             yield result
 
 class TokenCallback(object):
@@ -268,7 +545,7 @@ class TokenCallback(object):
 
         )
         
-        while (token := await cursor.fetchone()):
+        async for token in _rows(cursor):
             yield token
 
     @staticmethod
@@ -293,6 +570,8 @@ class TokenCallback(object):
 
         )
 
+        _invalidate(tokencache.shared.invalidate, token)
+
     @staticmethod
     async def count_token(userid: int, *, cursor) -> int:
         """Contar cuántos token's de acceso tiene un usuario actualmente"""
@@ -317,6 +596,8 @@ class TokenCallback(object):
                 
         )
 
+        _invalidate(tokencache.shared.invalidate, token)
+
     async def __check_token(self, userid, *, cursor):
         (token_limit,) = await self.get_token_limit(userid, cursor=cursor)
         (token_number,) = await self.count_token(userid, cursor=cursor)
@@ -363,6 +644,8 @@ class TokenCallback(object):
                 
         )
 
+        _invalidate(tokencache.shared.invalidate, token)
+
         return new_token.hex()
 
     async def insert_token(
@@ -445,6 +728,21 @@ class TokenCallback(object):
 
         return bool(*exists)
 
+    @staticmethod
+    async def get_authorization(token: str, *, cursor) -> Optional[Tuple[str, int]]:
+        """Obtiene los servicios habilitados y la fecha de expiración de un
+        token determinado en una sola consulta"""
+
+        await cursor.execute(
+            "SELECT services, expire FROM tokens WHERE token = %s LIMIT 1",
+            (token,)
+
+        )
+
+        authorization = await cursor.fetchone()
+
+        return authorization
+
     @staticmethod
     async def get_services_allowed(token: str, *, cursor) -> Tuple[str]:
         """Obtiene los servicios habilitados por un token determinado"""
@@ -498,6 +796,8 @@ class NetworkCallback(object):
 
         )
 
+        _invalidate(routing.shared.invalidate)
+
     @staticmethod
     async def extract_networkid(network: str, *, cursor) -> Tuple[int]:
         """Extraer el identificador de la red"""
@@ -540,11 +840,13 @@ class NetworkCallback(object):
         return network
 
     @staticmethod
+    @_unbuffered
     async def get_networks(
         limit: int = 0,
         asc: bool = True,
         use_options: bool = False,
-        *, cursor
+        *, after: Optional[int] = None,
+        cursor
 
     ) -> AsyncIterator[Union[Tuple[int, str, str], Tuple[str]]]:
         """Obtiene las direcciones de los nodos.
@@ -560,6 +862,10 @@ class NetworkCallback(object):
               Si es **True** se obtendrá el identificador del nodo, la dirección y
               el token, si no, simplemente la dirección.
 
+            after:
+              Cuando ``use_options`` es **True**, el identificador del último
+              nodo obtenido para continuar desde ahí (la siguiente página)
+
         Returns:
             Un iterador asincrónico con las redes obtenidas.
         """
@@ -567,7 +873,11 @@ class NetworkCallback(object):
         args = []
 
         if (use_options):
-            sql = ["SELECT id_network, network, token FROM networks ORDER BY id_network"]
+            sql = ["SELECT id_network, network, token FROM networks"]
+
+            _keyset(sql, args, "id_network", after, asc)
+
+            sql.append("ORDER BY id_network")
 
             if (asc):
                 sql.append("ASC")
@@ -590,7 +900,7 @@ class NetworkCallback(object):
 
             )
 
-        while (result := await cursor.fetchone()):
+        async for result in _rows(cursor):
             yield result
 
     @staticmethod
@@ -604,6 +914,9 @@ class NetworkCallback(object):
 
         )
 
+        # Sus servicios se borran en cascada
+        _invalidate(routing.shared.invalidate)
+
         logging.debug(_("La red con el identificador '%d' ha sido borrado satisfactoriamente"), networkid)
 
 class ServiceCallback(object):
@@ -653,6 +966,8 @@ class ServiceCallback(object):
                 
         )
 
+        _invalidate(routing.shared.invalidate)
+
     @staticmethod
     async def is_service_exists_for_id(serviceid: int, *, cursor) -> bool:
         """Verifica si un servicio existe utilizando su identificador"""
@@ -683,6 +998,8 @@ class ServiceCallback(object):
 
         )
 
+        _invalidate(routing.shared.invalidate)
+
     @staticmethod
     async def service2id(service_name: str, *, cursor) -> AsyncIterator[int]:
         """Obtiene el identificador del nodo si tiene un servicio específico"""
@@ -693,7 +1010,7 @@ class ServiceCallback(object):
 
         )
 
-        while (networkid := await cursor.fetchone()):
+        async for networkid in _rows(cursor):
             yield networkid
 
     async def service2net(
@@ -704,6 +1021,10 @@ class ServiceCallback(object):
         
     ) -> AsyncIterator[Union[Tuple[int, str], Tuple[str]]]:
         """Obtiene todas las redes que tienen un servicio específico
+
+        `UTeslaConnector.execute_command()` la resuelve con `routing.shared`
+        en vez de consultar la base de datos; sólo se consulta directamente
+        dentro de una sesión.
         
         Args:
             service_name:
@@ -717,19 +1038,39 @@ class ServiceCallback(object):
             Un iterador asincrónico con las redes obtenidas
         """
 
-        ids = self.service2id(
-            service_name, cursor=cursor
+        # Una sola consulta en vez de una por cada nodo
+        await cursor.execute(
+            "SELECT services.id_network, networks.network FROM services "
+            "INNER JOIN networks ON networks.id_network = services.id_network "
+            "WHERE services.service = %s ORDER BY services.priority DESC",
+            (service_name,)
 
         )
 
-        async for networkid in ids:
-            network = await self.id2network(*networkid, cursor=cursor)
+        async for result in _rows(cursor):
+            (networkid, network) = result
 
             if (show_ids):
-                yield networkid + network
+                yield (networkid, network)
 
             else:
-                yield network
+                yield (network,)
+
+    @staticmethod
+    async def get_routes(*, cursor) -> AsyncIterator[Tuple[str, str, int, str]]:
+        """Obtiene el servicio, la dirección, el identificador y el token de
+        los nodos de todos los servicios, ordenados por prioridad (ver
+        `routing.RoutingTable`)"""
+
+        await cursor.execute(
+            "SELECT services.service, networks.network, networks.id_network, networks.token FROM services "
+            "INNER JOIN networks ON networks.id_network = services.id_network "
+            "ORDER BY services.service, services.priority DESC"
+
+        )
+
+        async for result in _rows(cursor):
+            yield result
 
     @staticmethod
     async def network_in_service(networkid: int, serviceid: int, *, cursor) -> bool:
@@ -746,10 +1087,12 @@ class ServiceCallback(object):
         return bool(*exists)
 
     @staticmethod
+    @_unbuffered
     async def get_services(
         limit: int = 0, *,
         only: Optional[int] = None,
         basic: bool = True,
+        after: Optional[int] = None,
         cursor
         
     ) -> AsyncIterator[Union[Tuple[str, int], Tuple[int, int, str, int]]]:
@@ -769,6 +1112,10 @@ class ServiceCallback(object):
               Si ``basic`` es **True** se obtiene sólo el servicio y el tiempo de
               modificación.
 
+            after:
+              Cuando ``basic`` es **False**, el identificador del último servicio
+              obtenido para continuar desde ahí (la siguiente página)
+
         Returns:
             Un iterador asincrónico con los servicios obtenidos
         
@@ -784,22 +1131,27 @@ class ServiceCallback(object):
             sql = ["SELECT id_service, id_network, service, priority FROM services"]
             args = []
 
+            _keyset(sql, args, "id_service", after)
+
             if (only is not None):
                 networkid = int(only)
 
-                sql.append("WHERE id_network = %s")
+                sql.append("AND" if (after is not None) else "WHERE")
+                sql.append("id_network = %s")
                 args.append(networkid)
 
-                if (limit > 0):
-                    sql.append("LIMIT %s")
-                    args.append(int(limit))
+            sql.append("ORDER BY id_service")
+
+            if (limit > 0):
+                sql.append("LIMIT %s")
+                args.append(int(limit))
 
             await cursor.execute(
                 " ".join(sql), args
                     
             )
 
-        while (result := await cursor.fetchone()):
+        async for result in _rows(cursor):
             yield result
 
     @staticmethod
@@ -812,7 +1164,7 @@ class ServiceCallback(object):
 
         )
 
-        while (service := await cursor.fetchone()):
+        async for service in _rows(cursor):
             yield service
 
     @staticmethod
@@ -837,6 +1189,21 @@ class UTeslaConnector(SimpleDBConnector):
         super().__init__(*args, **kwargs)
 
         self.callback = Callback()
+        # Las funciones que se resuelven en memoria sin consultar la base de datos
+        self.__in_memory = {
+            "service2net" : self.__service2net
+
+        }
+
+    async def __service2net(self, service_name, show_ids=False):
+        # Reenviar una petición no consulta la base de datos; los cambios
+        # hechos en otro proceso se ven cuando caduca la tabla de rutas.
+        for route in await routing.shared.get(self, service_name):
+            if (show_ids):
+                yield (route.networkid, route.network)
+
+            else:
+                yield (route.network,)
 
     async def execute_command(self, function_name: str, *args, **kwargs) -> Any:
         """Ejecutar un comando para modificar u obtener un dato de la base de datos
@@ -855,16 +1222,80 @@ class UTeslaConnector(SimpleDBConnector):
             El resultado (si es que tiene) de la función ejecutada
         """
 
+        function = self.__in_memory.get(function_name)
+
+        if (function is not None):
+            result = function(*args, **kwargs)
+
+        else:
+            result = self.execute(
+                self.get_command(function_name), *args, **kwargs
+
+            )
+
+        result = _return_coroutine(result)
+        # Sólo se mide lo que tarda la función en obtener cada elemento y no
+        # lo que tarda quien la llama en procesarlo.
+        elapsed = 0
+
+        try:
+            while (True):
+                start = time.monotonic()
+
+                try:
+                    i = await result.__anext__()
+
+                except StopAsyncIteration:
+                    break
+
+                finally:
+                    elapsed += time.monotonic() - start
+
+                yield i
+
+        finally:
+            await result.aclose()
+
+            self.stats.callback(function_name, elapsed)
+
+    def get_command(self, function_name: str, /) -> Callable[..., Any]:
+        """Obtiene la función ``function_name`` de `Callback`"""
+
         if not (hasattr(self.callback, function_name)):
             raise RuntimeError(_("La función a llamar no se encuentra"))
 
-        result = self.execute(
-            getattr(self.callback, function_name), *args, **kwargs
+        return getattr(self.callback, function_name)
 
-        )
+    async def batch(
+        self,
+        *commands: Union["Command", Tuple[str, ...]],
+        transaction: bool = False
 
-        async for i in _return_coroutine(result):
-            yield i
+    ) -> List[Any]:
+        """Ejecuta varios comandos con una sola conexión de la piscina
+
+        Args:
+            *commands:
+              Los comandos creados con `command()` o tuplas con el nombre
+              de la función y sus argumentos posicionales
+
+            transaction:
+              **True** para ejecutarlos dentro de una sola transacción
+
+        Returns:
+            El resultado de cada comando en el mismo orden (ver `Session.call()`)
+        """
+
+        commands = [
+            x if (isinstance(x, Command)) else Command(x[0], x[1:], {}) for x in commands
+
+        ]
+
+        async with self.session(transaction) as session:
+            return [
+                await session.call(x.function_name, *x.args, **x.kwargs) for x in commands
+
+            ]
 
     async def return_first_result(self, *args, **kwargs):
         """Retorna el primer y sólo el primer resultado
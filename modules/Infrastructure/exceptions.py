@@ -16,5 +16,8 @@ class InvalidRequest(Exception):
 class RootHandlerNotExists(Exception):
     """ Cuando el archivo controlador no se encuentra """
 
+class InvalidService(Exception):
+    """ Cuando el servicio no cumple con lo requerido para cargarlo """
+
 class UserNotFound(Exception):
     """ Cuando el usuario/ID no existe """
@@ -0,0 +1,234 @@
+import signal
+import asyncio
+import logging
+import functools
+import multiprocessing
+import concurrent.futures
+import concurrent.futures.process
+
+from typing import Any, Dict
+
+import msgpack
+
+from modules.Infrastructure import options
+from utils.General import show_services
+from utils.extra import parse_args
+from utils.extra import create_translation
+
+_ = create_translation.create("executor")
+logger = logging.getLogger(__name__)
+
+# La versión y la clase de los servicios ya importados en cada proceso
+_handlers = {}
+
+def _initializer():
+    # El proceso principal es el que decide cuándo terminar
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _ping():
+    return True
+
+def _run(filename, version, action, payload):
+    # Se ejecuta en los procesos, por lo que solo recibe y retorna bytes
+    (init_params, args, kwargs) = msgpack.loads(payload)
+
+    cached = _handlers.get(filename)
+
+    if (cached is None) or (cached[0] != version):
+        # El servicio pudo ser recargado después de crear el proceso
+        handler = show_services.get_module(filename, reload=True)
+
+        _handlers[filename] = (version, handler)
+
+    else:
+        handler = cached[1]
+
+    (init_args, init_kwargs) = parse_args.get_binder(handler).bind(init_params)
+
+    return msgpack.dumps(
+        getattr(handler(*init_args, **init_kwargs), action)(*args, **kwargs)
+
+    )
+
+class ActionExecutor:
+    """
+    Ejecuta las acciones de los servicios que consumen mucho CPU
+
+    Los servicios indican en su contrato qué acciones se ejecutan en un
+    proceso (`options.EXECUTOR_PROCESS`) o en un hilo
+    (`options.EXECUTOR_THREAD`). Así el bucle de eventos sigue atendiendo
+    al resto de las conexiones.
+
+    En los procesos se crea una nueva instancia del servicio en cada
+    acción con los parámetros de inicialización, por lo que la acción
+    solo recibe sus parámetros. Esa instancia no recibe el controlador
+    (`SET_CONTROLLER`), no se llama a `INITIALIZER` ni a `WARMUP` y no se
+    respeta `LIFECYCLE`. Tanto los argumentos como el resultado se
+    serializan con `msgpack`.
+
+    Si un proceso termina inesperadamente (por ejemplo, por falta de
+    memoria), los procesos no se vuelven a crear, ya que copiar el proceso
+    cuando existen otros hilos puede dejar bloqueos adquiridos en la copia.
+    Desde entonces, esas acciones (incluida la que falló) se ejecutan en un
+    hilo hasta reiniciar el servidor.
+
+    Attributes:
+        process_workers: El número de procesos
+        thread_workers: El número de hilos
+    """
+
+    def __init__(
+        self,
+        process_workers: int = options.PROCESS_WORKERS,
+        thread_workers: int = options.THREAD_WORKERS
+
+    ):
+        """
+        Args:
+            process_workers:
+              El número de procesos. Si es cero o menos, las acciones que
+              se ejecutarían en un proceso se ejecutan en un hilo.
+
+            thread_workers:
+              El número de hilos
+        """
+
+        self.process_workers = process_workers
+        self.thread_workers = max(thread_workers, 1)
+
+        self.__processes = None
+        self.__threads = concurrent.futures.ThreadPoolExecutor(
+            self.thread_workers, thread_name_prefix="action"
+
+        )
+        # El límite de acciones simultáneas de cada servicio
+        self.__limits = {}
+
+    def start(self) -> None:
+        """Inicia los procesos
+
+        Conviene llamarlo antes de que existan otros hilos, ya que los
+        procesos se crean copiando el proceso actual.
+        """
+
+        if (self.process_workers <= 0) or (self.__processes is not None):
+            return
+
+        self.__create()
+
+        # Se crean todos los procesos ahora y no en la primera petición
+        for future in [self.__processes.submit(_ping) for _ in range(self.process_workers)]:
+            future.result()
+
+    def __create(self):
+        self.__processes = concurrent.futures.ProcessPoolExecutor(
+            self.process_workers,
+            mp_context = multiprocessing.get_context("fork"),
+            initializer = _initializer
+
+        )
+
+    def __disable(self, broken):
+        # Varias acciones pueden fallar al mismo tiempo, pero el error sólo
+        # se registra una vez.
+        if (self.__processes is not broken):
+            return
+
+        logger.error(_("Un proceso terminó inesperadamente; las acciones se ejecutarán en un hilo hasta reiniciar el servidor"))
+
+        broken.shutdown(wait=False)
+
+        self.__processes = None
+
+    def __limit(self, service):
+        limit = self.__limits.get(service.handler)
+
+        if (limit is None):
+            limit = asyncio.Semaphore(service.concurrency)
+
+            self.__limits[service.handler] = limit
+
+        return limit
+
+    async def run(
+        self,
+        service: "contract.Contract",
+        obj: object,
+        action: str,
+        params: Dict[str, Any],
+        init_params: Dict[str, Any]
+
+    ) -> Any:
+        """Ejecuta la acción ``action`` según el contrato del servicio
+
+        Args:
+            service:
+              El contrato del servicio
+
+            obj:
+              La instancia del servicio (solo se usa en los hilos)
+
+            action:
+              La acción a ejecutar
+
+            params:
+              Los parámetros de la acción
+
+            init_params:
+              Los parámetros de inicialización (solo se usan en los procesos)
+
+        Returns:
+            Lo mismo que la acción
+        """
+
+        function = getattr(obj, action)
+
+        # Los errores de conversión se detectan antes de usar otro proceso
+        (args, kwargs) = parse_args.get_binder(function).bind(params)
+
+        if (service.concurrency > 0):
+            async with self.__limit(service):
+                return await self.__run(service, function, action, args, kwargs, init_params)
+
+        else:
+            return await self.__run(service, function, action, args, kwargs, init_params)
+
+    async def __run(self, service, function, action, args, kwargs, init_params):
+        loop = asyncio.get_running_loop()
+
+        if (service.executors[action] == options.EXECUTOR_PROCESS) and (self.__processes is not None):
+            payload = msgpack.dumps([init_params, args, kwargs])
+
+            processes = self.__processes
+
+            try:
+                result = await loop.run_in_executor(
+                    processes, _run, service.path, service.version, action, payload
+
+                )
+
+            except concurrent.futures.process.BrokenProcessPool:
+                self.__disable(processes)
+
+            else:
+                return msgpack.loads(result)
+
+        return await loop.run_in_executor(
+            self.__threads, functools.partial(function, *args, **kwargs)
+
+        )
+
+    def forget(self, handler: type, /) -> None:
+        """Olvida el límite de acciones simultáneas de un servicio"""
+
+        self.__limits.pop(handler, None)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Termina los procesos y los hilos"""
+
+        if (self.__processes is not None):
+            self.__processes.shutdown(wait)
+
+            self.__processes = None
+
+        self.__threads.shutdown(wait)
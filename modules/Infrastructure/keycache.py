@@ -0,0 +1,123 @@
+import os
+import time
+import logging
+
+from typing import Optional
+
+import aiofiles
+
+from modules.Infrastructure import exceptions
+from modules.Infrastructure import options
+from utils.extra import lru_cache
+from utils.extra import create_translation
+
+_ = create_translation.create("keycache")
+logger = logging.getLogger(__name__)
+
+class KeyCache:
+    """
+    Caché de las claves de verificación de los usuarios
+
+    Las claves se leen del disco una sola vez y se guardan en memoria. Cada
+    cierto tiempo se vuelve a comprobar la fecha de modificación del archivo
+    para que un cambio o eliminación de la clave surta efecto sin reiniciar
+    el servidor, pero sin tener que acceder al sistema de archivos en cada
+    petición.
+
+    Attributes:
+        check_interval: Los segundos que deben pasar para volver a comprobar una clave
+    """
+
+    def __init__(
+        self,
+        maxsize: int = options.KEY_CACHE_SIZE,
+        check_interval: float = options.KEY_CACHE_CHECK
+
+    ):
+        """
+        Args:
+            maxsize:
+              El número máximo de claves en memoria
+
+            check_interval:
+              Los segundos que deben pasar para volver a comprobar una clave.
+              Si es cero o menos se comprueba en cada acceso.
+        """
+
+        self.check_interval = check_interval
+
+        self.__cache = lru_cache.LRUCache(maxsize)
+
+    @property
+    def cache(self) -> "lru_cache.LRUCache":
+        return self.__cache
+
+    @staticmethod
+    def __stat(key_path):
+        try:
+            return os.stat(key_path).st_mtime_ns
+
+        except (FileNotFoundError, NotADirectoryError):
+            raise exceptions.PublicKeyNotFound(
+                _("Error, la clave '{}' no existe").format(key_path)
+
+            )
+
+    async def get(self, key_path: str, /) -> bytes:
+        """Obtiene la clave de verificación
+
+        Args:
+            key_path:
+              La ruta de la clave
+
+        Returns:
+            La clave de verificación
+
+        Raises:
+            exceptions.PublicKeyNotFound:
+              Cuando la clave no existe
+        """
+
+        now = time.monotonic()
+        item = self.__cache.get(key_path)
+
+        if (item is not None):
+            (key, mtime, checked) = item
+
+            if (now - checked < self.check_interval):
+                return key
+
+            try:
+                current = self.__stat(key_path)
+
+            except exceptions.PublicKeyNotFound:
+                self.__cache.delete(key_path)
+                raise
+
+            if (current == mtime):
+                self.__cache.set(key_path, (key, mtime, now))
+
+                return key
+
+            logger.debug(_("La clave '%s' ha cambiado, leyéndola de nuevo..."), key_path)
+
+        mtime = self.__stat(key_path)
+
+        async with aiofiles.open(key_path, "rb") as fd:
+            key = await fd.read()
+
+        self.__cache.set(key_path, (key, mtime, now))
+
+        return key
+
+    def invalidate(self, key_path: Optional[str] = None, /) -> None:
+        """Descarta una clave o todas si no se especifica ``key_path``"""
+
+        if (key_path is None):
+            self.__cache.clear()
+
+        else:
+            self.__cache.delete(key_path)
+
+# La caché compartida por todas las conexiones del proceso
+shared = KeyCache()
@@ -0,0 +1,273 @@
+import copy
+import asyncio
+import logging
+import collections
+
+from typing import Any, Dict, Optional, Tuple
+
+from modules.Infrastructure import options
+from utils.extra import parse_args
+from utils.extra import execute_possible_coroutine
+from utils.extra import create_translation
+
+_ = create_translation.create("lifecycle")
+logger = logging.getLogger(__name__)
+
+async def _create(service, params):
+    obj = await parse_args.async_execute_function(service.handler, params)
+
+    if (service.warmup_method is not None):
+        await execute_possible_coroutine.execute(
+            getattr(obj, service.warmup_method)
+
+        )
+
+    return obj
+
+async def _shutdown(service, obj):
+    if (service.shutdown_method is None):
+        return
+
+    try:
+        await execute_possible_coroutine.execute(
+            getattr(obj, service.shutdown_method)
+
+        )
+
+    except Exception:
+        logger.exception(_("Ocurrió una excepción finalizando el servicio '%s'"), service.path)
+
+async def _finalize(singleton):
+    (service, future) = singleton
+
+    try:
+        obj = await future
+
+    except Exception:
+        return
+
+    await _shutdown(service, obj)
+
+class ConnectionScope:
+    """
+    Las instancias de los servicios que viven mientras dure una conexión
+
+    Se crean la primera vez que se usan en la conexión y al cerrarla se
+    ejecuta su método de finalización.
+    """
+
+    def __init__(self, manager: "LifecycleManager"):
+        self.manager = manager
+
+        self.__instances = {}
+
+    async def get(
+        self,
+        service: "contract.Contract",
+        params: Dict[str, Any],
+        *, isolated: bool = False
+
+    ) -> object:
+        """Obtiene la instancia del servicio según su ciclo de vida
+
+        Args:
+            service:
+              El contrato del servicio
+
+            params:
+              Los parámetros de inicialización de la petición
+
+            isolated:
+              **True** cuando la petición se ejecuta a la vez que otras de
+              la misma conexión. La instancia por conexión se entrega como
+              una copia superficial, igual que la instancia única.
+
+        Returns:
+            La instancia a usar en la petición
+        """
+
+        if (service.lifecycle == options.LIFECYCLE_SINGLETON):
+            return await self.manager.get(service, params)
+
+        elif (service.lifecycle == options.LIFECYCLE_CONNECTION):
+            instance = self.__instances.get(service.handler)
+
+            if (instance is None):
+                instance = (service, await _create(service, params))
+
+                self.__instances[service.handler] = instance
+
+            return copy.copy(instance[1]) if (isolated) else instance[1]
+
+        else:
+            return await parse_args.async_execute_function(service.handler, params)
+
+    async def close(self) -> None:
+        """Finaliza las instancias de la conexión"""
+
+        (instances, self.__instances) = (self.__instances, {})
+
+        for (service, obj) in instances.values():
+            await _shutdown(service, obj)
+
+class LifecycleManager:
+    """
+    Las instancias de los servicios que viven mientras dure el proceso
+
+    Si varias conexiones piden la misma clase al mismo tiempo, sólo se
+    crea una instancia. Cada petición recibe una copia superficial de ella
+    para que los datos de la petición no se mezclen entre conexiones,
+    mientras que los atributos creados en el método de calentamiento (como
+    conexiones o cachés) se comparten.
+
+    También cuenta las peticiones en curso de cada clase para que, al
+    recargar un servicio, la instancia única anterior se finalice cuando
+    terminen (ver `retire()`).
+    """
+
+    def __init__(self):
+        self.__singletons = {}
+        # Los parámetros con los que se creó cada instancia única
+        self.__params = {}
+        self.__active = collections.Counter()
+        self.__drained = {}
+        # Las instancias únicas de las versiones anteriores y las tareas que las finalizan
+        self.__retired = {}
+        self.__retiring = set()
+
+    def scope(self) -> "ConnectionScope":
+        """Crea el ámbito de una nueva conexión"""
+
+        return ConnectionScope(self)
+
+    async def get(self, service: "contract.Contract", params: Dict[str, Any]) -> object:
+        """Obtiene una copia de la instancia única del servicio
+
+        La instancia se crea con los parámetros de inicialización de la
+        primera petición que la use. Los de las siguientes peticiones se
+        ignoran, por lo que si son diferentes se registra una advertencia
+        (una sola vez por instancia).
+        """
+
+        cls = service.handler
+        # Las peticiones que empezaron antes de recargar el servicio usan la
+        # instancia anterior, aunque esté por finalizarse.
+        singleton = self.__singletons.get(cls) or self.__retired.get(cls)
+
+        if (singleton is None):
+            singleton = (service, asyncio.ensure_future(_create(service, params)))
+
+            self.__singletons[cls] = singleton
+            self.__params[cls] = params
+
+        elif (cls in self.__params) and (self.__params[cls] != params):
+            logger.warning(
+                _("El servicio '%s' tiene una sola instancia, la cual ya fue creada con otros "
+                  "parámetros de inicialización; se ignoran los de esta petición"),
+                service.path
+
+            )
+
+            # Sólo se advierte una vez por instancia
+            del self.__params[cls]
+
+        try:
+            obj = await asyncio.shield(singleton[1])
+
+        except Exception:
+            # Se intentará crear de nuevo en la siguiente petición
+            if (self.__singletons.get(cls) is singleton):
+                self.forget(cls)
+
+            raise
+
+        return copy.copy(obj)
+
+    def acquire(self, *services: Optional["contract.Contract"]) -> None:
+        """Indica que una petición empezó a usar los servicios"""
+
+        for service in services:
+            if (service is not None):
+                self.__active[service.handler] += 1
+
+    def release(self, *services: Optional["contract.Contract"]) -> None:
+        """Indica que una petición terminó de usar los servicios"""
+
+        for service in services:
+            if (service is None):
+                continue
+
+            cls = service.handler
+            self.__active[cls] -= 1
+
+            if (self.__active[cls] <= 0):
+                del self.__active[cls]
+
+                drained = self.__drained.pop(cls, None)
+
+                if (drained is not None):
+                    drained.set()
+
+    def active(self, cls: type) -> int:
+        """El número de peticiones en curso que usan la clase ``cls``"""
+
+        return self.__active.get(cls, 0)
+
+    async def __retire(self, cls):
+        while (self.active(cls) > 0):
+            drained = self.__drained.get(cls)
+
+            if (drained is None):
+                drained = self.__drained[cls] = asyncio.Event()
+
+            await drained.wait()
+
+        singleton = self.__retired.pop(cls, None)
+
+        if (singleton is not None):
+            await _finalize(singleton)
+
+    def retire(self, cls: type) -> None:
+        """Finaliza la instancia única de una versión anterior de un servicio
+
+        La instancia se olvida en ese momento, así que las nuevas peticiones
+        crean otra, pero no se finaliza hasta que terminen las peticiones en
+        curso que usan ``cls``.
+        """
+
+        singleton = self.forget(cls)
+
+        if (singleton is None):
+            return
+
+        self.__retired[cls] = singleton
+
+        task = asyncio.ensure_future(self.__retire(cls))
+
+        self.__retiring.add(task)
+        task.add_done_callback(self.__retiring.discard)
+
+    def forget(self, cls: type) -> Optional[Tuple["contract.Contract", asyncio.Future]]:
+        """Olvida la instancia única de ``cls`` sin finalizarla
+
+        Returns:
+            El contrato y la tarea que crea (o creó) la instancia o **None** si no existe
+        """
+
+        self.__params.pop(cls, None)
+
+        return self.__singletons.pop(cls, None)
+
+    async def shutdown(self) -> None:
+        """Finaliza todas las instancias únicas, incluso las que esperan a
+        que terminen sus peticiones"""
+
+        for task in list(self.__retiring):
+            task.cancel()
+
+        (singletons, self.__singletons) = (self.__singletons, {})
+        self.__params.clear()
+        (retired, self.__retired) = (self.__retired, {})
+
+        for singleton in (*retired.values(), *singletons.values()):
+            await _finalize(singleton)
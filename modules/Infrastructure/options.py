@@ -18,3 +18,104 @@ ADMIN_SERVICE     = "admin"
 INDEX_NAME        = "index"
 END_CHUNK         = defaults.end_chunk
 SERVICE_FILE      = "services/"
+
+# Los modos de enmarcado de los datos. El modo por delimitador usa
+# `END_CHUNK` y el modo por longitud antepone el tamaño de los datos
+# usando `LENGTH_FORMAT`.
+FRAMING_DELIMITER = "delimiter"
+FRAMING_LENGTH    = "length"
+FRAMING_MODES     = (FRAMING_DELIMITER, FRAMING_LENGTH)
+LENGTH_FORMAT     = "!Q"
+
+# El tamaño máximo de cada fragmento de un cuerpo transmitido por partes
+# y el espacio adicional que ocupa el cifrado y la firma de cada marco.
+STREAM_CHUNK_SIZE = 2**20
+FRAME_OVERHEAD    = 2**10
+
+# Los búferes más pequeños que este tamaño se agrupan antes de escribirlos
+WRITE_COALESCE_SIZE = 2**10*64
+
+# El número máximo de claves de verificación en memoria y los segundos
+# que deben pasar para volver a comprobar si cambiaron en el disco.
+KEY_CACHE_SIZE    = 2**12
+KEY_CACHE_CHECK   = 5
+
+# El número máximo de usuarios en memoria y los segundos que dura cada uno
+# (véase `user_cache_ttl` en la configuración). Un usuario modificado en otro
+# proceso (como UTeslaCLI) se actualiza al caducar.
+USER_CACHE_SIZE   = 2**12
+USER_CACHE_TTL    = 30
+
+# El número máximo de tokens de acceso en memoria y los segundos que dura cada
+# uno (véase `token_cache_ttl` en la configuración). La fecha de expiración
+# del token se comprueba en cada petición.
+TOKEN_CACHE_SIZE  = 2**12
+TOKEN_CACHE_TTL   = 30
+
+# El número de filas que se obtienen a la vez de un resultado de MySQL
+FETCH_SIZE        = 256
+
+# Las estadísticas de la piscina de conexiones de MySQL: los segundos usados
+# para calcular las obtenciones por segundo, los límites (en segundos) de
+# cada intervalo del histograma de los tiempos de espera y el número máximo
+# de funciones cuyo tiempo se registra.
+POOL_STATS_WINDOW  = 60
+POOL_WAIT_BUCKETS  = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+POOL_STATS_SLOWEST = 2**8
+
+# Los segundos que dura la tabla de rutas de los servicios remotos (véase
+# `routing_table_ttl` en la configuración). Los cambios hechos en el mismo
+# proceso la actualizan de inmediato.
+ROUTING_TABLE_TTL = 60
+
+# La reanudación de sesiones. El cliente envía `RESUME_PREFIX`, los datos
+# aleatorios y el ticket en vez del nombre de usuario real; el servidor
+# responde con `RESUME_ACCEPT` y sus datos aleatorios o con `RESUME_REJECT`
+# para continuar con el intercambio de claves completo.
+TICKET_LIFETIME      = 3600
+RESUME_PREFIX        = b"\x00UTR"
+RESUME_ACCEPT        = b"\x01"
+RESUME_REJECT        = b"\x00"
+RESUME_LENGTH        = 2**10
+RESUME_RANDOM_SIZE   = 32
+RESUME_SECRET_SIZE   = 32
+RESUME_SECRET_PERSON = b"utesla-resume"
+RESUME_KEY_PERSON    = b"utesla-session"
+
+# Los marcos más grandes que este tamaño se cifran y descifran en otro hilo
+CRYPT_THRESHOLD   = 2**20
+CRYPT_WORKERS     = 4
+
+# El número máximo de peticiones de una misma sesión que se ejecutan a la vez
+PIPELINE_DEPTH    = 16
+
+# El número de procesos que atienden a los clientes y el número máximo de veces
+# que se reinician en `WORKER_RESTART_WINDOW` segundos.
+WORKERS               = 1
+WORKER_MAX_RESTARTS   = 10
+WORKER_RESTART_WINDOW = 60
+
+# Dónde se pueden ejecutar las acciones que consumen mucho CPU y el número de
+# procesos e hilos que las ejecutan.
+EXECUTOR_PROCESS  = "process"
+EXECUTOR_THREAD   = "thread"
+EXECUTOR_MODES    = (EXECUTOR_PROCESS, EXECUTOR_THREAD)
+PROCESS_WORKERS   = 2
+THREAD_WORKERS    = 4
+
+# El número máximo de rutas de servicios resueltas en memoria y el intervalo
+# (en milisegundos) para comprobar si cambió la carpeta de los servicios.
+ROUTE_CACHE_SIZE    = 2**12
+SERVICES_CHECK_TIME = 2000
+
+# Cómo se aplican los cambios de los servicios con la autorecarga habilitada:
+# reiniciando el proceso o importando de nuevo sólo el servicio modificado.
+RELOAD_PROCESS = "process"
+RELOAD_SERVICE = "service"
+RELOAD_MODES   = (RELOAD_PROCESS, RELOAD_SERVICE)
+
+# Los ciclos de vida de las instancias de los servicios
+LIFECYCLE_REQUEST    = "request"
+LIFECYCLE_CONNECTION = "connection"
+LIFECYCLE_SINGLETON  = "singleton"
+LIFECYCLE_MODES      = (LIFECYCLE_REQUEST, LIFECYCLE_CONNECTION, LIFECYCLE_SINGLETON)
@@ -2,9 +2,8 @@ import os
 import logging
 from typing import Optional, Union
 
-import aiofiles
-
 from modules.Infrastructure import exceptions
+from modules.Infrastructure import keycache
 
 from utils.Crypt import hibrid
 from utils.extra import create_translation
@@ -25,7 +24,9 @@ class Parser:
 
     Attributes:
         session: La sesión ECDH
+        context: El contexto criptográfico de la sesión
         user_dir: El directorio de las claves de los usuarios
+        key_cache: La caché de las claves de verificación
         local_key: La clave de firmado del remitente
     
     """
@@ -35,7 +36,10 @@ class Parser:
         session: "x25519_xsalsa20_poly1305MAC.InitSession",
         local_key: bytes,
         init_path: str = "data",
-        user_dir: str = "pubkeys"
+        user_dir: str = "pubkeys",
+        verify_key: Optional[bytes] = None,
+        key_cache: Optional["keycache.KeyCache"] = None,
+        initiator: bool = False
 
     ):
         """
@@ -51,14 +55,30 @@ class Parser:
 
             user_dir:
               El directorio de las claves de los usuarios
+
+            verify_key:
+              La clave de verificación del otro extremo (si ya se conoce)
+
+            key_cache:
+              La caché de las claves de verificación. Por defecto se usa
+              la compartida por todo el proceso.
+
+            initiator:
+              **True** si es el extremo que inició la sesión (el cliente)
         """
 
         self.session = session
+        # Se crea una sola vez por sesión y se reutiliza en cada mensaje
+        self.context = hibrid.Context(
+            session, local_key, verify_key, initiator=initiator
+
+        )
         self.user_dir = "%s/%s" % (
             init_path, user_dir
         
         )
         self.local_key = local_key
+        self.key_cache = keycache.shared if (key_cache is None) else key_cache
 
     @staticmethod
     def __check_length(username):
@@ -85,14 +105,6 @@ class Parser:
 
         return user
 
-    @staticmethod
-    def __check_key(key_path):
-        if not (os.path.isfile(key_path)):
-            raise exceptions.PublicKeyNotFound(
-                _("Error, la clave '{}' no existe").format(key_path)
-
-            )
-
     def reply(
         self,
         message: bytes,
@@ -108,23 +120,16 @@ class Parser:
               El mensaje a cifrar
 
             *args:
-              Los argumentos variables para `hibrid.encrypt()`
+              Los argumentos variables para `hibrid.Context.encrypt()`
 
             **kwargs:
-              Los argumentos claves variables para `hibrid.encrypt()`
+              Los argumentos claves variables para `hibrid.Context.encrypt()`
 
         Returns:
             Los datos cifrados y firmados
         """
 
-        return hibrid.encrypt(
-                    self.local_key,
-                    self.session.destination,
-                    self.session.source.private,
-                    message,
-                    *args, **kwargs
-
-               )
+        return self.context.encrypt(message, *args, **kwargs)
 
     async def destroy(
         self,
@@ -147,10 +152,10 @@ class Parser:
               28 o 56 digitos.
 
             *args:
-              Argumentos variables para `hibrid.decrypt()`
+              Argumentos variables para `hibrid.Context.decrypt()`
 
             **kwargs:
-              Argumentos variables para `hibrid.decrypt()`
+              Argumentos variables para `hibrid.Context.decrypt()`
 
         Returns:
             Los datos descifrados y verificados
@@ -158,23 +163,27 @@ class Parser:
 
         real_user = self.__user2hex(real_user)
 
-        key_path = os.path.join(self.user_dir, real_user)
+        verify_key = await self.get_verify_key(real_user)
 
-        self.__check_key(key_path)
+        logging.debug(_("Descifrando datos del identificador '%s'..."), real_user)
 
-        async with aiofiles.open(key_path, "rb") as fd:
-            verify_key = await fd.read()
+        return self.context.decrypt(message, verify_key, *args, **kwargs)
 
-        logging.debug(_("Descifrando datos del identificador '%s'..."), real_user)
+    async def get_verify_key(self, real_user: Union[str, bytes], /) -> bytes:
+        """Obtiene la clave de verificación del usuario
 
-        return hibrid.decrypt(
-                    verify_key,
-                    self.session.destination,
-                    self.session.source.private,
-                    message,
-                    *args, **kwargs
+        Args:
+            real_user:
+              El identificador de usuario (véase `destroy()`)
 
-               )
+        Returns:
+            La clave de verificación
+        """
+
+        return await self.key_cache.get(
+            os.path.join(self.user_dir, self.__user2hex(real_user))
+
+        )
 
     def build(
         self,
@@ -194,23 +203,16 @@ class Parser:
               La clave de firmado
 
             *args:
-              Argumentos variables para `hibrid.encrypt()`
+              Argumentos variables para `hibrid.Context.encrypt()`
 
             **kwargs:
-              Argumentos claves variables para `hibrid.encrypt()`
+              Argumentos claves variables para `hibrid.Context.encrypt()`
 
         Returns:
             Los datos cifrados y firmados
         """
 
-        return hibrid.encrypt(
-                   self.local_key,
-                   self.session.destination,
-                   self.session.source.private,
-                   message,
-                   *args, **kwargs
-
-               )
+        return self.context.encrypt(message, *args, **kwargs)
 
     def get_message(
         self,
@@ -234,11 +236,4 @@ class Parser:
             Los datos descifrados y verificados
         """
 
-        return hibrid.decrypt(
-                    verify_key,
-                    self.session.destination,
-                    self.session.source.private,
-                    data,
-                    *args, **kwargs
-
-               )
+        return self.context.decrypt(data, verify_key, *args, **kwargs)
@@ -0,0 +1,137 @@
+import bisect
+import time
+import inspect
+import collections
+
+from typing import Any, Dict, List, Tuple
+
+from modules.Infrastructure import options
+from utils.extra import create_translation
+
+_ = create_translation.create("poolstats")
+
+CallbackStats = inspect.namedtuple(
+    "CallbackStats", ("name", "calls", "total", "slowest")
+
+)
+
+class PoolStats:
+    """
+    Las estadísticas de la piscina de conexiones
+
+    `dbConnector.SimpleDBConnector` registra cada vez que se obtiene y se
+    devuelve una conexión, y `dbConnector.UTeslaConnector` el tiempo de cada
+    función ejecutada con `execute_command()`.
+
+    Attributes:
+        window: Los segundos usados para calcular las obtenciones por segundo
+        buckets: Los límites de cada intervalo del histograma de los tiempos de espera
+        checkouts: Las veces que se obtuvo una conexión
+        in_use: Las conexiones obtenidas y aún no devueltas
+    """
+
+    def __init__(
+        self,
+        window: int = options.POOL_STATS_WINDOW,
+        buckets: Tuple[float, ...] = options.POOL_WAIT_BUCKETS,
+        max_callbacks: int = options.POOL_STATS_SLOWEST
+
+    ):
+        self.window = max(window, 1)
+        self.buckets = tuple(sorted(buckets))
+        self.max_callbacks = max_callbacks
+        self.checkouts = 0
+        self.in_use = 0
+
+        # Las obtenciones de cada segundo (el segundo y la cantidad)
+        self.__seconds = collections.deque(maxlen=self.window)
+        # El último intervalo son las esperas mayores que el último límite
+        self.__histogram = [0] * (len(self.buckets) + 1)
+        self.__callbacks = {}
+
+    def checkout(self, wait: float, /) -> None:
+        """Registra que se obtuvo una conexión después de esperar ``wait`` segundos"""
+
+        self.checkouts += 1
+        self.in_use += 1
+        self.__histogram[bisect.bisect_left(self.buckets, wait)] += 1
+
+        second = int(time.monotonic())
+
+        if (self.__seconds) and (self.__seconds[-1][0] == second):
+            self.__seconds[-1][1] += 1
+
+        else:
+            self.__seconds.append([second, 1])
+
+    def checkin(self) -> None:
+        """Registra que se devolvió una conexión"""
+
+        self.in_use -= 1
+
+    def checkouts_per_second(self) -> float:
+        """Las obtenciones por segundo en los últimos `window` segundos"""
+
+        since = int(time.monotonic()) - self.window
+
+        return sum(count for (second, count) in self.__seconds if (second > since)) / self.window
+
+    def wait_histogram(self) -> List[Tuple[float, int]]:
+        """El número de obtenciones cuya espera no superó cada límite
+
+        Returns:
+            Una lista con el límite y el número de obtenciones de cada
+            intervalo. El último límite es infinito.
+        """
+
+        return list(zip((*self.buckets, float("inf")), self.__histogram))
+
+    def callback(self, name: str, elapsed: float, /) -> None:
+        """Registra que la función ``name`` tardó ``elapsed`` segundos"""
+
+        stats = self.__callbacks.get(name)
+
+        if (stats is None):
+            if (len(self.__callbacks) >= self.max_callbacks):
+                return
+
+            stats = self.__callbacks[name] = [0, 0.0, 0.0]
+
+        stats[0] += 1
+        stats[1] += elapsed
+        stats[2] = max(stats[2], elapsed)
+
+    def slowest(self, limit: int = 10) -> List["CallbackStats"]:
+        """Las funciones más lentas ordenadas por su ejecución más lenta"""
+
+        result = sorted(
+            (CallbackStats(name, *stats) for (name, stats) in self.__callbacks.items()),
+            key = lambda x: x.slowest,
+            reverse = True
+
+        )
+
+        return result[:limit]
+
+    def snapshot(self, pool: Any = None) -> Dict[str, Any]:
+        """Todas las estadísticas en un diccionario
+
+        Args:
+            pool:
+              La piscina de conexiones para agregar su tamaño actual
+        """
+
+        snapshot = {
+            "checkouts"            : self.checkouts,
+            "checkouts_per_second" : self.checkouts_per_second(),
+            "in_use"               : self.in_use,
+            "wait_histogram"       : self.wait_histogram(),
+            "slowest"              : [x._asdict() for x in self.slowest()]
+
+        }
+
+        if (pool is not None):
+            for key in ("size", "freesize", "minsize", "maxsize"):
+                snapshot[key] = getattr(pool, key, None)
+
+        return snapshot
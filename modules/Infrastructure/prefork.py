@@ -0,0 +1,125 @@
+import os
+import time
+import signal
+import socket
+import logging
+
+from typing import Optional
+
+from modules.Infrastructure import options
+from utils.extra import create_translation
+
+_ = create_translation.create("prefork")
+logger = logging.getLogger(__name__)
+
+# Cada proceso puede tener su propio socket en el mismo puerto y el núcleo
+# reparte las conexiones entre ellos.
+REUSE_PORT = hasattr(socket, "SO_REUSEPORT")
+
+def _start_child(worker_id, children):
+    pid = os.fork()
+
+    if (pid == 0):
+        # Solo el proceso principal decide cuándo terminar
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+        return worker_id
+
+    children[pid] = worker_id
+
+def fork_workers(
+    num_workers: int,
+    max_restarts: int = options.WORKER_MAX_RESTARTS,
+    restart_window: int = options.WORKER_RESTART_WINDOW
+
+) -> Optional[int]:
+    """Crea los procesos que atienden a los clientes y los supervisa
+
+    Cada proceso debe crear su propio bucle de eventos, su propia piscina
+    de conexiones y demás recursos después de llamar a esta función.
+
+    El proceso principal reinicia los procesos que terminen de forma
+    inesperada y, al recibir <SIGINT> o <SIGTERM>, les manda <SIGTERM>
+    y espera a que terminen.
+
+    Args:
+        num_workers:
+          El número de procesos
+
+        max_restarts:
+          El número máximo de reinicios en ``restart_window`` segundos. Si
+          se supera, se terminan todos los procesos.
+
+        restart_window:
+          Los segundos en los que se cuentan los reinicios
+
+    Returns:
+        En los procesos creados, su identificador (de cero a ``num_workers`` - 1).
+        En el proceso principal retorna **None** cuando todos terminan.
+    """
+
+    children = {}
+    stopping = False
+    restarts = []
+
+    for worker_id in range(num_workers):
+        if (_start_child(worker_id, children) is not None):
+            return worker_id
+
+    logger.info(_("Se iniciaron %d procesos"), num_workers)
+
+    def stop(signum, frame):
+        nonlocal stopping
+
+        if not (stopping):
+            logger.warning(_("Terminando %d procesos..."), len(children))
+
+        stopping = True
+
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while (children):
+        try:
+            (pid, status) = os.wait()
+
+        except ChildProcessError:
+            break
+
+        worker_id = children.pop(pid, None)
+
+        if (worker_id is None) or (stopping):
+            continue
+
+        if (os.WIFEXITED(status)) and (os.WEXITSTATUS(status) == 0):
+            logger.info(_("El proceso %d (PID: %d) terminó"), worker_id, pid)
+            continue
+
+        logger.warning(
+            _("El proceso %d (PID: %d) terminó inesperadamente (estado: %d); reiniciando..."),
+            worker_id, pid, status
+
+        )
+
+        now = time.monotonic()
+        restarts = [x for x in restarts if (now - x < restart_window)] + [now]
+
+        if (len(restarts) > max_restarts):
+            logger.error(_("Se reiniciaron demasiados procesos; terminando..."))
+
+            stop(None, None)
+            continue
+
+        if (_start_child(worker_id, children) is not None):
+            return worker_id
+
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
@@ -0,0 +1,405 @@
+import os
+import re
+import inspect
+import logging
+
+from typing import List, Optional, Set
+
+from modules.Infrastructure import exceptions
+from modules.Infrastructure import contract
+from modules.Infrastructure import options
+from utils.General import show_services
+from utils.extra import remove_badchars
+from utils.extra import lru_cache
+from utils.extra import parse_args
+from utils.extra import create_translation
+
+_ = create_translation.create("registry")
+logger = logging.getLogger(__name__)
+
+Service = inspect.namedtuple(
+    "Service", ("exists", "current", "root")
+
+)
+
+# La ruta resuelta de un servicio inexistente
+_NOT_FOUND = ""
+
+# Los servicios deben estar dentro de una carpeta
+_SERVICE_REGEX = re.compile(r"^(.+/){2}.+.py$")
+
+class ServiceRegistry:
+    """
+    Tabla de rutas de los servicios
+
+    Al iniciar se recorre la carpeta de los servicios una sola vez y cada
+    petición se resuelve en memoria, sin consultar el sistema de archivos.
+    Los servicios se importan la primera vez que se usan y su contrato
+    (ver `contract.build()`) queda guardado para las siguientes peticiones.
+    Un servicio que no cumple con su contrato no se carga y el motivo sólo
+    se registra una vez.
+
+    Las rutas ya resueltas (existan o no) se guardan en una caché limitada
+    para que las peticiones repetidas no tengan que analizar la ruta de
+    nuevo. Cuando se agregan, eliminan o renombran archivos en la carpeta,
+    `refresh()` reconstruye la tabla y `reload()` importa de nuevo los
+    servicios modificados.
+
+    Attributes:
+        service_file: La carpeta de los servicios
+        index_name: El nombre del servicio principal
+        admin_service: El nombre del servicio administrativo
+        autoreload: Autorecargar los servicios al ser modificados
+        reload_mode: Cómo se aplican los cambios de los servicios (ver `options.RELOAD_MODES`)
+    """
+
+    def __init__(
+        self,
+        service_file: str,
+        index_name: str,
+        admin_service: str,
+        autoreload: bool = False,
+        cache_size: int = options.ROUTE_CACHE_SIZE,
+        reload_mode: str = options.RELOAD_PROCESS
+
+    ):
+        """
+        Args:
+            service_file:
+              La carpeta de los servicios
+
+            index_name:
+              El nombre del servicio principal (ya analizado con `show_services.parse_path()`)
+
+            admin_service:
+              El nombre del servicio administrativo (ya analizado con `show_services.parse_path()`)
+
+            autoreload:
+              **True** para autorecargar los servicios al ser modificados
+
+            cache_size:
+              El número máximo de rutas resueltas en memoria
+
+            reload_mode:
+              `options.RELOAD_PROCESS` para que `tornado.autoreload` reinicie
+              el proceso cuando se modifique un servicio o `options.RELOAD_SERVICE`
+              para recargarlo con `reload()`
+        """
+
+        self.service_file = service_file
+        self.index_name = index_name
+        self.admin_service = admin_service
+        self.autoreload = autoreload
+        self.reload_mode = reload_mode
+
+        self.__index_regex = re.compile(r"/%s(/*)$" % (re.escape(index_name)))
+        self.__root_regex = re.compile(r"/(/*)$")
+        self.__resolved = lru_cache.LRUCache(cache_size)
+        # La clase de cada archivo ya importado
+        self.__handlers = {}
+        # El contrato de cada archivo o el motivo por el que no es válido
+        self.__contracts = {}
+        # La fecha de modificación de cada archivo al importarlo
+        self.__versions = {}
+        self.__files = set()
+        self.__dirs = set()
+        self.__admin_file = None
+        # La fecha de modificación de cada carpeta para saber si cambió el árbol
+        self.__signature = {}
+
+        self.refresh(force=True)
+
+    @property
+    def files(self) -> Set[str]:
+        return self.__files
+
+    def __scan(self):
+        files = set()
+        dirs = set()
+        signature = {}
+
+        root = remove_badchars.remove(self.service_file, "/")
+
+        for (dirpath, dirnames, filenames) in os.walk(root):
+            dirnames[:] = [x for x in dirnames if (x != "__pycache__")]
+            dirpath = remove_badchars.remove(dirpath, "/")
+
+            try:
+                signature[dirpath] = os.stat(dirpath).st_mtime_ns
+
+            except OSError:
+                continue
+
+            dirs.add(dirpath)
+
+            for filename in filenames:
+                if (filename.endswith(".py")):
+                    files.add("%s/%s" % (dirpath, filename))
+
+        return (files, dirs, signature)
+
+    def __changed(self):
+        for (dirpath, mtime) in self.__signature.items():
+            try:
+                if (os.stat(dirpath).st_mtime_ns != mtime):
+                    return True
+
+            except OSError:
+                return True
+
+        return not (self.__signature)
+
+    def refresh(self, *, force: bool = False) -> bool:
+        """Reconstruye la tabla si el árbol de los servicios cambió
+
+        Args:
+            force:
+              Reconstruirla aunque no haya cambiado
+
+        Returns:
+            **True** si se reconstruyó
+        """
+
+        if not (force) and not (self.__changed()):
+            return False
+
+        (self.__files, self.__dirs, self.__signature) = self.__scan()
+
+        self.__resolved.clear()
+
+        admin_dirname = remove_badchars.remove(
+            "%s/%s" % (self.service_file, self.admin_service), "/"
+
+        )
+
+        if (admin_dirname in self.__dirs):
+            self.__admin_file = "%s/%s.py" % (admin_dirname, os.path.basename(admin_dirname))
+
+        else:
+            logger.debug(_("'%s' no existe y es necesario para usarlo como servicio administrativo"), admin_dirname)
+
+            self.__admin_file = None
+
+        # Los servicios que ya no existen se olvidan
+        for filename in list(self.__handlers):
+            if not (filename in self.__files):
+                del self.__handlers[filename]
+                self.__contracts.pop(filename, None)
+                self.__versions.pop(filename, None)
+
+        logger.debug(_("Tabla de servicios construida: %d archivo(s)"), len(self.__files))
+
+        return True
+
+    def invalidate(self, filename: Optional[str] = None, /) -> None:
+        """Olvida la clase importada de un servicio o de todos
+
+        Útil cuando el módulo fue recargado y se debe volver a obtener la clase.
+        También se olvidan los analizadores de los parámetros de la clase.
+        """
+
+        if (filename is None):
+            (handlers, self.__handlers) = (list(self.__handlers.values()), {})
+
+            self.__contracts.clear()
+            self.__versions.clear()
+
+        else:
+            filename = remove_badchars.remove(filename, "/")
+            handler = self.__handlers.pop(filename, None)
+            handlers = [] if (handler is None) else [handler]
+
+            self.__contracts.pop(filename, None)
+            self.__versions.pop(filename, None)
+
+        for handler in handlers:
+            parse_args.invalidate(handler)
+
+    def __isdir(self, path):
+        return remove_badchars.remove(path, "/") in self.__dirs
+
+    def __isfile(self, path):
+        return remove_badchars.remove(path, "/") in self.__files
+
+    def resolve(self, path: str, /) -> str:
+        """Obtiene el archivo del servicio ``path``
+
+        Returns:
+            El archivo o una cadena vacía si no existe
+        """
+
+        filename = self.__resolved.get(path)
+
+        if (filename is not None):
+            return filename
+
+        if (self.__root_regex.match(path)) or (self.__index_regex.match(path)):
+            index_dirname = "%s/%s" % (self.service_file, self.index_name)
+            filename = "%s/%s.py" % (index_dirname, os.path.basename(index_dirname))
+
+            if not (self.__isfile(filename)):
+                logger.debug(
+                    _("'%s' no existe y es el servicio requerido por el usuario, además que también es el índice"),
+                    filename
+
+                )
+
+                filename = _NOT_FOUND
+
+        else:
+            current_dirname = remove_badchars.remove(
+                "%s/%s" % (self.service_file, path[1:]), "/"
+
+            )
+
+            if (self.__isdir(current_dirname)):
+                filename = "%s/%s.py" % (current_dirname, os.path.basename(current_dirname))
+
+            else:
+                filename = "%s.py" % (current_dirname)
+
+            if not (_SERVICE_REGEX.match(filename)) or not (self.__isfile(filename)):
+                logger.debug(_("'%s' no existe y es el servicio requerido por el usuario"), path)
+
+                filename = _NOT_FOUND
+
+        filename = remove_badchars.remove(filename, "/") if (filename) else filename
+
+        self.__resolved.set(path, filename)
+
+        return filename
+
+    def get_handler(self, filename: str, /) -> object:
+        """Obtiene la clase del servicio ``filename`` importándolo si es necesario"""
+
+        handler = self.__handlers.get(filename)
+
+        if (handler is None):
+            self.__versions[filename] = self.__version(filename)
+
+            handler = show_services.get_module(
+                filename, self.autoreload and (self.reload_mode == options.RELOAD_PROCESS)
+
+            )
+
+            self.__handlers[filename] = handler
+
+        return handler
+
+    @staticmethod
+    def __version(filename):
+        try:
+            return os.stat(filename).st_mtime_ns
+
+        except OSError:
+            return 0
+
+    def reload(self) -> List[type]:
+        """Importa de nuevo los servicios modificados desde que se cargaron
+
+        Cada servicio se importa en un nuevo módulo y su contrato se valida
+        antes de reemplazar al anterior, así que si la nueva versión tiene un
+        error se sigue usando la anterior. Las peticiones que ya obtuvieron el
+        contrato anterior terminan con la versión anterior.
+
+        Returns:
+            Las clases reemplazadas
+        """
+
+        replaced = []
+
+        for (filename, version) in list(self.__versions.items()):
+            current_version = self.__version(filename)
+
+            if (current_version == version):
+                continue
+
+            # Aunque falle, no se intenta de nuevo hasta que se modifique otra vez
+            self.__versions[filename] = current_version
+
+            try:
+                handler = show_services.get_module(filename, reload=True)
+                service = contract.build(
+                    handler, filename,
+                    admin = filename == self.__admin_file,
+                    version = current_version
+
+                )
+
+            except exceptions.InvalidService as err:
+                logger.error(_("El servicio '%s' no se recargó y se seguirá usando la versión anterior: %s"), filename, err)
+                continue
+
+            except Exception:
+                logger.exception(_("El servicio '%s' no se recargó y se seguirá usando la versión anterior"), filename)
+                continue
+
+            old_handler = self.__handlers.get(filename)
+
+            self.__handlers[filename] = handler
+            self.__contracts[filename] = service
+
+            if (old_handler is not None):
+                parse_args.invalidate(old_handler)
+
+                replaced.append(old_handler)
+
+            logger.info(_("Servicio recargado: %s"), filename)
+
+        return replaced
+
+    def get_contract(self, filename: str, /, *, admin: bool = False) -> "contract.Contract":
+        """Obtiene el contrato del servicio ``filename`` cargándolo si es necesario
+
+        Raises:
+            exceptions.InvalidService:
+              Cuando el servicio no cumple con su contrato
+        """
+
+        service = self.__contracts.get(filename)
+
+        if (service is None):
+            try:
+                service = contract.build(
+                    self.get_handler(filename), filename,
+                    admin = admin,
+                    version = self.__versions.get(filename, 0)
+
+                )
+
+            except exceptions.InvalidService as err:
+                logger.error(_("El servicio '%s' no se pudo cargar: %s"), filename, err)
+
+                # Se guarda el motivo para no analizarlo (ni registrarlo) de nuevo
+                service = str(err)
+
+            self.__contracts[filename] = service
+
+        if (isinstance(service, str)):
+            raise exceptions.InvalidService(service)
+
+        return service
+
+    def lookup(self, path: str, /) -> "Service":
+        """Obtiene el contrato del servicio ``path`` y del servicio administrativo
+
+        Raises:
+            exceptions.RootHandlerNotExists:
+              Cuando el servicio administrativo no existe
+
+            exceptions.InvalidService:
+              Cuando alguno de los dos servicios no cumple con su contrato
+        """
+
+        if (self.__admin_file is None):
+            raise exceptions.RootHandlerNotExists(_("¡El servicio administrativo no se encuentra!"))
+
+        root = self.get_contract(self.__admin_file, admin=True)
+
+        filename = self.resolve(path)
+
+        if (filename):
+            return Service(True, self.get_contract(filename), root)
+
+        else:
+            return Service(False, None, root)
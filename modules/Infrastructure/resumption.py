@@ -0,0 +1,138 @@
+import time
+import inspect
+import hashlib
+import logging
+
+from typing import Optional
+
+import msgpack
+import nacl.utils
+import nacl.secret
+import nacl.exceptions
+
+from modules.Infrastructure import options
+from utils.extra import create_translation
+
+_ = create_translation.create("resumption")
+logger = logging.getLogger(__name__)
+
+# La identidad del usuario autenticado que se guarda en el ticket
+Identity = inspect.namedtuple(
+    "Identity",
+    ("real_user", "user", "userid", "is_guest_user", "secret", "expires")
+
+)
+
+# El ticket que conserva el cliente para reanudar la sesión
+Ticket = inspect.namedtuple("Ticket", ("ticket", "secret", "expires"))
+
+def derive_secret(shared_key: bytes) -> bytes:
+    """Deriva el secreto de reanudación desde la clave compartida de la sesión
+
+    Ambas partes conocen la clave compartida, por lo que el secreto no tiene
+    que ser transmitido.
+    """
+
+    return hashlib.blake2b(
+        shared_key,
+        digest_size = options.RESUME_SECRET_SIZE,
+        person = options.RESUME_SECRET_PERSON
+
+    ).digest()
+
+def derive_key(secret: bytes, client_random: bytes, server_random: bytes) -> bytes:
+    """Deriva la clave compartida de la sesión reanudada
+
+    Args:
+        secret:
+          El secreto de reanudación
+
+        client_random:
+          Los datos aleatorios que generó el cliente
+
+        server_random:
+          Los datos aleatorios que generó el servidor
+
+    Returns:
+        Una clave compartida diferente por cada reanudación
+    """
+
+    return hashlib.blake2b(
+        client_random + server_random,
+        key = secret,
+        digest_size = nacl.secret.SecretBox.KEY_SIZE,
+        person = options.RESUME_KEY_PERSON
+
+    ).digest()
+
+class TicketIssuer:
+    """
+    Emite y abre los tickets de reanudación
+
+    El ticket es la identidad del usuario y el secreto de reanudación
+    cifrados con una clave que sólo conoce el servidor, por lo que el
+    servidor no tiene que guardar ningún estado por cada ticket.
+
+    Attributes:
+        lifetime: Los segundos que dura un ticket
+    """
+
+    def __init__(self, lifetime: int = options.TICKET_LIFETIME, key: Optional[bytes] = None):
+        """
+        Args:
+            lifetime:
+              Los segundos que dura un ticket
+
+            key:
+              La clave para cifrar los tickets. Si no se especifica, se genera,
+              por lo que los tickets dejan de ser válidos al reiniciar.
+        """
+
+        if (key is None):
+            key = nacl.utils.random(nacl.secret.SecretBox.KEY_SIZE)
+
+        self.lifetime = lifetime
+
+        self.__box = nacl.secret.SecretBox(key)
+
+    def issue(
+        self,
+        real_user: bytes,
+        user: str,
+        userid: int,
+        is_guest_user: bool,
+        secret: bytes
+
+    ) -> bytes:
+        """Emite un ticket
+
+        Returns:
+            El ticket cifrado
+        """
+
+        return self.__box.encrypt(msgpack.dumps([
+            real_user, user, userid, is_guest_user, secret,
+            int(time.time()) + self.lifetime
+
+        ]))
+
+    def open(self, ticket: bytes) -> Optional["Identity"]:
+        """Abre un ticket
+
+        Returns:
+            La identidad del usuario o **None** si el ticket no es
+            válido o ya caducó.
+        """
+
+        try:
+            identity = Identity(*msgpack.loads(self.__box.decrypt(ticket)))
+
+        except (nacl.exceptions.CryptoError, ValueError, TypeError):
+            logger.debug(_("El ticket de reanudación no es válido"))
+            return
+
+        if (identity.expires <= time.time()):
+            logger.debug(_("El ticket de reanudación de '%s' ha caducado"), identity.user)
+            return
+
+        return identity
@@ -0,0 +1,114 @@
+import time
+import asyncio
+import inspect
+import logging
+
+from typing import Dict, Tuple
+
+from modules.Infrastructure import options
+from utils.extra import create_translation
+
+_ = create_translation.create("routing")
+logger = logging.getLogger(__name__)
+
+Route = inspect.namedtuple(
+    "Route", ("network", "networkid", "token")
+
+)
+
+class RoutingTable:
+    """
+    Tabla de rutas de los servicios remotos
+
+    Relaciona cada servicio con los nodos que lo tienen, ordenados por
+    prioridad, para que reenviar una petición no requiera consultar la base
+    de datos. La tabla se carga con una sola consulta (``get_routes``) y se
+    vuelve a cargar cuando caduca o cuando las funciones que modifican los
+    nodos o los servicios (ver `dbConnector.ServiceCallback`) la invalidan.
+
+    Las funciones que la invalidan sólo surten efecto en el mismo proceso; en
+    los demás (como UTeslaCLI o los procesos de ``workers``) un nodo o un
+    servicio eliminado sigue en la tabla hasta que caduca.
+
+    Attributes:
+        ttl: Los segundos que dura la tabla. Si es cero o menos no se guarda y
+            cada búsqueda consulta la base de datos.
+    """
+
+    def __init__(self, ttl: float = options.ROUTING_TABLE_TTL):
+        self.ttl = ttl
+
+        self.__routes = {}
+        self.__loaded = None
+        # Cambia con cada invalidación para descartar las cargas anteriores a ella
+        self.__generation = 0
+        self.__pending = None
+
+    @property
+    def routes(self) -> Dict[str, Tuple["Route", ...]]:
+        return self.__routes
+
+    def is_stale(self) -> bool:
+        if (self.__loaded is None) or (self.ttl <= 0):
+            return True
+
+        return time.monotonic() - self.__loaded >= self.ttl
+
+    async def __load(self, pool):
+        generation = self.__generation
+        routes = {}
+
+        async for (service, network, networkid, token) in pool.execute_command("get_routes"):
+            routes.setdefault(service, []).append(Route(network, networkid, token))
+
+        self.__routes = {service: tuple(x) for (service, x) in routes.items()}
+
+        # Si se invalidó durante la consulta, se cargará de nuevo en la siguiente búsqueda
+        if (generation == self.__generation):
+            self.__loaded = time.monotonic()
+
+        logger.debug(_("Tabla de rutas cargada: %d servicio(s)"), len(self.__routes))
+
+    def __done(self, future):
+        if (self.__pending is future):
+            self.__pending = None
+
+    async def load(self, pool: "dbConnector.UTeslaConnector", /) -> None:
+        """Carga la tabla
+
+        Si ya se está cargando, se espera a que termine en vez de hacer
+        otra consulta.
+        """
+
+        if (self.__pending is None):
+            self.__pending = asyncio.ensure_future(self.__load(pool))
+            self.__pending.add_done_callback(self.__done)
+
+        await asyncio.shield(self.__pending)
+
+    async def get(self, pool: "dbConnector.UTeslaConnector", service: str, /) -> Tuple["Route", ...]:
+        """Obtiene los nodos que tienen el servicio ``service``
+
+        Returns:
+            Las rutas ordenadas por prioridad (una tupla vacía si ningún nodo lo tiene)
+        """
+
+        if (self.is_stale()):
+            await self.load(pool)
+
+        return self.__routes.get(service, ())
+
+    def set_ttl(self, ttl: float, /) -> None:
+        """Ajusta los segundos que dura la tabla y la descarta"""
+
+        self.ttl = ttl
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Obliga a cargar la tabla de nuevo en la siguiente búsqueda"""
+
+        self.__loaded = None
+        self.__generation += 1
+
+# La tabla compartida por todas las conexiones del proceso
+shared = RoutingTable()
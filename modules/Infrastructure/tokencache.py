@@ -0,0 +1,163 @@
+import re
+import time
+import asyncio
+import inspect
+import logging
+
+from typing import Optional
+
+from modules.Infrastructure import options
+from utils.extra import lru_cache
+from utils.extra import create_translation
+
+_ = create_translation.create("tokencache")
+logger = logging.getLogger(__name__)
+
+class Authorization(inspect.namedtuple(
+    "Authorization", ("regex", "expire")
+
+)):
+    """
+    Lo que permite un token de acceso
+
+    Attributes:
+        regex: La expresión regular (ya compilada) de los servicios habilitados
+        expire: La fecha de expiración (en segundos desde la época)
+    """
+
+    __slots__ = ()
+
+    def is_expired(self) -> bool:
+        return self.expire < int(time.time())
+
+    def allows(self, path: str, /) -> bool:
+        """**True** si el token no ha expirado y habilita el servicio ``path``"""
+
+        return not (self.is_expired()) and (self.regex.match(path) is not None)
+
+# Los tokens inexistentes o con una expresión regular inválida también se guardan
+_NOT_FOUND = ()
+
+class TokenCache:
+    """
+    Caché de los tokens de acceso
+
+    Los servicios habilitados y la fecha de expiración de cada token se
+    obtienen con una sola consulta (``get_authorization``) y se guardan en
+    memoria por el hash del token durante un tiempo limitado, con la
+    expresión regular ya compilada. Así, una sesión que hace muchas
+    peticiones sólo consulta la base de datos una vez.
+
+    Las funciones que modifican los tokens (ver `dbConnector.TokenCallback`)
+    la invalidan sólo en el mismo proceso: en los demás (UTeslaCLI o los
+    otros procesos de UTesla) un token eliminado o con otros servicios
+    conserva sus permisos anteriores hasta `ttl` segundos.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = options.TOKEN_CACHE_SIZE,
+        ttl: float = options.TOKEN_CACHE_TTL
+
+    ):
+        """
+        Args:
+            maxsize:
+              El número máximo de tokens en memoria
+
+            ttl:
+              Los segundos que dura cada token. Si es cero o menos no se
+              guarda ninguno.
+        """
+
+        self.ttl = ttl
+
+        self.__cache = lru_cache.LRUCache(maxsize, ttl)
+        # Las consultas en curso de cada token
+        self.__pending = {}
+
+    def set_ttl(self, ttl: float, /) -> None:
+        """Ajusta los segundos que dura cada token y descarta los guardados"""
+
+        self.ttl = ttl
+        self.__cache.ttl = ttl
+
+        self.invalidate()
+
+    @property
+    def cache(self) -> "lru_cache.LRUCache":
+        return self.__cache
+
+    async def __fetch(self, pool, token_hash):
+        authorization = await pool.return_first_result("get_authorization", token_hash)
+
+        if (authorization is None):
+            return _NOT_FOUND
+
+        (services, expire) = authorization
+
+        try:
+            regex = re.compile(services)
+
+        except re.error as err:
+            logger.warning(_("La expresión regular de los servicios habilitados por un token no es válida: %s"), err)
+
+            return _NOT_FOUND
+
+        return Authorization(regex, expire)
+
+    async def get(self, pool: "dbConnector.UTeslaConnector", token_hash: str, /) -> Optional["Authorization"]:
+        """Obtiene lo que permite un token
+
+        Args:
+            pool:
+              La piscina de conexiones a la base de datos
+
+            token_hash:
+              El hash del token (ver `dbConnector.TokenCallback.token2hash()`)
+
+        Returns:
+            Lo que permite el token o **None** si no existe
+        """
+
+        authorization = self.__cache.get(token_hash)
+
+        if (authorization is None):
+            pending = self.__pending.get(token_hash)
+
+            if (pending is None):
+                pending = self.__pending[token_hash] = asyncio.ensure_future(
+                    self.__fetch(pool, token_hash)
+
+                )
+
+                pending.add_done_callback(
+                    lambda future: self.__done(token_hash, future)
+
+                )
+
+            authorization = await asyncio.shield(pending)
+
+        return authorization or None
+
+    def __done(self, token_hash, future):
+        if (self.__pending.get(token_hash) is future):
+            del self.__pending[token_hash]
+
+            # Si se invalidó mientras tanto, el resultado no se guarda
+            if not (future.cancelled()) and (future.exception() is None) and (self.ttl > 0):
+                self.__cache.set(token_hash, future.result())
+
+    def invalidate(self, token_hash: Optional[str] = None, /) -> None:
+        """Descarta un token o todos si no se especifica ``token_hash``"""
+
+        if (token_hash is None):
+            self.__cache.clear()
+            self.__pending.clear()
+
+        else:
+            self.__cache.delete(token_hash)
+            self.__pending.pop(token_hash, None)
+
+# La caché compartida por todas las conexiones del proceso
+shared = TokenCache()
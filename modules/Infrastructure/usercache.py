@@ -0,0 +1,131 @@
+import asyncio
+import inspect
+import logging
+
+from typing import Optional
+
+from modules.Infrastructure import options
+from utils.extra import lru_cache
+from utils.extra import create_translation
+
+_ = create_translation.create("usercache")
+logger = logging.getLogger(__name__)
+
+Identity = inspect.namedtuple(
+    "Identity", ("user", "userid", "is_guest_user")
+
+)
+
+# Los usuarios inexistentes también se guardan
+_NOT_FOUND = ()
+
+class UserCache:
+    """
+    Caché de la identidad de los usuarios
+
+    El nombre, el identificador y si es o no un usuario invitado se
+    obtienen con una sola consulta (``get_identity``) y se guardan en
+    memoria por el hash del usuario durante un tiempo limitado. Si varias
+    conexiones del mismo usuario llegan a la vez, sólo una consulta la base
+    de datos.
+
+    Las funciones que modifican a los usuarios (ver `dbConnector.UserCallback`)
+    la invalidan sólo en el mismo proceso: en los demás (UTeslaCLI o los
+    otros procesos de UTesla) un usuario eliminado sigue existiendo hasta
+    `ttl` segundos.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = options.USER_CACHE_SIZE,
+        ttl: float = options.USER_CACHE_TTL
+
+    ):
+        """
+        Args:
+            maxsize:
+              El número máximo de usuarios en memoria
+
+            ttl:
+              Los segundos que dura cada usuario. Si es cero o menos no se
+              guarda ninguno.
+        """
+
+        self.ttl = ttl
+
+        self.__cache = lru_cache.LRUCache(maxsize, ttl)
+        # Las consultas en curso de cada usuario
+        self.__pending = {}
+
+    def set_ttl(self, ttl: float, /) -> None:
+        """Ajusta los segundos que dura cada usuario y descarta los guardados"""
+
+        self.ttl = ttl
+        self.__cache.ttl = ttl
+
+        self.invalidate()
+
+    @property
+    def cache(self) -> "lru_cache.LRUCache":
+        return self.__cache
+
+    async def __fetch(self, pool, user_hash):
+        identity = await pool.return_first_result("get_identity", user_hash)
+
+        return _NOT_FOUND if (identity is None) else Identity(*identity)
+
+    async def get(self, pool: "dbConnector.UTeslaConnector", user_hash: str, /) -> Optional["Identity"]:
+        """Obtiene la identidad de un usuario
+
+        Args:
+            pool:
+              La piscina de conexiones a la base de datos
+
+            user_hash:
+              El hash del usuario (el usuario real en hexadecimal)
+
+        Returns:
+            La identidad o **None** si el usuario no existe
+        """
+
+        identity = self.__cache.get(user_hash)
+
+        if (identity is None):
+            pending = self.__pending.get(user_hash)
+
+            if (pending is None):
+                pending = self.__pending[user_hash] = asyncio.ensure_future(
+                    self.__fetch(pool, user_hash)
+
+                )
+
+                pending.add_done_callback(
+                    lambda future: self.__done(user_hash, future)
+
+                )
+
+            identity = await asyncio.shield(pending)
+
+        return identity or None
+
+    def __done(self, user_hash, future):
+        if (self.__pending.get(user_hash) is future):
+            del self.__pending[user_hash]
+
+            # Si se invalidó mientras tanto, el resultado no se guarda
+            if not (future.cancelled()) and (future.exception() is None) and (self.ttl > 0):
+                self.__cache.set(user_hash, future.result())
+
+    def invalidate(self, user_hash: Optional[str] = None, /) -> None:
+        """Descarta un usuario o todos si no se especifica ``user_hash``"""
+
+        if (user_hash is None):
+            self.__cache.clear()
+            self.__pending.clear()
+
+        else:
+            self.__cache.delete(user_hash)
+            self.__pending.pop(user_hash, None)
+
+# La caché compartida por todas las conexiones del proceso
+shared = UserCache()
@@ -1,4 +1,3 @@
-import re
 import time
 import copy
 import logging
@@ -6,21 +5,32 @@ import inspect
 import hashlib
 import binascii
 import asyncio
+import struct
+import functools
 
-from typing import Any, Optional, Dict, Tuple, NoReturn, Union, Callable
+from typing import Any, Optional, Dict, Tuple, NoReturn, Union, Callable, Awaitable, Iterable, AsyncIterator
 
 from modules.Infrastructure import errno
+from modules.Infrastructure import exceptions
 from modules.Infrastructure import parse
 from modules.Infrastructure import options
+from modules.Infrastructure import resumption
+from modules.Infrastructure import tokencache
 from modules.Crypt import x25519_xsalsa20_poly1305MAC, ed25519
+from utils.Crypt import options as crypt_options
 from utils.extra import counter
-from utils.extra import parse_args
 from utils.extra import create_translation
 
-from config import defaults
-
 _ = create_translation.create("utils")
 
+@functools.lru_cache(maxsize=options.TOKEN_CACHE_SIZE)
+def _token_hash(token):
+    # Una sesión envía el mismo token en cada petición
+    return hashlib.sha3_256(
+        binascii.unhexlify(token)
+
+    ).hexdigest()
+
 class MainHeaders:
     """Crea y administra los encabezados"""
 
@@ -188,6 +198,9 @@ class Request(MainParameters):
         
         is_packed:
           Usar o no `msgpack`
+
+        stream:
+          **True** cuando el cuerpo se transmite en fragmentos
         
         is_guest_user:
           **True** cuando sea un usuario invitado; **False** cuando no.
@@ -210,7 +223,8 @@ class Request(MainParameters):
         address: tuple = (),
         node: tuple = (),
         is_packed: bool = True,
-        is_guest_user: bool = True
+        is_guest_user: bool = True,
+        stream: bool = False
 
     ):
         super().__init__()
@@ -227,6 +241,7 @@ class Request(MainParameters):
         self.force = force
         self.node = node
         self.is_packed = is_packed
+        self.stream = stream
         self.is_guest_user = is_guest_user
         self.address = address
         self.__user_length = options.USER_LENGTH
@@ -351,10 +366,7 @@ class Request(MainParameters):
         self.__token = token
 
         if (token is not None):
-            self.__token_hash = hashlib.sha3_256(
-                binascii.unhexlify(token)
-                    
-            ).hexdigest()
+            self.__token_hash = _token_hash(token)
 
         else:
             self.__token_hash = None
@@ -422,6 +434,14 @@ class Request(MainParameters):
     @is_packed.setter
     def is_packed(self, v: bool, /) -> None:
         self.__is_packed = self.__parse_bool(v)
+
+    @property
+    def stream(self) -> bool:
+        return self.__stream
+
+    @stream.setter
+    def stream(self, v: bool, /) -> None:
+        self.__stream = self.__parse_bool(v)
     
     @property
     def address(self) -> tuple:
@@ -431,7 +451,88 @@ class Request(MainParameters):
     def address(self, address: tuple, /) -> None:
         self.__address = self.__parse_address(address)
 
+class StreamReader(object):
+    """Lee un cuerpo transmitido en fragmentos
+
+    Cada fragmento es un marco cifrado y firmado por separado que comienza
+    con su índice (usando `options.LENGTH_FORMAT`). El final se indica con
+    un marco que solo contiene el índice, por lo que también es autenticado.
+    """
+
+    def __init__(self, read_function: Callable[[], Awaitable[bytes]]):
+        """
+        Args:
+            read_function:
+              La corutina que lee (y descifra) el siguiente marco
+        """
+
+        self.__read_function = read_function
+        self.__index = 0
+        self.__finished = False
+        self.__index_struct = struct.Struct(options.LENGTH_FORMAT)
+
+    @property
+    def finished(self) -> bool:
+        return self.__finished
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> bytes:
+        if (self.__finished):
+            raise StopAsyncIteration
+
+        data = await self.__read_function()
+        index_size = self.__index_struct.size
+
+        if (len(data) < index_size):
+            raise exceptions.InvalidRequest(_("Fragmento inválido"))
+
+        (index,) = self.__index_struct.unpack_from(data)
+
+        if (index != self.__index):
+            raise exceptions.InvalidRequest(_("Fragmento fuera de orden"))
+
+        self.__index += 1
+
+        if (len(data) == index_size):
+            self.__finished = True
+
+            raise StopAsyncIteration
+
+        return data[index_size:]
+
+    async def drain(self) -> None:
+        """Descarta los fragmentos que no se hayan leído"""
+
+        async for _ in self:
+            pass
+
+def _sizeof(data):
+    # Los objetos que serán serializados con msgpack no tienen un tamaño
+    # conocido hasta serializarlos, por lo que se procesan en el bucle.
+    if (isinstance(data, (bytes, bytearray, memoryview, str))):
+        return len(data)
+
+    return 0
+
+async def _iterate_chunks(chunks):
+    if (isinstance(chunks, (bytes, bytearray, memoryview))):
+        yield chunks
+
+    elif (hasattr(chunks, "__aiter__")):
+        async for chunk in chunks:
+            yield chunk
+
+    else:
+        for chunk in chunks:
+            yield chunk
+
 class MainCalls(MainParameters):
+    # **True** en el extremo que inicia la sesión. Sin firma, cada dirección
+    # usa una clave diferente.
+    INITIATOR = False
+
     def __init__(
         self,
         stream: "tornado.iostream.IOStream",
@@ -440,7 +541,10 @@ class MainCalls(MainParameters):
         user_data: str = options.USER_DATA,
         request: Optional["Request()"] = None,
         end_chunk: int = options.END_CHUNK,
-        user_length: int = options.USER_LENGTH
+        user_length: int = options.USER_LENGTH,
+        stream_chunk_size: int = options.STREAM_CHUNK_SIZE,
+        crypt_executor: Optional["concurrent.futures.Executor"] = None,
+        crypt_threshold: int = options.CRYPT_THRESHOLD
         
     ):
         super().__init__()
@@ -456,11 +560,22 @@ class MainCalls(MainParameters):
         self.parse = None
         self.init_path = init_path
         self.user_data = user_data
+        self.stream_chunk_size = stream_chunk_size
+        # Los marcos más grandes que `crypt_threshold` se cifran, descifran
+        # y (des)serializan fuera del bucle de eventos.
+        self.crypt_executor = crypt_executor
+        self.crypt_threshold = crypt_threshold
         self.__end_length = len(self.end_chunk) # útil para eliminar el separador en los datos recibidos
+        # Por compatibilidad se usa el delimitador hasta que ambas partes
+        # acuerden otro modo de enmarcado.
+        self.__framing = options.FRAMING_DELIMITER
+        self.__length_struct = struct.Struct(options.LENGTH_FORMAT)
         # Las claves Curve25519
         self.__keys = None
         # Usado por ambas partes para compartir la clave pública
         self.__shared = True
+        # Las respuestas de peticiones simultáneas no deben mezclar sus marcos
+        self.__write_lock = asyncio.Lock()
 
     async def write_status(
         self,
@@ -479,354 +594,419 @@ class MainCalls(MainParameters):
 
         await self.write(message, *args, **kwargs)
 
-    async def write(self, *args, **kwargs) -> None:
-        raise NotImplementedError()
+    async def write(self, data: Any, headers: Optional[dict] = None, *args, **kwargs) -> None:
+        self.check_not_defined_session()
 
-    async def recv_data(self, size: int, *, timeout: Optional[int] = None) -> Any:
-        fut = self.stream.read_until(self.end_chunk, size + self.__end_length)
+        if (headers is None):
+            headers = self.headers
 
-        if (timeout is None) or (timeout <= 0):
-            result = await fut
+        # Los encabezados y el cuerpo se encolan juntos para enviarlos
+        # en una sola escritura.
+        buffers = self.frame(self._encode(headers))
 
-        else:
-            result = await asyncio.wait_for(
-                fut, timeout
+        self._sent_headers(headers)
 
-            )
+        buffers.extend(
+            self.frame(await self.offload(_sizeof(data), self._encode, data, *args, **kwargs))
 
-        return result[:self.__end_length * -1]
+        )
 
-    async def write_data(self, data: Any) -> None:
-        await self.stream.write(data + self.end_chunk)
+        async with self.__write_lock:
+            await self.write_buffers(buffers)
 
-    def generate_ecdh_keys(self, *, replace: bool = False) -> None:
-        if (self.__keys is not None) and not (replace):
-            return
+    async def offload(self, size: int, function: Callable[..., Any], /, *args, **kwargs) -> Any:
+        """Ejecuta ``function`` en `crypt_executor` si ``size`` lo amerita
 
-        self.__keys = x25519_xsalsa20_poly1305MAC.to_raw()
+        Los datos pequeños se procesan en el bucle de eventos, ya que
+        enviarlos a otro hilo es más costoso que procesarlos.
 
-    def set_session(self, key: bytes, /) -> None:
-        self.generate_ecdh_keys()
-        session = x25519_xsalsa20_poly1305MAC.InitSession(key, self.__keys.private)
-        self.parse = parse.Parser(
-            session,
-            self.keypair.private,
-            self.init_path,
-            self.user_data
-            
-        )
+        Args:
+            size:
+              El tamaño de los datos que procesará ``function``
 
-    def check_not_defined_session(self) -> NoReturn:
-        if (self.parse is None) or (self.__keys is None):
-            raise RuntimeError(_("Es necesario definir la sesión"))
+            function:
+              La función a ejecutar
 
-    async def shareKey(self, signingKey: Optional[bytes] = None) -> None:
-        if (self.__shared):
-            self.__shared = False
+        Returns:
+            El resultado de ``function``
+        """
 
-            self.generate_ecdh_keys()
+        if (self.crypt_executor is None) or (size < self.crypt_threshold):
+            return function(*args, **kwargs)
 
-            if (signingKey is None):
-                signingKey = self.keypair.private
+        return await asyncio.get_running_loop().run_in_executor(
+            self.crypt_executor, functools.partial(function, *args, **kwargs)
 
-            await self.write_data(
-                ed25519.sign(signingKey, self.__keys.public)
-                    
-            )
+        )
 
-class MainClient(MainCalls):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+    def _encode(self, *args, **kwargs) -> bytes:
+        raise NotImplementedError()
 
-        # Usado por el cliente para enviar el nombre de usuario al servidor
-        self.__initial = True
+    def _sent_headers(self, headers: dict, /) -> None:
+        pass
 
-    async def shareUsername(self, real_user: Optional[bytes] = None) -> None:
-        if (self.__initial):
-            self.__initial = False
+    async def write_stream(
+        self,
+        chunks: Union[bytes, Iterable[bytes], AsyncIterator[bytes]],
+        headers: Optional[dict] = None,
+        *, chunk_size: Optional[int] = None
 
-            if (real_user is None):
-                real_user = self.request.real_user
+    ) -> None:
+        """Envía el cuerpo en fragmentos autenticados de forma independiente
 
-            await self.write_data(real_user)
+        Args:
+            chunks:
+              Los datos, un iterador o un iterador asincrónico con los datos
+
+            headers:
+              Los encabezados. Si no se especifican, se usan los actuales.
+
+            chunk_size:
+              El tamaño máximo de cada fragmento. Si no se especifica, se usa
+              `stream_chunk_size`.
+        """
 
-    async def write(self, data: Any, headers: Optional[dict] = None, *args, **kwargs) -> None:
         self.check_not_defined_session()
 
         if (headers is None):
             headers = self.headers
 
-        await self.write_data(
-            self.parse.build(headers)
-                
-        )
+        if (chunk_size is None):
+            chunk_size = self.stream_chunk_size
 
-        await self.write_data(
-            self.parse.build(data, *args, **kwargs)
-                
-        )
+        # Se usa una copia para que los siguientes encabezados no
+        # indiquen una transmisión por fragmentos.
+        headers = dict(headers)
+        headers["stream"] = True
 
-    async def read(self, verifyKey: bytes, size: int, *args, timeout: Optional[int] = None, **kwargs) -> Any:
-        self.check_not_defined_session()
+        # Los fragmentos deben ir seguidos, por lo que ninguna otra
+        # respuesta se escribe hasta terminar la transmisión.
+        async with self.__write_lock:
+            await self.write_data(
+                self._encode(headers)
 
-        return self.parse.get_message(
-                    await self.recv_data(size, timeout=timeout),
-                    verifyKey,
-                    *args, **kwargs
+            )
 
-               )
+            self._sent_headers(headers)
 
-class MainServer(MainCalls):
-    async def read(self, size: int, *args, timeout: Optional[int] = None, **kwargs) -> Any:
-        self.check_not_defined_session()
+            index = 0
 
-        return await self.parse.destroy(
-                   await self.recv_data(size, timeout=timeout),
-                   self.request.real_user,
-                   *args, **kwargs
+            async for chunk in _iterate_chunks(chunks):
+                for offset in range(0, len(chunk), chunk_size):
+                    data = self.__length_struct.pack(index) + chunk[offset:offset + chunk_size]
 
-               )
+                    await self.write_data(
+                        await self.offload(len(data), self._encode, data, is_packed=False)
 
-    async def write(self, data: Any, headers: Optional[dict] = None, *args, **kwargs) -> None: 
-        self.check_not_defined_session()
+                    )
 
-        if (headers is None):
-            headers = self.headers
+                    index += 1
 
-        await self.write_data(
-            self.parse.reply(headers)
+            # El final de la transmisión
+            await self.write_data(
+                self._encode(self.__length_struct.pack(index), is_packed=False)
 
-        )
+            )
 
-        await self.write_data(
-            self.parse.reply(data, *args, **kwargs)
-                
-        )
+    @property
+    def framing(self) -> str:
+        return self.__framing
 
-def is_support_method(handler: object, action: str, path: str) -> Optional[bool]:
-    if not (hasattr(handler, defaults.supported_methods_name)):
-        logging.error(_("¡El servicio '%s' no tiene métodos habilitados!"), path)
-        return False
+    def set_framing(self, framing: str, /) -> None:
+        if not (framing in options.FRAMING_MODES):
+            raise ValueError(_("Modo de enmarcado inválido: {}").format(framing))
 
-    supported_methods = getattr(
-        handler, defaults.supported_methods_name
+        self.__framing = framing
 
-    )
+    def apply_negotiation(self, headers: dict, /) -> None:
+        """Aplica los modos acordados en los encabezados
 
-    if (isinstance(supported_methods, (list, tuple))):
-        is_supported = action in supported_methods
+        Ambas partes la llaman con los mismos encabezados y en el mismo punto
+        del flujo: justo después del marco de los encabezados, por lo que el
+        cambio surte efecto desde el marco del cuerpo.
+        """
 
-    elif (isinstance(supported_methods, str)):
-        is_supported = action == supported_methods
+        if not (isinstance(headers, dict)):
+            return
 
-    else:
-        logging.error(_(
-            "El tipo de dato de la propiedad que indica qué "
-            "métodos están habilitados no es válida en el "
-            "servicio '%s'"),
-            path
-            
-        )
-        return False
+        framing = headers.get("framing")
 
-    if (hasattr(handler, action)) and (is_supported):
-        return True
+        if (framing in options.FRAMING_MODES) and (framing != self.__framing):
+            self.set_framing(framing)
 
-    else:
-        logging.warning(_(
-            "La acción '%s' no existe o no está habilitada en el "
-            "servicio '%s'"),
-            action, path
-            
-        )
+        signature = headers.get("signature")
 
-        return False
+        if (signature in crypt_options.SIGNATURE_MODES) and (self.parse is not None):
+            self.parse.context.set_signature(signature)
 
-def is_allowed(handler: object, path: str) -> object:
-    # Es opcional esta propiedad. Por defecto se creerá que el administrador lo desea.
-    if not (hasattr(handler, defaults.is_allow_methods_name)):
-        return True
+        cipher = headers.get("cipher")
 
-    val = getattr(handler, defaults.is_allow_methods_name)
+        if (cipher in crypt_options.CIPHER_MODES) and (self.parse is not None):
+            self.parse.context.set_cipher(cipher)
 
-    if (isinstance(val, (int, bool))):
-        return val
+    def changes_negotiation(self, headers: dict, /) -> bool:
+        """Indica si `apply_negotiation()` cambiaría algún modo con ``headers``
 
-    else:
-        logging.warning(_(
-            "El tipo de dato de la propiedad que indica si está o no "
-            "habilitado el servicio no es válido para '%s'"),
-            path
-            
-        )
+        Los modos no deben cambiar mientras haya respuestas pendientes, ya
+        que se leerían con un modo diferente al que se usó para escribirlas.
+        """
 
-        return True
+        if not (isinstance(headers, dict)):
+            return False
 
-def is_token_required(handler: object, action: str, path: str) -> bool:
-    if not (hasattr(handler, defaults.is_token_required_methods_name)):
-        return True
+        framing = headers.get("framing")
 
-    val = getattr(handler, defaults.is_token_required_methods_name)
-    
-    if (isinstance(val, (list, tuple))):
-        token_required = not action in val
+        if (framing in options.FRAMING_MODES) and (framing != self.__framing):
+            return True
 
-    elif (isinstance(val, str)):
-        token_required = action != val
+        if (self.parse is None):
+            return False
 
-    else:
-        logging.warning(_(
-            "El tipo de dato de la propiedad que indica qué métodos "
-            "requieren de un token no es es válida en el servicio '%s'"),
-            path
-            
-        )
-        
-        return True
+        signature = headers.get("signature")
+        cipher = headers.get("cipher")
 
-    return token_required
+        return ((signature in crypt_options.SIGNATURE_MODES) and (signature != self.parse.context.signature)) or \
+               ((cipher in crypt_options.CIPHER_MODES) and (cipher != self.parse.context.cipher))
 
-async def is_service_allowed(token: str, pool: object, path: str) -> bool:
-    if (path != "/") and (path[:1] == "/"):
-        path = path[1:]
+    async def __recv_length(self, size):
+        header = await self.stream.read_bytes(self.__length_struct.size)
+        (length,) = self.__length_struct.unpack(header)
 
-    regex = await pool.return_first_result("get_services_allowed", token)
+        if (length > size):
+            raise exceptions.LimitsExceeded(
+                _("El tamaño de los datos ({}) excede el límite permitido ({})").format(length, size)
 
-    if (regex is None):
-        logging.warning(_(
-            "No se pudo obtener la expresión regular que "
-            "indica si está o no habilitado este servicio "
-            "para el token usado en esta sesión."
-            
-        ))
+            )
 
-        return False
+        return await self.stream.read_bytes(length)
 
-    else:
-        (regex,) = regex
+    async def __recv_delimiter(self, size):
+        result = await self.stream.read_until(self.end_chunk, size + self.__end_length)
 
-    if (re.match(regex, path)):
-        return True
+        return result[:self.__end_length * -1]
 
-    else:
-        return False
+    async def recv_data(self, size: int, *, timeout: Optional[int] = None) -> Any:
+        if (self.__framing == options.FRAMING_LENGTH):
+            fut = self.__recv_length(size)
 
-def _has_params(handler, *, keyword_only=False, return_count=False):
-    inspection = parse_args.parse(handler)
+        else:
+            fut = self.__recv_delimiter(size)
 
-    len_args = len(inspection[parse_args.KEYWORD_ONLY])
+        if (timeout is None) or (timeout <= 0):
+            result = await fut
 
-    if not (keyword_only):
-        len_args += len(inspection[parse_args.POSITIONAL_ONLY])
-        len_args += len(inspection[parse_args.POSITIONAL_OR_KEYWORD])
+        else:
+            result = await asyncio.wait_for(
+                fut, timeout
 
-    if (return_count):
-        return len_args
+            )
 
-    else:
-        return len_args > 0
+        return result
 
-def get_initializer(handler: object) -> Callable[[], None]:
-    if not (hasattr(handler, defaults.initializer_methods_name)):
-        return
+    def frame(self, data: Any, /) -> list:
+        """Enmarca los datos según el modo actual
 
-    initializer = getattr(handler, defaults.initializer_methods_name)
+        Args:
+            data:
+              Los datos a enmarcar o una lista de búferes que forman un
+              solo marco (p.ej. la firma separada y el mensaje cifrado)
 
-    if not (callable(initializer)):
-        logging.warning(_("¡El inicializador debe poder ser llamado!"))
-        
-        return
+        Returns:
+            Una lista de búferes que no requiere copiar ``data``
+        """
+
+        if (isinstance(data, (list, tuple))):
+            buffers = list(data)
+
+        else:
+            buffers = [data]
+
+        if (self.__framing == options.FRAMING_LENGTH):
+            return [self.__length_struct.pack(sum(len(x) for x in buffers))] + buffers
+
+        else:
+            return buffers + [self.end_chunk]
+
+    async def write_buffers(self, buffers: list) -> None:
+        """Escribe varios búferes sin concatenarlos
+
+        Los búferes pequeños se agrupan en uno solo para reducir las
+        escrituras, mientras que los grandes se pasan como `memoryview`.
+        Solo se espera a que se vacíe el último, ya que el flujo conserva
+        el orden.
+        """
+
+        pieces = []
+        pending = bytearray()
+
+        for buffer in buffers:
+            if (len(buffer) < options.WRITE_COALESCE_SIZE):
+                pending += buffer
+
+            else:
+                if (pending):
+                    pieces.append(pending)
+                    pending = bytearray()
+
+                pieces.append(memoryview(buffer))
+
+        if (pending):
+            pieces.append(pending)
 
-    if (_has_params(initializer)):
-        logging.warning(_("El inicializador no debe llevar argumentos"))
+        fut = None
 
-        return
+        for piece in pieces:
+            fut = self.stream.write(piece)
 
-    return initializer
+        if (fut is not None):
+            await fut
 
-def is_admin(handler: object) -> bool:
-    if not (hasattr(handler, defaults.access_method)) or \
-       not (hasattr(handler, defaults.remote_method)):
-        logging.warning(
-            _("El servicio administrativo debe tener un método llamado '%s' y uno llamado '%s'"),
-            defaults.access_method, defaults.remote_method
+    async def write_data(self, data: Any) -> None:
+        await self.write_buffers(self.frame(data))
+
+    def generate_ecdh_keys(self, *, replace: bool = False) -> None:
+        if (self.__keys is not None) and not (replace):
+            return
+
+        self.__keys = x25519_xsalsa20_poly1305MAC.to_raw()
+
+    def set_session(self, key: bytes, /, verify_key: Optional[bytes] = None) -> None:
+        self.generate_ecdh_keys()
+        # La multiplicación escalar X25519 se realiza solo aquí; el contexto
+        # criptográfico del analizador la reutiliza en cada mensaje.
+        session = x25519_xsalsa20_poly1305MAC.InitSession(key, self.__keys.private)
+        self.parse = parse.Parser(
+            session,
+            self.keypair.private,
+            self.init_path,
+            self.user_data,
+            verify_key,
+            initiator=self.INITIATOR
             
         )
 
-        return False
+    def set_shared_session(self, shared_key: bytes, /, verify_key: Optional[bytes] = None) -> None:
+        """Ajusta la sesión desde una clave compartida ya acordada
 
-    handler_access = getattr(handler, defaults.access_method)
-    handler_remote = getattr(handler, defaults.remote_method)
+        No se generan claves Curve25519 ni se comparten, por lo que se
+        usa al reanudar una sesión.
+        """
+
+        # Así `shareKey()` no envía una clave que nadie espera
+        self.__shared = False
+
+        self.parse = parse.Parser(
+            x25519_xsalsa20_poly1305MAC.SharedSession(shared_key),
+            self.keypair.private,
+            self.init_path,
+            self.user_data,
+            verify_key,
+            initiator=self.INITIATOR
 
-    if not (callable(handler_access)) or not (callable(handler_remote)):
-        logging.warning(
-            _("¡Tanto el método '%s' como '%s' deben poder ser llamados!"),
-            defaults.access_method,
-            defaults.remote_method
-                
         )
 
-        return False
+    @property
+    def resumption_secret(self) -> bytes:
+        """El secreto para reanudar la sesión actual"""
 
-    # Para ahorrar código usando el operador ternario
-    len_access_args = _has_params(handler_access)
+        self.check_not_defined_session()
 
-    if (len_access_args) or (_has_params(handler_remote)):
-        logging.warning(
-            _("El método '%s' del servicio administrativo no debe recibir ni argumentos ni argumentos clave"),
-            defaults.access_method if (len_access_args) else \
-            defaults.remote_method
-            
-        )
+        return resumption.derive_secret(self.parse.session.shared_key)
 
-        return False
+    def check_not_defined_session(self) -> NoReturn:
+        if (self.parse is None):
+            raise RuntimeError(_("Es necesario definir la sesión"))
 
-    return True
+    async def shareKey(self, signingKey: Optional[bytes] = None) -> None:
+        if (self.__shared):
+            self.__shared = False
 
-def set_controller(handler: object, controller: "RequestController()", path: Optional[str] = None) -> object:
-    if (path is None):
-        service = _("administrativo")
+            self.generate_ecdh_keys()
 
-    else:
-        service = "'%s'" % path
+            if (signingKey is None):
+                signingKey = self.keypair.private
+
+            await self.write_data(
+                ed25519.sign(signingKey, self.__keys.public)
+                    
+            )
 
-    if not (hasattr(handler, defaults.set_controller_methods_name)):
-        logging.warning(_("El servicio %s no tiene un método para ajustar los datos"), path)
+class MainClient(MainCalls):
+    INITIATOR = True
 
-        return
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
 
-    handler_controller = getattr(handler, defaults.set_controller_methods_name)
+        # Usado por el cliente para enviar el nombre de usuario al servidor
+        self.__initial = True
+
+    async def shareUsername(self, real_user: Optional[bytes] = None) -> None:
+        if (self.__initial):
+            self.__initial = False
+
+            if (real_user is None):
+                real_user = self.request.real_user
+
+            await self.write_data(real_user)
+
+    def _encode(self, *args, **kwargs) -> bytes:
+        return self.parse.build(*args, **kwargs)
+
+    def _sent_headers(self, headers: dict, /) -> None:
+        self.apply_negotiation(headers)
+
+    async def read(self, verifyKey: bytes, size: int, *args, timeout: Optional[int] = None, **kwargs) -> Any:
+        self.check_not_defined_session()
+
+        data = await self.recv_data(size, timeout=timeout)
+
+        return await self.offload(
+            len(data), self.parse.get_message, data, verifyKey, *args, **kwargs
 
-    if not (callable(handler_controller)):
-        logging.warning(
-            _("¡El método '%s' del servicio %s no se puede llamar!"),
-            defaults.set_controller_methods_name, service
-            
         )
 
-        return
+class MainServer(MainCalls):
+    async def read(self, size: int, *args, timeout: Optional[int] = None, **kwargs) -> Any:
+        self.check_not_defined_session()
+
+        data = await self.recv_data(size, timeout=timeout)
+
+        if (self.crypt_executor is None) or (len(data) < self.crypt_threshold):
+            return await self.parse.destroy(data, self.request.real_user, *args, **kwargs)
+
+        # La clave se obtiene en el bucle de eventos y solo el descifrado
+        # se realiza en otro hilo.
+        return await self.offload(
+            len(data),
+            self.parse.get_message,
+            data,
+            await self.parse.get_verify_key(self.request.real_user),
+            *args, **kwargs
 
-    if (_has_params(handler_controller, keyword_only=True)):
-        logging.warning(
-            _("El método '%s' del servicio %s no puede recibir argumentos clave"),
-            defaults.set_controller_methods_name,
-            service
-                
         )
 
-        return
+    def _encode(self, *args, **kwargs) -> bytes:
+        return self.parse.reply(*args, **kwargs)
+
+async def is_service_allowed(token: str, pool: object, path: str) -> bool:
+    if (path != "/") and (path[:1] == "/"):
+        path = path[1:]
+
+    # La expresión regular ya compilada y la fecha de expiración se guardan
+    # en memoria, por lo que sólo se consulta la base de datos una vez.
+    authorization = await tokencache.shared.get(pool, token)
 
-    if (_has_params(handler_controller, return_count=True) != 1):
-        logging.warning(
-            _("El método '%s' del servicio %s debe recibir un argumento"),
-            defaults.set_controller_methods_name,
-            service
+    if (authorization is None):
+        logging.warning(_(
+            "No se pudo obtener la expresión regular que "
+            "indica si está o no habilitado este servicio "
+            "para el token usado en esta sesión."
             
-        )
+        ))
 
-        return
+        return False
 
-    handler_controller(controller)
+    return authorization.allows(path)
 
 class Templates:
     def __init__(
@@ -1,8 +1,250 @@
 import msgpack
+import nacl.signing
+import nacl.exceptions
+
+from typing import Optional, Union, List
 
 from modules.Crypt import x25519_xsalsa20_poly1305MAC
 from modules.Crypt import ed25519
+from modules.Crypt import aead
 from utils.Crypt import options
+from utils.extra import create_translation
+
+_ = create_translation.create("hibrid")
+
+class Context(object):
+    """Contexto criptográfico de una sesión
+
+    Mantiene la caja ECDH (con la clave compartida precalculada), la clave
+    para firmar y la clave de verificación del otro extremo, para que no
+    tengan que ser creadas nuevamente por cada mensaje cifrado o descifrado.
+
+    Sin firma (`options.SIGNATURE_AEAD`) cada dirección usa una clave
+    derivada diferente, por lo que ``initiator`` debe ser **True** en el
+    cliente y **False** en el servidor.
+    """
+
+    def __init__(
+        self,
+        session: "x25519_xsalsa20_poly1305MAC.InitSession",
+        signingKey: Optional[bytes] = None,
+        verifyKey: Optional[bytes] = None,
+        signature: str = options.SIGNATURE_ATTACHED,
+        initiator: bool = False
+
+    ):
+        """
+        Args:
+            session:
+              La sesión ECDH
+
+            signingKey:
+              La clave para firmar
+
+            verifyKey:
+              La clave de verificación del otro extremo
+
+            signature:
+              El formato de la firma. Véase `options.SIGNATURE_MODES`.
+
+            initiator:
+              **True** si es el extremo que inició la sesión (el cliente)
+        """
+
+        self.session = session
+
+        self._signing = None
+        self._signing_raw = signingKey
+        self._verify = None
+        self._verify_raw = None
+        self._detached = None
+        self._cipher = session
+        self._cipher_name = options.CIPHER_XSALSA20_POLY1305
+        # Los algoritmos para cifrar y descifrar sin firma
+        self._directional = None
+
+        if (initiator):
+            self._directions = (options.DIRECTION_CLIENT, options.DIRECTION_SERVER)
+
+        else:
+            self._directions = (options.DIRECTION_SERVER, options.DIRECTION_CLIENT)
+
+        if (signingKey is not None):
+            self._signing = nacl.signing.SigningKey(signingKey)
+
+        if (verifyKey is not None):
+            self.set_verify_key(verifyKey)
+
+        self.set_signature(signature)
+
+    @property
+    def signature(self) -> str:
+        return self._signature
+
+    def set_signature(self, signature: str, /) -> None:
+        """Ajusta el formato de la firma de los siguientes mensajes"""
+
+        if not (signature in options.SIGNATURE_MODES):
+            raise ValueError(_("Formato de firma inválido: {}").format(signature))
+
+        self._signature = signature
+
+    @property
+    def cipher(self) -> str:
+        return self._cipher_name
+
+    def set_cipher(self, cipher: str, /) -> None:
+        """Ajusta el algoritmo de cifrado de los siguientes mensajes
+
+        Los algoritmos diferentes al de la sesión usan una clave derivada
+        de la clave compartida, por lo que ambas partes la obtienen sin
+        intercambiar nada más.
+        """
+
+        if not (cipher in options.CIPHER_MODES):
+            raise ValueError(_("Algoritmo de cifrado inválido: {}").format(cipher))
+
+        if (cipher == self._cipher_name):
+            return
+
+        if (cipher == options.CIPHER_XSALSA20_POLY1305):
+            self._cipher = self.session
+
+        else:
+            self._cipher = aead.new(cipher, self.session.shared_key)
+
+        self._cipher_name = cipher
+        self._directional = None
+
+    def __get_directional(self):
+        if (self._directional is None):
+            self._directional = tuple(
+                aead.new(self._cipher_name, self.session.shared_key, direction)
+                for direction in self._directions
+
+            )
+
+        return self._directional
+
+    def __get_detached(self):
+        if (self._detached is None):
+            self._detached = ed25519.import_detached(self._verify_raw, self._signing_raw)
+
+        return self._detached
+
+    def set_verify_key(self, verifyKey: bytes, /) -> "nacl.signing.VerifyKey":
+        """Ajusta la clave de verificación
+
+        Si es la misma que la ya ajustada, se reutiliza el objeto existente.
+        """
+
+        if (verifyKey != self._verify_raw):
+            self._verify = nacl.signing.VerifyKey(verifyKey)
+            self._verify_raw = verifyKey
+            self._detached = None
+
+        return self._verify
+
+    def encrypt(self, data: bytes, is_packed: bool = options.IS_PACKED) -> Union[bytes, List[bytes]]:
+        """Cifra y firma un mensaje
+
+        Args:
+            data:
+              Los datos a cifrar
+
+            is_packed:
+              Usar o no `msgpack`
+
+        Returns:
+            Los datos cifrados y firmados. Si la firma es separada, se retorna
+            una lista con la firma y el mensaje cifrado para que se escriban
+            sin concatenarlos.
+        """
+
+        if (is_packed):
+            data = msgpack.dumps(data)
+
+        # El mensaje solo es autenticado por el cifrado con la clave de
+        # esta dirección
+        if (self._signature == options.SIGNATURE_AEAD):
+            return self.__get_directional()[0].encrypt(data)
+
+        encrypted = self._cipher.encrypt(data)
+
+        if (self._signing is None):
+            raise RuntimeError(_("La clave para firmar no está definida"))
+
+        if (self._signature == options.SIGNATURE_DETACHED):
+            return [ed25519.sign_detached(self.__get_detached().private, encrypted), encrypted]
+
+        return self._signing.sign(encrypted)
+
+    def decrypt(
+        self,
+        data: bytes,
+        verifyKey: Optional[bytes] = None,
+        is_packed: bool = options.IS_PACKED
+
+    ) -> bytes:
+        """Descifra y verifica el mensaje
+
+        Args:
+            data:
+              Los datos a descifrar
+
+            verifyKey:
+              La clave de verificación. Si no se especifica, se usa
+              la ajustada anteriormente.
+
+            is_packed:
+              Usar o no `msgpack`
+
+        Returns:
+            Los datos verificados y descifrados
+        """
+
+        if (verifyKey is not None):
+            verify = self.set_verify_key(verifyKey)
+
+        else:
+            verify = self._verify
+
+        if (self._signature == options.SIGNATURE_AEAD):
+            result = self.__get_directional()[1].decrypt(data)
+
+        elif (verify is None):
+            raise RuntimeError(_("La clave de verificación no está definida"))
+
+        elif (self._signature == options.SIGNATURE_DETACHED):
+            result = self.__open_detached(data)
+
+        else:
+            result = self._cipher.decrypt(verify.verify(data))
+
+        if (is_packed):
+            return msgpack.loads(result)
+
+        else:
+            return result
+
+    def __open_detached(self, data):
+        signature_size = options.SIGNATURE_SIZE
+        nonce_size = signature_size + self._cipher.NONCE_SIZE
+
+        if (len(data) < nonce_size):
+            raise nacl.exceptions.BadSignatureError(_("El mensaje es demasiado corto"))
+
+        view = memoryview(data)
+
+        # La firma se verifica sobre el mensaje cifrado sin copiarlo
+        ed25519.verify_detached(
+            self.__get_detached().public, view[:signature_size], view[signature_size:]
+
+        )
+
+        # El nonce se pasa por separado para que la caja no tenga que
+        # volver a dividir (y copiar) el mensaje cifrado.
+        return self._cipher.decrypt(data[nonce_size:], data[signature_size:nonce_size])
 
 def encrypt(
     signingKey: bytes,
@@ -13,7 +255,7 @@ def encrypt(
 
 ) -> bytes:
     """Cifra y firma un mensaje
-    
+
     Args:
         signingKey:
           La clave para firmar
@@ -38,7 +280,7 @@ def encrypt(
 
     return ed25519.sign(signingKey, scheme.encrypt(
         data if not (is_packed) else msgpack.dumps(data)
-        
+
     ))
 
 def decrypt(
@@ -69,7 +311,7 @@ def decrypt(
     """
 
     scheme = x25519_xsalsa20_poly1305MAC.InitSession(publicKey, secretKey)
-    
+
     result = scheme.decrypt(ed25519.verify(verifyKey, data))
 
     if (is_packed):
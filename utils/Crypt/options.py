@@ -5,3 +5,30 @@ CHUNK_SIZE = 2**20*10
 
 # **True** para usar msgpack por defecto o **False** para no usarlo
 IS_PACKED = True
+
+# Los formatos de la firma de cada mensaje. La firma adjunta es la que
+# genera `nacl.signing` (firma + mensaje) y la separada envía la firma
+# de 64 bytes delante del mensaje cifrado sin concatenarlos.
+#
+# Con `SIGNATURE_AEAD` no se firma cada mensaje: las claves efímeras ya
+# fueron firmadas con las claves Ed25519 durante el intercambio, por lo
+# que la autenticación del cifrado es suficiente. Cada dirección usa su
+# propia clave (véase `DIRECTION_CLIENT` y `DIRECTION_SERVER`) para que un
+# mensaje no pueda reenviarse a quien lo cifró.
+SIGNATURE_ATTACHED = "attached"
+SIGNATURE_DETACHED = "detached"
+SIGNATURE_AEAD     = "aead"
+SIGNATURE_MODES = (SIGNATURE_ATTACHED, SIGNATURE_DETACHED, SIGNATURE_AEAD)
+SIGNATURE_SIZE = 64
+
+# Las etiquetas de las claves de cada dirección con `SIGNATURE_AEAD`: la de
+# los mensajes del cliente al servidor y la de los del servidor al cliente.
+DIRECTION_CLIENT = b"c2s"
+DIRECTION_SERVER = b"s2c"
+
+# Los algoritmos de cifrado de cada mensaje. Por defecto se usa el de
+# `nacl.public.Box` y los demás usan una clave derivada de la compartida.
+CIPHER_XSALSA20_POLY1305  = "xsalsa20poly1305"
+CIPHER_AES256_GCM         = "aes256gcm"
+CIPHER_XCHACHA20_POLY1305 = "xchacha20poly1305"
+CIPHER_MODES = (CIPHER_XSALSA20_POLY1305, CIPHER_AES256_GCM, CIPHER_XCHACHA20_POLY1305)
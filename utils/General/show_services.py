@@ -1,6 +1,8 @@
 import os
+import sys
 import pathlib
 import importlib
+import importlib.util
 import inspect
 import logging
 from typing import (
@@ -22,10 +24,33 @@ _ = create_translation.create("show_services")
 class HandlerAux(object):
     pass
 
+def _import_fresh(name, path):
+    parent = name.rpartition(".")[0]
+
+    if (parent):
+        importlib.import_module(parent)
+
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+
+    # Se compila el código fuente y no el guardado en caché, ya que éste se
+    # valida con la fecha de modificación en segundos.
+    with open(path, "rb") as fd:
+        code = compile(fd.read(), path, "exec")
+
+    exec(code, module.__dict__)
+
+    # Sólo si no hubo errores reemplaza al anterior. El módulo anterior no se
+    # modifica, así que lo que aún lo use no ve la nueva versión.
+    sys.modules[name] = module
+
+    return module
+
 def return_handle(
     filename: str,
     ext: str,
-    autoreload: bool = False
+    autoreload: bool = False,
+    reload: bool = False
     
 ) -> object:
     """Importa un archivo de python
@@ -44,6 +69,10 @@ def return_handle(
           **True** para autorecargar el módulo al ser modificado.
           Tiene que estar habilitado con `tornado.autoreload.start()`
 
+        reload:
+          **True** para importar de nuevo el archivo en un nuevo módulo,
+          aunque ya haya sido importado
+
     Returns:
        La clase del servicio
     """
@@ -53,7 +82,11 @@ def return_handle(
     if (autoreload):
         tornado.autoreload.watch(filename + ext)
 
-    service = importlib.import_module(service2import)
+    if (reload):
+        service = _import_fresh(service2import, filename + ext)
+
+    else:
+        service = importlib.import_module(service2import)
 
     if not (hasattr(service, defaults.handler_name)):
         logging.warning(_("'%s' no existe en el servicio: %s"), defaults.handler_name, filename)
@@ -93,7 +126,8 @@ def get_module(
     file: str,
     autoreload: bool = False, *,
     return_name: bool = False,
-    only_name: bool = False
+    only_name: bool = False,
+    reload: bool = False
     
 ) -> Union[Tuple[str, object], object]:
     """Importa un archivo de python
@@ -120,6 +154,10 @@ def get_module(
           Esta opción no carga el archivo en memoria, simplemente busca
           y parsea el nombre.
 
+        reload:
+          **True** para importar de nuevo el archivo aunque ya haya sido
+          importado (ver `return_handle()`)
+
     """
 
     file = remove_badchars.remove(file, "/")
@@ -128,7 +166,7 @@ def get_module(
     service_name = parse_path(service_path)
 
     if not (only_name):
-        service_object = return_handle(service_path, extension, autoreload)
+        service_object = return_handle(service_path, extension, autoreload, reload)
 
         if (return_name):
             return (service_name, service_object)
@@ -7,6 +7,7 @@ __all__ = [
     "init_db",
     "init_log",
     "isinstance_multiple",
+    "lru_cache",
     "netparse",
     "parse_args",
     "procs_repr",
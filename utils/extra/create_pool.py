@@ -1,4 +1,5 @@
 import ssl
+import asyncio
 
 from typing import Tuple, Optional
 
@@ -10,6 +11,21 @@ from utils.General import parse_config
 
 from config import defaults
 
+async def prewarm(pool: aiomysql.Pool) -> None:
+    """Comprueba las `minsize` conexiones de la piscina
+
+    `aiomysql.create_pool()` ya crea las conexiones, pero ejecutando una
+    consulta en cada una se detecta un problema con MySQL (como permisos
+    o una base de datos que no existe) antes de atender a los clientes.
+    """
+
+    async def ping():
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute("SELECT 1")
+
+    await asyncio.gather(*(ping() for _ in range(pool.minsize)))
+
 async def create(
     database: Optional[str] = None,
     only_pool: bool = False,
@@ -65,7 +81,14 @@ async def create(
     if (database is None):
         database = server_config["mysql_db"]
 
+    minsize = max(db_config.get("pool_minsize"), 0)
+    maxsize = max(db_config.get("pool_maxsize"), minsize, 1)
+
     pool = await aiomysql.create_pool(
+        minsize=minsize,
+        maxsize=maxsize,
+        pool_recycle=db_config.get("pool_recycle"),
+        connect_timeout=db_config.get("connect_timeout"),
         read_default_file=defaults.fileconfig,
         read_default_group="MySQL",
         db=database,
@@ -74,8 +97,11 @@ async def create(
 
     )
 
+    if (db_config.get("pool_prewarm")):
+        await prewarm(pool)
+
     if (only_pool):
         return pool
 
     else:
-        return dbConnector.UTeslaConnector(pool)
+        return dbConnector.UTeslaConnector(pool, db_config.get("fetch_size"))
@@ -0,0 +1,116 @@
+import time
+import collections
+
+from typing import Any, Optional, Hashable
+
+from utils.extra import create_translation
+
+_ = create_translation.create("lru_cache")
+
+# Usado para distinguir un valor inexistente de **None**
+_MISSING = object()
+
+class LRUCache:
+    """
+    Caché en memoria con un tamaño máximo y un tiempo de vida opcional
+
+    Cuando se alcanza el tamaño máximo se descarta el elemento usado hace
+    más tiempo.
+
+    Attributes:
+        maxsize: El número máximo de elementos
+        ttl: Los segundos que vive cada elemento. **None** para que no caduquen.
+        hits: Las veces que se encontró un elemento
+        misses: Las veces que no se encontró un elemento
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: Optional[float] = None):
+        if (maxsize <= 0):
+            raise ValueError(_("El tamaño máximo debe ser mayor que cero"))
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+        self.__data = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING, count=False) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None, *, count: bool = True) -> Any:
+        """Obtiene un elemento y lo marca como el más reciente
+
+        Args:
+            key:
+              La clave del elemento
+
+            default:
+              El valor a retornar si no existe o ya caducó
+
+            count:
+              Actualizar o no `hits` y `misses`
+
+        Returns:
+            El valor del elemento o ``default``
+        """
+
+        item = self.__data.get(key)
+
+        if (item is not None):
+            (value, expires) = item
+
+            if (expires is None) or (expires > time.monotonic()):
+                self.__data.move_to_end(key)
+
+                if (count):
+                    self.hits += 1
+
+                return value
+
+            del self.__data[key]
+
+        if (count):
+            self.misses += 1
+
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Agrega o reemplaza un elemento
+
+        Args:
+            key:
+              La clave del elemento
+
+            value:
+              El valor
+
+            ttl:
+              Los segundos que vive el elemento. Si no se especifica se usa `ttl`.
+        """
+
+        if (ttl is None):
+            ttl = self.ttl
+
+        self.__data[key] = (value, None if (ttl is None) else time.monotonic() + ttl)
+        self.__data.move_to_end(key)
+
+        while (len(self.__data) > self.maxsize):
+            self.__data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> bool:
+        """Borra un elemento
+
+        Returns:
+            **True** si el elemento existía
+        """
+
+        return self.__data.pop(key, _MISSING) is not _MISSING
+
+    def clear(self) -> None:
+        """Borra todos los elementos"""
+
+        self.__data.clear()
@@ -1,6 +1,7 @@
 import asyncio
 import inspect
-from typing import Dict, Any, Callable
+import weakref
+from typing import Dict, Any, Callable, Optional, Tuple
 
 from utils.extra import execute_possible_coroutine
 from utils.extra import create_translation
@@ -40,10 +41,7 @@ class RequiredArgument(Exception):
 
         self.key = key
 
-def parse(function: Callable[..., Any]) -> Dict[int, dict]:
-    """Analiza una función y extrae los parámetros junto con
-    sus argumentos pre-determinados (si los contiene)"""
-
+def _parse(function):
     sig = inspect.signature(function)
 
     args = {
@@ -64,6 +62,159 @@ def parse(function: Callable[..., Any]) -> Dict[int, dict]:
 
     return args
 
+class Binder(object):
+    """El análisis de los parámetros de una función
+
+    Se construye una sola vez por cada función para que al llamarla solo
+    se tenga que recorrer la lista de parámetros ya analizados, sin usar
+    `inspect.signature()` en cada llamada.
+
+    Attributes:
+        parameters: Los parámetros por cada tipo (lo mismo que `parse()`)
+    """
+
+    __slots__ = ("parameters", "var_positional", "var_keyword", "positional", "keywords")
+
+    def __init__(self, function: Callable[..., Any]):
+        self.parameters = _parse(function)
+        self.var_positional = len(self.parameters[VAR_POSITIONAL]) >= 1
+        self.var_keyword = len(self.parameters[VAR_KEYWORD]) >= 1
+        # (nombre, análisis, valor por defecto, anotación)
+        self.positional = tuple(
+            (key, value, value["default"], value["annotation"])
+            for key, value in self.parameters[POSITIONAL_ONLY].items()
+
+        )
+        self.keywords = tuple(
+            (key, value["default"], value["annotation"])
+            for dictionary in (self.parameters[POSITIONAL_OR_KEYWORD], self.parameters[KEYWORD_ONLY])
+            for key, value in dictionary.items()
+
+        )
+
+    def bind(self, arguments: Dict[str, Any]) -> Tuple[list, Dict[str, Any]]:
+        """Convierte los argumentos del usuario en los argumentos de la función
+
+        Returns:
+            Los argumentos posicionales y los argumentos clave
+
+        Raises:
+            RequiredArgument: Falta un parámetro que es requerido
+        """
+
+        if (self.var_positional):
+            args = list(arguments.values())
+            kwargs = {}
+
+        elif (self.var_keyword):
+            args = []
+            kwargs = dict(arguments)
+
+        else:
+            args = []
+            kwargs = {}
+
+        for key, value, default_value, annotation in self.positional:
+            if (value in args):
+                continue
+
+            try:
+                real_value = arguments[key]
+
+            except KeyError:
+                if (default_value == empty):
+                    raise RequiredArgument(key, _("'{}' es necesario para poder continuar").format(key))
+
+                else:
+                    real_value = default_value
+
+            if (real_value is None):
+                real_value = default_value
+
+            args.append(
+                real_value if (annotation is empty) else convert(key, real_value, annotation)
+
+            )
+
+        for key, default_value, annotation in self.keywords:
+            if (key in kwargs):
+                continue
+
+            real_value = arguments.get(key, default_value)
+
+            if (real_value is empty):
+                raise RequiredArgument(key, _("'{}' es necesario para poder continuar").format(key))
+
+            if (real_value is None):
+                real_value = default_value
+
+            kwargs[key] = real_value if (annotation is empty) else convert(key, real_value, annotation)
+
+        return (args, kwargs)
+
+# Los analizadores de cada función. Los métodos se guardan por su función
+# para que sirva el mismo analizador en todas las instancias de la clase.
+_binders = weakref.WeakKeyDictionary()
+_method_binders = weakref.WeakKeyDictionary()
+
+def get_binder(function: Callable[..., Any]) -> "Binder":
+    """Obtiene el analizador de ``function`` creándolo si es necesario"""
+
+    if (inspect.ismethod(function)):
+        (cache, key) = (_method_binders, function.__func__)
+
+    else:
+        (cache, key) = (_binders, function)
+
+    try:
+        binder = cache.get(key)
+
+    except TypeError:
+        # No se puede crear una referencia débil (p. ej.: funciones integradas)
+        return Binder(function)
+
+    if (binder is None):
+        binder = Binder(function)
+
+        cache[key] = binder
+
+    return binder
+
+def invalidate(function: Optional[Callable[..., Any]] = None, /) -> None:
+    """Olvida los analizadores de ``function`` o de todas las funciones
+
+    Si ``function`` es una clase, también se olvidan los de sus métodos.
+    Útil cuando se recarga el módulo donde fueron definidas.
+    """
+
+    if (function is None):
+        _binders.clear()
+        _method_binders.clear()
+
+        return
+
+    functions = [function]
+
+    if (inspect.isclass(function)):
+        functions.extend(vars(function).values())
+
+    for func in functions:
+        for cache in (_binders, _method_binders):
+            try:
+                cache.pop(func, None)
+
+            except TypeError:
+                pass
+
+def parse(function: Callable[..., Any]) -> Dict[int, dict]:
+    """Analiza una función y extrae los parámetros junto con
+    sus argumentos pre-determinados (si los contiene)
+
+    El resultado se guarda en caché y no debe ser modificado.
+    """
+
+    return get_binder(function).parameters
+
 def convert(key: str, value: Any, type: Callable[..., Any]) -> Any:
     """Trata de convertir un valor en otro tipo de datos"""
 
@@ -102,66 +253,7 @@ async def async_execute_function(function: Callable[..., Any], arguments: Dict[s
         RequiredArgument: Falta un parámetro que es requerido
     """
 
-    parse_args = parse(function)
-
-    if (len(parse_args[VAR_POSITIONAL]) >= 1):
-        args = list(arguments.values())
-        kwargs = {}
-
-    elif (len(parse_args[VAR_KEYWORD]) >= 1):
-        args = []
-        kwargs = arguments
-
-    else:
-        args = []
-        kwargs = {}
-
-    for key, value in parse_args[POSITIONAL_ONLY].items():
-        if (value in args):
-            continue
-
-        default_value = value.get("default")
-        annotation = value.get("annotation")
-        
-        try:
-            real_value = arguments[key]
-
-        except KeyError:
-            if (default_value == empty):
-                raise RequiredArgument(key, _("'{}' es necesario para poder continuar").format(key))
-
-            else:
-                real_value = default_value
-        
-        if (real_value is None):
-            real_value = default_value
-
-        args.append(
-            convert(key, real_value, annotation)
-
-        )
-
-    for dictionary in (parse_args[POSITIONAL_OR_KEYWORD], parse_args[KEYWORD_ONLY]):
-        for key, value in dictionary.items():
-            if (key in kwargs):
-                continue
-
-            default_value = value.get("default")
-            annotation = value.get("annotation")
-
-            try:
-                real_value = arguments[key]
-
-            except KeyError:
-                real_value = default_value
-            
-            if (real_value == empty):
-                raise RequiredArgument(key, _("'{}' es necesario para poder continuar").format(key))
-            
-            if (real_value is None):
-                real_value = default_value
-
-            kwargs[key] = convert(key, real_value, annotation)
+    (args, kwargs) = get_binder(function).bind(arguments)
 
     return await execute_possible_coroutine.execute(
         function, *args, **kwargs